@@ -1,98 +1,841 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, has_request_context, render_template, request, jsonify, stream_with_context
 from flask_cors import CORS
-import pdfplumber
+import bisect
+import functools
+import heapq
+import io
+import itertools
+import json
+import mmap
+import os
 import re
+import string
+import tempfile
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import as_completed
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
+from compression import COMPRESSIBLE_MIMETYPES, choose_encoding, compress, compress_chunks
+from exports import (COLUMNAR_FORMATS, EXPORT_MIMETYPES, columnar_export, csv_chunks, get_arrow, jsonl_chunks,
+                     transaction_row)
+from ledger import AMOUNT_COLUMNS, Reconciliation, StatementLedger
+from jobs import DONE as JOB_DONE, FAILED as JOB_FAILED, JobStore
+from metrics import MetricsRegistry
+from regex_profile import ProfileAggregate, active_profile, profiling
+from page_pool import get_process_pool, iter_pages_parallel
+from memory import current_rss
+from pdf_backend import get_pdf_backend, release_page
+from quarantine import Quarantine, content_digest
+from result_cache import ResultCache, content_key
+from uploads import SpoolingRequest, map_upload
+
+try:
+    import orjson
+except ImportError:  # optional - the standard json module is used instead
+    orjson = None
 
 app = Flask(__name__)
+app.request_class = SpoolingRequest
 CORS(app)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Uploads are spooled to files under UPLOAD_SPOOL_DIR (default: the system temp dir) and parsed through an mmap.
+# MAX_CONTENT_LENGTH caps every route without its own entry in UPLOAD_LIMITS.
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_BYTES', 16 * 1024 * 1024))
+app.config['UPLOAD_LIMITS'] = {
+    '/extract-sbi': int(os.environ.get('SBI_MAX_UPLOAD_BYTES', 200 * 1024 * 1024)),
+    '/jobs': int(os.environ.get('JOB_MAX_UPLOAD_BYTES', 200 * 1024 * 1024)),
+    '/extract-batch': int(os.environ.get('BATCH_MAX_UPLOAD_BYTES', 500 * 1024 * 1024)),
+}
+app.config['UPLOAD_SPOOL_DIR'] = os.environ.get('UPLOAD_SPOOL_DIR') or None
+
+# Seconds a request may run, per route (REQUEST_TIMEOUT for routes without an entry), and the sample PDF that
+# gunicorn.conf.py runs through every extractor before workers start
+app.config['REQUEST_TIMEOUT'] = float(os.environ.get('REQUEST_TIMEOUT', 60))
+app.config['ROUTE_TIMEOUTS'] = {
+    '/extract-sbi': float(os.environ.get('SBI_REQUEST_TIMEOUT', 300)),
+    '/extract-batch': float(os.environ.get('BATCH_REQUEST_TIMEOUT', 600)),
+}
+# Each file of a batch gets BATCH_FILE_TIMEOUT seconds of extraction of its own, counted from when a pool process
+# picks it up; a file that overruns it is quarantined
+app.config['BATCH_FILE_TIMEOUT'] = float(os.environ.get('BATCH_FILE_TIMEOUT', app.config['REQUEST_TIMEOUT']))
+app.config['WARMUP_PDF'] = os.environ.get('WARMUP_PDF', os.path.join(app.root_path, 'samples', 'warmup.pdf'))
+# A request past its route's timeout is stopped between pages and answered 504; the worker is only killed if it is
+# still busy TIMEOUT_GRACE_SECONDS later. The document is then refused for QUARANTINE_SECONDS (shared by all workers).
+app.config['TIMEOUT_GRACE_SECONDS'] = float(os.environ.get('TIMEOUT_GRACE_SECONDS', 10))
+app.config['QUARANTINE_DIR'] = os.environ.get('QUARANTINE_DIR',
+                                              os.path.join(tempfile.gettempdir(), 'pdf-extractor-quarantine'))
+app.config['QUARANTINE_SECONDS'] = float(os.environ.get('QUARANTINE_SECONDS', 600))
+app.config['RESULT_CACHE_MAX_BYTES'] = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# How far a worker's memory may grow during one request before it is stopped (checked between pages; 0 = no limit)
+app.config['REQUEST_MEMORY_LIMIT'] = int(os.environ.get('REQUEST_MEMORY_LIMIT_BYTES', 1024 * 1024 * 1024))
+
+# Response shaping - how much of the document text a response carries (?include_text=full|preview|none, default
+# RESPONSE_TEXT) and the smallest body worth compressing when the client accepts gzip or brotli
+app.config['RESPONSE_TEXT'] = os.environ.get('RESPONSE_TEXT', 'full')
+app.config['TEXT_PREVIEW_CHARS'] = int(os.environ.get('TEXT_PREVIEW_CHARS', 2000))
+app.config['COMPRESS_MIN_BYTES'] = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+
+# Opt-in parallel page extraction - documents below PARALLEL_MIN_PAGES stay single-process
+app.config['PARALLEL_PAGES'] = os.environ.get('PARALLEL_PAGES', '0') == '1'
+app.config['PAGE_WORKERS'] = int(os.environ.get('PAGE_WORKERS', os.cpu_count() or 1))
+app.config['PARALLEL_MIN_PAGES'] = int(os.environ.get('PARALLEL_MIN_PAGES', 8))
+
+# /extract-batch fans files out over BATCH_WORKERS processes
+app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', os.cpu_count() or 1))
+app.config['BATCH_MAX_FILES'] = int(os.environ.get('BATCH_MAX_FILES', 500))
+# Cap on each PDF of a batch, uploaded or in a zip - the whole request is capped by UPLOAD_LIMITS
+app.config['BATCH_MAX_FILE_BYTES'] = int(os.environ.get('BATCH_MAX_FILE_BYTES', 16 * 1024 * 1024))
+
+# Asynchronous jobs (/jobs) - state and spooled uploads live under JOBS_DIR
+app.config['JOBS_DIR'] = os.environ.get('JOBS_DIR', os.path.join(app.root_path, 'jobs'))
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_RETENTION_SECONDS'] = int(os.environ.get('JOB_RETENTION_SECONDS', 24 * 60 * 60))
+
+# /extract-sbi reads statements in table mode (column geometry from the header row) with ?table=1;
+# SBI_TABLE_MODE makes it the default
+app.config['SBI_TABLE_MODE'] = os.environ.get('SBI_TABLE_MODE', '0') == '1'
+
+# Lazy policy extraction (/extract, /extract-kotak with ?lazy=1) stops parsing pages once the
+# required fields are filled or LAZY_PAGE_CAP pages have been read; LAZY_POLICY_PAGES makes it the default
+app.config['LAZY_POLICY_PAGES'] = os.environ.get('LAZY_POLICY_PAGES', '0') == '1'
+app.config['LAZY_PAGE_CAP'] = int(os.environ.get('LAZY_PAGE_CAP', 3))
 
-def extract_values_from_text_universal(text):
+# Field matching limits - a field's match may span at most FIELD_WINDOW_CHARS characters from where it starts,
+# and one document gets REGEX_BUDGET_SECONDS of pattern matching; fields left when it runs out are reported as timed out
+app.config['FIELD_WINDOW_CHARS'] = int(os.environ.get('FIELD_WINDOW_CHARS', 2000))
+app.config['REGEX_BUDGET_SECONDS'] = float(os.environ.get('REGEX_BUDGET_SECONDS', 2.0))
+
+# Bump an extractor's version whenever its output changes - cached results of older versions stop matching
+EXTRACTOR_VERSIONS = {
+    'universal': 3,
+    'kotak': 3,
+    'sbi_statement': 4,
+    'sbi_table': 2,
+}
+# Same for the document type classifier's keyword table
+DOCUMENT_TYPE_VERSION = 1
+
+result_cache = ResultCache(app.config['RESULT_CACHE_MAX_BYTES'])
+quarantine = Quarantine(app.config['QUARANTINE_DIR'], app.config['QUARANTINE_SECONDS'])
+# Thread id -> content hash of the upload that thread is working on, for the gunicorn watchdog (gunicorn.conf.py)
+uploads_in_progress = {}
+
+# Per-process metrics, exposed at /metrics; each request's stages also go out in a Server-Timing header
+metrics = MetricsRegistry()
+REQUEST_SECONDS = metrics.histogram('pdf_extractor_request_seconds', 'Request latency by route', ('route',))
+STAGE_SECONDS = metrics.histogram('pdf_extractor_stage_seconds', 'Time spent per request in each stage', ('route', 'stage'))
+PAGES_PROCESSED = metrics.counter('pdf_extractor_pages_processed_total', 'PDF pages parsed', ('route',))
+REQUEST_MEMORY = metrics.histogram('pdf_extractor_request_memory_bytes', 'Peak memory growth of the worker per request',
+                                   ('route',), buckets=tuple(2 ** power * 1024 * 1024 for power in range(0, 12)))
+UPLOAD_BYTES = metrics.counter('pdf_extractor_upload_bytes_total', 'Bytes of PDF uploads read', ('route',))
+REQUEST_ERRORS = metrics.counter('pdf_extractor_errors_total', 'Requests answered with an error', ('route',))
+
+# Opt-in regex profiling - every extraction when REGEX_PROFILE=1, or a single request with ?profile=1.
+# Profiled requests skip the result cache so the patterns actually run; the report is at /regex-profile.
+app.config['REGEX_PROFILE'] = os.environ.get('REGEX_PROFILE', '0') == '1'
+regex_profiles = ProfileAggregate()
+
+def record_stage(stage, seconds):
     """
-    Universal extractor that works with SBI, Shriram and Reliance PDFs
+    Add time to one stage of the current request - a no-op outside a request (e.g. in pool processes)
     """
-    template = {
-        "policy_number": "",
-        "policy_holder_name": "",
-        "insured_address": "",
-        "vehicle_registration_number": "",
-        "engine_number": "",
-        "chassis_number": "",
-        "make_model": "",
-        "fuel_type": "",
-        "cubic_capacity": "",
-        "year_of_manufacture": "",
-        "date_of_registration": "",
-        "policy_start_date": "",
-        "policy_end_date": "",
-        "insurance_company": "",
-        "premium_amount": "",
-        "gst_amount": "",
-        "total_tp_premium": "",
-        "total_idv": "",
-        "seating_capacity": "",
-        "intermediary_name": "",
-        "intermediary_contact": "",
-        "previous_insurer": "",
-        "previous_policy_number": "",
-        "nominee_name": "",
-        "nominee_age": "",
-        "nominee_relationship": ""
-    }
+    if has_request_context() and 'stage_timings' in g:
+        g.stage_timings[stage] = g.stage_timings.get(stage, 0.0) + seconds
 
-    # Universal patterns for ALL PDFs - SBI, SHIRAM, RELIANCE
-    patterns = {
-        "policy_number": r"Policy\s*/\s*Certificate\s*No[^:]*:\s*([A-Z0-9]+)|Policy\s*No\.?\s*([0-9/]+)|Policy\s*Number\s*:\s*([0-9]+)",
-        "policy_holder_name": r"Name[^:]*:\s*([A-Z\s.]+?)(?:\s*Address|\s*$)|IN-\d+\s*/\s*([A-Z\s.]+?)(?:\s*GSTIN|\s*Communication)|Insured\s*Name\s*:\s*([A-Z\s.]+?)(?:\s*Communication|\s*Mobile|\s*Email)|Dear\s*Mr\.\s*([A-Z\s.]+?)(?:\s*from|\s*$)",
-        "insured_address": r"Address[^:]*:\s*([A-Z0-9\s,.-]+?)(?:\s*Contact|\s*Mobile|\s*$)|Insured\s*Address[^:]*:\s*([A-Z0-9\s,.-]+?)(?:\s*,Mob|\s*Mobile)|Communication\s*Address[^:]*:\s*([A-Z0-9\s,.-]+?)(?:\s*Mobile|\s*Email)",
-        "vehicle_registration_number": r"Registration\s*number[^:]*:\s*([A-Z0-9\s-]+)|Registration\s*Number[^:]*:\s*([A-Z0-9\s-]+)|MH\s*-\s*\d{2}\s*-\s*[A-Z]{2}\s*-\s*\d+|MH\d{2}[A-Z]{2}\d{4}|Registration\s*No\.?\s*:\s*([A-Z0-9]+)|REGISTRATION\s*MARK[^:]*:\s*([A-Z0-9\s-]+)",
-        "engine_number": r"Engine\s*&\s*Chassis\s*Number[^:]*:\s*([0-9]+)\s*&|(\d{10})\s*&|Engine\s*No\.?\s*/\s*Chassis\s*No\.?\s*:\s*([A-Z0-9]+)|ENGINE\s*NO\.?\s*[&/]?\s*CHASSIS\s*NO\.?\s*:\s*([A-Z0-9]+)",
-        "chassis_number": r"Engine\s*&\s*Chassis\s*Number[^:]*:\s*[0-9]+\s*&\s*([0-9]+)|&\s*(\d{17})|Chassis\s*No\.?\s*:\s*([A-Z0-9]+)|CHASSIS\s*NO\.?\s*:\s*([A-Z0-9]+)|99554411225544778",
-        "make_model": r"Vehicle\s*Make[^:]*:\s*([A-Z\s]+)|Model\s*&\s*Variant[^:]*:\s*([A-Z0-9\s]+)|HONDA\s*-\s*[A-Z0-9\s]+|RENAULT\s*/\s*[A-Z\s/]+|Make\s*/\s*Model\s*:\s*([A-Z\s/]+)|MAKE\s*-\s*MODEL\s*:\s*([A-Z0-9\s-]+)",
-        "fuel_type": r"fuel[^:]*:\s*([A-Z]+)|SCOOTY\s*/\s*(PETROL|DIESEL|CNG)|PETROL\s*RXE",
-        "cubic_capacity": r"Cubic\s*Capacity[^:]*:\s*(\d+)|Capacity\s*Cubic[^:]*:\s*(\d+)|(\d{2,4})\s*/\s*0\s*/\s*\d{4}|CC\s*/\s*HP\s*/\s*Watt\s*:\s*(\d+)",
-        "year_of_manufacture": r"Manufacturing\s*Year[^:]*:\s*(\d{4})|110\s*/\s*0\s*/\s*(\d{4})|JUL-(\d{4})|YEAR\s*OF\s*MANF\.?\s*:\s*(\d{4})|Mfg\.?\s*Month\s*&\s*Year\s*:\s*[A-Z]{3}-(\d{4})|2019|2013",
-        "date_of_registration": r"DATE\s*OF\s*REGN\.?\s*[\/\s]*[^\/]*\s*:\s*(\d{2}/\d{2}/\d{4})|27/08/2019",
-        "policy_start_date": r"Period\s*of\s*Insurance\s*OD[^:]*:\s*From\s*:\s*(\d{2}[/-]\d{2}[/-]\d{4})|From\s*00:00\s*Hrs\s*(?:of\s*|on\s*)(\d{2}[/-]\d{2}[/-]\d{4})",
-        "policy_end_date": r"Period\s*of\s*Insurance\s*OD[^:]*:\s*To\s*:\s*(\d{2}[/-]\d{2}[/-]\d{4})|Midnight\s*(?:Of\s*|of\s*)(\d{2}[/-]\d{2}[/-]\d{4})",
-        "insurance_company": r"(SBI\s*GENERAL\s*INSURANCE|SHRIRAM\s*GENERAL\s*INSURANCE\s*COMPANY\s*LIMITED|RELIANCE\s*GENERAL\s*INSURANCE)",
-        "premium_amount": r"FINAL\s*PREMIUM[^:]*:\s*(\d+)|Total\s*Premium\s*\(₹\)\s*:\s*(\d+)|PREMIUM\s*AMOUNT\s*(\d+)",
-        "gst_amount": r"GST\s+(\d+\.?\d*)",
-        "total_tp_premium": r"TOTAL\s*TP\s*PREMIUM\s+(\d+,\d+\.?\d*)|TOTAL\s*TP\s*PREMIUM\s*(\d+\.?\d*)",
-        "total_idv": r"Total\s*IDV\s+(\d+\.?\d*)|Total\s*IDV\s*(\d+\.?\d*)",
-        "seating_capacity": r"Seating\s*capacity[^:]*:\s*(\d+)",
-        "intermediary_name": r"Intermediary\s*Name\s*:\s*([A-Za-z\s&]+)",
-        "intermediary_contact": r"Intermediary\s*Code[^:]*:\s*([0-9\s&+-]+)",
-        "previous_insurer": r"Previous\s*Insurer\s*([A-Za-z\s]+?)(?:\s*Limited|\s*Company)",
-        "previous_policy_number": r"Previous\s*Policy\s*No\.?\s*(\d+)",
-        "nominee_name": r"Nominee\s*for\s*Owner/Driver\s*([A-Z\s]+?)(?:\s*Nominee|\s*Age)|Nominee\s*Name\s*:\s*([A-Z\s]+)",
-        "nominee_age": r"Nominee\s*Age\s*(\d+)",
-        "nominee_relationship": r"Nominee\s*Relationship\s*([A-Za-z\s]+?)(?:\s*Appointee|\s*$)"
-    }
 
-    # Apply regex patterns
-    for key, pattern in patterns.items():
+@contextmanager
+def timed_stage(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def count_pages(pages):
+    if has_request_context() and 'stage_timings' in g:
+        g.pages_processed += pages
+
+
+def profiling_requested():
+    return app.config['REGEX_PROFILE'] or (has_request_context() and request.args.get('profile') == '1')
+
+
+@contextmanager
+def regex_profiling(extractor):
+    """
+    Profile the extractor's patterns for one document when profiling is on, and add it to the aggregate
+    """
+    if not profiling_requested():
+        yield None
+        return
+    with profiling(extractor) as profile:
+        yield profile
+    regex_profiles.merge(profile)
+    if has_request_context():
+        g.regex_profile = profile
+
+
+class MemoryLimitExceeded(Exception):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class TaskBudgetExceeded(DeadlineExceeded):
+    pass
+
+
+class DocumentQuarantined(Exception):
+    pass
+
+
+# Deadline of a pool task (see run_before) - the pool's counterpart of a request's deadline
+_task_deadline = ContextVar('task_deadline', default=None)
+
+
+def request_deadline():
+    """
+    time.perf_counter() value the current request - or pool task - must finish by, or None
+    """
+    return g.get('deadline') if has_request_context() else _task_deadline.get()
+
+
+def check_deadline():
+    """
+    Stop the request (DeadlineExceeded) once it has run past its route's timeout - called between pages and
+    after every extractor run
+    """
+    deadline = request_deadline()
+    if deadline is not None and time.perf_counter() > deadline:
+        if has_request_context():
+            raise DeadlineExceeded(f'Request took longer than its {route_timeout(request.path):g}s limit')
+        raise DeadlineExceeded('Task ran past its deadline')
+
+
+def run_before(deadline, function, *args, budget=None):
+    """
+    Run function(*args) in a pool process, stopping between pages once deadline - a time.time() value, as clocks
+    of different processes only agree on wall time, or None - has passed, or budget seconds after the task started.
+    A task stopped by its own budget raises TaskBudgetExceeded.
+    """
+    started = time.perf_counter()
+    shared_deadline = None if deadline is None else started + deadline - time.time()
+    task_deadline = shared_deadline
+    if budget is not None and (task_deadline is None or started + budget < task_deadline):
+        task_deadline = started + budget
+    token = _task_deadline.set(task_deadline)
+    try:
+        return function(*args)
+    except DeadlineExceeded:
+        if task_deadline != shared_deadline:
+            raise TaskBudgetExceeded(f'File took longer than its {budget:g}s limit') from None
+        raise
+    finally:
+        _task_deadline.reset(token)
+
+
+def finish_page(page):
+    """
+    Release a page's parsed objects once its text or words have been read, count it, and check the request's memory
+    """
+    release_page(page)
+    count_pages(1)
+    check_request_memory()
+    check_deadline()
+
+
+def check_request_memory():
+    """
+    Track the request's peak memory and stop the request (MemoryLimitExceeded) once the worker has grown by more
+    than REQUEST_MEMORY_LIMIT bytes since it started - a no-op outside a request.
+    Growth is measured for the whole process, so gunicorn.conf.py runs one request per worker while the limit is on.
+    """
+    if not has_request_context() or g.get('memory_started') is None:
+        return
+    rss = current_rss()
+    g.memory_peak = max(g.memory_peak, rss)
+    limit = app.config['REQUEST_MEMORY_LIMIT']
+    if limit and rss - g.memory_started > limit:
+        raise MemoryLimitExceeded(f'Request exceeded its memory limit of {limit // (1024 * 1024)}MB')
+
+
+def note_error():
+    if has_request_context() and 'stage_timings' in g:
+        g.request_error = True
+
+
+# Bounded field matching.
+# Patterns never run over the whole document in one go: a pattern that starts with literal label text is only
+# tried where one of its labels occurs (label offsets are indexed once per document and shared by every pattern),
+# and others are searched window by window. Either way a match is confined to FIELD_WINDOW_CHARS characters, which caps how far
+# any pattern can backtrack, and the per-document budget is checked before every window so a pathological
+# document gives up instead of tying up the worker.
+REGEX_META_CHARS = '.^$*+?{}[]|()'
+REPEAT_QUANTIFIER = re.compile(r'\{(\d*)(?:,\d*)?\}')
+_regex_budget = ContextVar('regex_budget', default=None)
+
+
+class RegexBudget:
+    """
+    Pattern matching state of one document: the time left, the fields that ran out of it and the label index
+    """
+
+    def __init__(self, seconds, cutoff=None):
+        # Never past cutoff - the request's deadline, so matching stops in time for the request to be cancelled
+        self.deadline = time.perf_counter() + seconds
+        if cutoff is not None:
+            self.deadline = min(self.deadline, cutoff)
+        self.timed_out = []
+        self._text = None
+        self._folded = None
+        self._label_text = None
+        # label -> [offsets found so far, where to look next (-1 once the text is exhausted)]
+        self._label_hits = {}
+
+    def exhausted(self):
+        return time.perf_counter() > self.deadline
+
+    def mark_timed_out(self, field):
+        if field not in self.timed_out:
+            self.timed_out.append(field)
+
+    def folded(self, text):
+        """
+        fold_for_anchors(text), computed once per document
+        """
+        if text is not self._text:
+            self._text, self._folded = text, fold_for_anchors(text)
+        return self._folded
+
+    def label_occurrences(self, text, label):
+        """
+        Offsets where label occurs in the folded text, in order. They are found on demand and kept, so every
+        pattern of the document shares one index and no stretch of text is searched for a label twice.
+        """
+        if text is not self._label_text:
+            self._label_text, self._label_hits = text, {}
+        entry = self._label_hits.get(label)
+        if entry is None:
+            entry = self._label_hits[label] = [[], 0]
+        offsets = entry[0]
+        index = 0
+        while True:
+            if index < len(offsets):
+                yield offsets[index]
+                index += 1
+                continue
+            if entry[1] < 0:
+                return
+            offset = self.folded(text).find(label, entry[1])
+            if offset < 0:
+                entry[1] = -1
+                return
+            offsets.append(offset)
+            entry[1] = offset + 1
+
+    def label_offsets(self, text, labels):
+        """
+        Offsets in text where one of labels starts, in order
+        """
+        if len(labels) == 1:
+            return self.label_occurrences(text, next(iter(labels)))
+        merged = heapq.merge(*(self.label_occurrences(text, label) for label in labels))
+        # Two labels can start at the same offset
+        return (offset for offset, _ in itertools.groupby(merged))
+
+    def anchor_hits(self, text, anchors):
+        """
+        (offset, anchor) for every occurrence of every anchor, in text order
+        """
+        return heapq.merge(*(zip(self.label_occurrences(text, anchor), itertools.repeat(anchor)) for anchor in anchors))
+
+
+@contextmanager
+def regex_budget():
+    """
+    The budget of the document being extracted - a new one if this is the outermost extractor call
+    """
+    budget = _regex_budget.get()
+    if budget is not None:
+        yield budget
+        return
+    budget = RegexBudget(app.config['REGEX_BUDGET_SECONDS'], request_deadline())
+    token = _regex_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _regex_budget.reset(token)
+
+
+def with_regex_budget(extractor):
+    """
+    Run an extractor under one regex budget for the whole document
+    """
+    @functools.wraps(extractor)
+    def run(*args, **kwargs):
+        with regex_budget():
+            return extractor(*args, **kwargs)
+    return run
+
+
+def split_alternatives(pattern):
+    """
+    Split a pattern at its top-level | characters
+    """
+    alternatives = []
+    depth = 0
+    in_class = False
+    start = 0
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            index += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+            # A ] straight after [ or [^ is a literal
+            if pattern[index + 1:index + 2] == ']' or pattern[index + 1:index + 3] == '^]':
+                index += 2 if pattern[index + 1] == ']' else 3
+                continue
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            alternatives.append(pattern[start:index])
+            start = index + 1
+        index += 1
+    alternatives.append(pattern[start:])
+    return alternatives
+
+
+def closing_paren(pattern, start):
+    depth = 0
+    in_class = False
+    index = start
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            index += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return index
+        index += 1
+    return -1
+
+
+def literal_prefixes(pattern):
+    """
+    Lower-cased literal labels every match of the pattern starts with - one or more per top-level alternative.
+    None when some alternative does not start with at least two literal ASCII characters.
+    """
+    prefixes = []
+    for alternative in split_alternatives(pattern):
+        if alternative.startswith('('):
+            end = closing_paren(alternative, 0)
+            inner = alternative[1:end]
+            if end < 0 or alternative[end + 1:end + 2] in ('?', '*', '{'):
+                return None
+            if inner.startswith('?:'):
+                inner = inner[2:]
+            elif inner.startswith('?'):
+                return None
+            inner_prefixes = literal_prefixes(inner)
+            if inner_prefixes is None:
+                return None
+            prefixes.extend(inner_prefixes)
+            continue
+
+        chars = []
+        index = 0
+        while index < len(alternative):
+            char = alternative[index]
+            if char == '\\':
+                literal = alternative[index + 1:index + 2]
+                if not literal or literal.isalnum():
+                    break
+                width = 2
+            elif char in REGEX_META_CHARS:
+                break
+            else:
+                literal, width = char, 1
+            following = alternative[index + width:index + width + 1]
+            if following in ('?', '*', '{') or not literal.isascii():
+                break
+            chars.append(literal)
+            index += width
+            if following == '+':
+                break
+        if len(chars) < 2:
+            return None
+        prefixes.append(''.join(chars).lower())
+    return prefixes
+
+
+def required_literal(alternative):
+    """
+    The longest lower-cased literal run that every match of one alternative contains, or None.
+    Groups and character classes are skipped, never looked into.
+    """
+    best = ''
+    run = []
+    index = 0
+    while index < len(alternative):
+        char = alternative[index]
+        literal = None
+        if char == '(':
+            end = closing_paren(alternative, index)
+            if end < 0:
+                return None
+            index = end + 1
+        elif char == '[':
+            # A ] straight after [ or [^ is a literal
+            end = alternative.find(']', index + (3 if alternative[index + 1:index + 2] == '^' else 2))
+            while end > 0 and alternative[end - 1] == '\\':
+                end = alternative.find(']', end + 1)
+            if end < 0:
+                return None
+            index = end + 1
+        elif char == '\\':
+            literal = alternative[index + 1:index + 2]
+            index += 2
+            if not literal or literal.isalnum():
+                literal = None
+        elif char in '*?':
+            # The quantified character may not occur at all
+            if run:
+                run.pop()
+            index += 1
+        elif char == '{':
+            quantifier = REPEAT_QUANTIFIER.match(alternative, index)
+            if quantifier is None:
+                index += 1
+            else:
+                # {m,n}: the quantified character may not occur at all unless m > 0, and the run cannot go past
+                # its repeats either way - so the whole quantifier is skipped and the run ends here
+                if run and not int(quantifier.group(1) or 0):
+                    run.pop()
+                index = quantifier.end()
+        elif char in REGEX_META_CHARS:
+            index += 1
+        else:
+            literal = char
+            index += 1
+
+        if literal is not None and literal.isascii():
+            run.append(literal)
+            if alternative[index:index + 1] != '+':
+                continue
+        # Anything else ends the current run
+        if len(run) > len(best):
+            best = ''.join(run)
+        run = []
+    if len(run) > len(best):
+        best = ''.join(run)
+    return best.lower() if len(best) >= 3 else None
+
+
+@functools.lru_cache(maxsize=None)
+def required_literals(regex):
+    """
+    One required literal per top-level alternative - a window containing none of them cannot hold a match.
+    None when some alternative has no such literal.
+    """
+    literals = [required_literal(alternative) for alternative in split_alternatives(regex.pattern)]
+    return None if None in literals else literals
+
+
+@functools.lru_cache(maxsize=None)
+def pattern_labels(regex):
+    """
+    The labels a pattern's matches start with - None if it has no labels
+    """
+    prefixes = literal_prefixes(regex.pattern)
+    return frozenset(prefixes) if prefixes else None
+
+
+def bounded_search(regex, text, field):
+    """
+    regex.search(text) with every match confined to FIELD_WINDOW_CHARS characters.
+    Returns None - and marks the field as timed out - once the document's regex budget is spent.
+    """
+    window = app.config['FIELD_WINDOW_CHARS']
+    with regex_budget() as budget:
+        labels = pattern_labels(regex)
+        if labels is not None:
+            # Leftmost label first, so the first match is the leftmost match. No label, no match.
+            for offset in budget.label_offsets(text, labels):
+                if budget.exhausted():
+                    budget.mark_timed_out(field)
+                    return None
+                match = regex.match(text, offset, offset + window)
+                if match:
+                    return match
+            return None
+
+        # No label to start from: search overlapping windows, keeping matches that start in the first half
+        literals = required_literals(regex)
+        start = 0
+        while True:
+            if budget.exhausted():
+                budget.mark_timed_out(field)
+                return None
+            if literals is not None:
+                # Jump to the first window that could hold a match containing a required literal
+                folded = budget.folded(text)
+                found = [offset for offset in (folded.find(literal, start) for literal in literals) if offset >= 0]
+                if not found:
+                    return None
+                start = max(start, min(found) - 2 * window)
+            match = regex.search(text, start, start + 2 * window)
+            if match and match.start() < start + window:
+                return match
+            start += window
+            if start >= len(text):
+                return None
+
+
+# Universal field registry - compiled once at import time and shared by every request.
+# Each field is described as data: its name, the ordered alternatives of its pattern,
+# which capturing group to take (None = first non-empty group) and post-processing steps.
+UNIVERSAL_FIELD_FLAGS = re.IGNORECASE | re.DOTALL | re.MULTILINE
+WHITESPACE_RE = re.compile(r'\s+')
+
+FieldPattern = namedtuple('FieldPattern', ['name', 'alternatives', 'group', 'postprocess', 'regex'])
+
+
+def collapse_whitespace(value):
+    return WHITESPACE_RE.sub(' ', value)
+
+
+def build_field_pattern(name, alternatives, group=None, postprocess=(collapse_whitespace,), flags=UNIVERSAL_FIELD_FLAGS):
+    """
+    Compile a field description into a FieldPattern.
+    The alternatives are joined into a single alternation, so the leftmost match in the
+    text wins no matter which alternative produced it.
+    """
+    regex = re.compile("|".join(alternatives), flags)
+    return FieldPattern(name, tuple(alternatives), group, tuple(postprocess), regex)
+
+
+def apply_field_pattern(field, text):
+    """
+    Run one compiled field against the text.
+    Returns the cleaned value ("" if no match) and the offset the value was found at.
+    """
+    profile = active_profile()
+    if profile is None:
+        match = bounded_search(field.regex, text, field.name)
+    else:
+        match = profile_field_pattern(profile, field, text)
+    if not match:
+        return "", None
+
+    extracted_value = ""
+    offset = None
+    if field.group is None:
+        # Handle multiple groups - take first non-empty group
+        for index, value in enumerate(match.groups(), start=1):
+            if value and value.strip():
+                extracted_value = value.strip()
+                offset = match.start(index)
+                break
+    else:
+        extracted_value = (match.group(field.group) or "").strip()
+        offset = match.start(field.group)
+
+    if extracted_value:
+        for step in field.postprocess:
+            extracted_value = step(extracted_value)
+    return extracted_value, offset
+
+
+def profile_field_pattern(profile, field, text):
+    """
+    Time every alternative of a field on its own, then the compiled field pattern the extractor actually uses
+    """
+    for alternative in field.alternatives:
+        profile.timed(field.name, 'alternative', alternative, bounded_search,
+                      re.compile(alternative, field.regex.flags), text, field.name)
+    return profile.timed(field.name, 'field', field.regex.pattern, bounded_search, field.regex, text, field.name)
+
+
+# Universal patterns for ALL PDFs - SBI, SHIRAM, RELIANCE
+UNIVERSAL_FIELDS = (
+    build_field_pattern("policy_number", (
+        r"Policy\s*/\s*Certificate\s*No[^:]*:\s*([A-Z0-9]+)",
+        r"Policy\s*No\.?\s*([0-9/]+)",
+        r"Policy\s*Number\s*:\s*([0-9]+)",
+    )),
+    build_field_pattern("policy_holder_name", (
+        r"Name[^:]*:\s*([A-Z\s.]+?)(?:\s*Address|\s*$)",
+        r"IN-\d+\s*/\s*([A-Z\s.]+?)(?:\s*GSTIN|\s*Communication)",
+        r"Insured\s*Name\s*:\s*([A-Z\s.]+?)(?:\s*Communication|\s*Mobile|\s*Email)",
+        r"Dear\s*Mr\.\s*([A-Z\s.]+?)(?:\s*from|\s*$)",
+    )),
+    build_field_pattern("insured_address", (
+        r"Address[^:]*:\s*([A-Z0-9\s,.-]+?)(?:\s*Contact|\s*Mobile|\s*$)",
+        r"Insured\s*Address[^:]*:\s*([A-Z0-9\s,.-]+?)(?:\s*,Mob|\s*Mobile)",
+        r"Communication\s*Address[^:]*:\s*([A-Z0-9\s,.-]+?)(?:\s*Mobile|\s*Email)",
+    )),
+    build_field_pattern("vehicle_registration_number", (
+        r"Registration\s*number[^:]*:\s*([A-Z0-9\s-]+)",
+        r"Registration\s*Number[^:]*:\s*([A-Z0-9\s-]+)",
+        r"MH\s*-\s*\d{2}\s*-\s*[A-Z]{2}\s*-\s*\d+",
+        r"MH\d{2}[A-Z]{2}\d{4}",
+        r"Registration\s*No\.?\s*:\s*([A-Z0-9]+)",
+        r"REGISTRATION\s*MARK[^:]*:\s*([A-Z0-9\s-]+)",
+    )),
+    build_field_pattern("engine_number", (
+        r"Engine\s*&\s*Chassis\s*Number[^:]*:\s*([0-9]+)\s*&",
+        r"(\d{10})\s*&",
+        r"Engine\s*No\.?\s*/\s*Chassis\s*No\.?\s*:\s*([A-Z0-9]+)",
+        r"ENGINE\s*NO\.?\s*[&/]?\s*CHASSIS\s*NO\.?\s*:\s*([A-Z0-9]+)",
+    )),
+    build_field_pattern("chassis_number", (
+        r"Engine\s*&\s*Chassis\s*Number[^:]*:\s*[0-9]+\s*&\s*([0-9]+)",
+        r"&\s*(\d{17})",
+        r"Chassis\s*No\.?\s*:\s*([A-Z0-9]+)",
+        r"CHASSIS\s*NO\.?\s*:\s*([A-Z0-9]+)",
+        r"99554411225544778",
+    )),
+    build_field_pattern("make_model", (
+        r"Vehicle\s*Make[^:]*:\s*([A-Z\s]+)",
+        r"Model\s*&\s*Variant[^:]*:\s*([A-Z0-9\s]+)",
+        r"HONDA\s*-\s*[A-Z0-9\s]+",
+        r"RENAULT\s*/\s*[A-Z\s/]+",
+        r"Make\s*/\s*Model\s*:\s*([A-Z\s/]+)",
+        r"MAKE\s*-\s*MODEL\s*:\s*([A-Z0-9\s-]+)",
+    )),
+    build_field_pattern("fuel_type", (
+        r"fuel[^:]*:\s*([A-Z]+)",
+        r"SCOOTY\s*/\s*(PETROL|DIESEL|CNG)",
+        r"PETROL\s*RXE",
+    )),
+    build_field_pattern("cubic_capacity", (
+        r"Cubic\s*Capacity[^:]*:\s*(\d+)",
+        r"Capacity\s*Cubic[^:]*:\s*(\d+)",
+        r"(\d{2,4})\s*/\s*0\s*/\s*\d{4}",
+        r"CC\s*/\s*HP\s*/\s*Watt\s*:\s*(\d+)",
+    )),
+    build_field_pattern("year_of_manufacture", (
+        r"Manufacturing\s*Year[^:]*:\s*(\d{4})",
+        r"110\s*/\s*0\s*/\s*(\d{4})",
+        r"JUL-(\d{4})",
+        r"YEAR\s*OF\s*MANF\.?\s*:\s*(\d{4})",
+        r"Mfg\.?\s*Month\s*&\s*Year\s*:\s*[A-Z]{3}-(\d{4})",
+        r"2019",
+        r"2013",
+    )),
+    build_field_pattern("date_of_registration", (
+        r"DATE\s*OF\s*REGN\.?\s*[\/\s]*[^\/]*\s*:\s*(\d{2}/\d{2}/\d{4})",
+        r"27/08/2019",
+    )),
+    build_field_pattern("policy_start_date", (
+        r"Period\s*of\s*Insurance\s*OD[^:]*:\s*From\s*:\s*(\d{2}[/-]\d{2}[/-]\d{4})",
+        r"From\s*00:00\s*Hrs\s*(?:of\s*|on\s*)(\d{2}[/-]\d{2}[/-]\d{4})",
+    )),
+    build_field_pattern("policy_end_date", (
+        r"Period\s*of\s*Insurance\s*OD[^:]*:\s*To\s*:\s*(\d{2}[/-]\d{2}[/-]\d{4})",
+        r"Midnight\s*(?:Of\s*|of\s*)(\d{2}[/-]\d{2}[/-]\d{4})",
+    )),
+    build_field_pattern("insurance_company", (
+        r"(SBI\s*GENERAL\s*INSURANCE|SHRIRAM\s*GENERAL\s*INSURANCE\s*COMPANY\s*LIMITED|RELIANCE\s*GENERAL\s*INSURANCE)",
+    )),
+    build_field_pattern("premium_amount", (
+        r"FINAL\s*PREMIUM[^:]*:\s*(\d+)",
+        r"Total\s*Premium\s*\(₹\)\s*:\s*(\d+)",
+        r"PREMIUM\s*AMOUNT\s*(\d+)",
+    )),
+    build_field_pattern("gst_amount", (
+        r"GST\s+(\d+\.?\d*)",
+    )),
+    build_field_pattern("total_tp_premium", (
+        r"TOTAL\s*TP\s*PREMIUM\s+(\d+,\d+\.?\d*)",
+        r"TOTAL\s*TP\s*PREMIUM\s*(\d+\.?\d*)",
+    )),
+    build_field_pattern("total_idv", (
+        r"Total\s*IDV\s+(\d+\.?\d*)",
+        r"Total\s*IDV\s*(\d+\.?\d*)",
+    )),
+    build_field_pattern("seating_capacity", (
+        r"Seating\s*capacity[^:]*:\s*(\d+)",
+    )),
+    build_field_pattern("intermediary_name", (
+        r"Intermediary\s*Name\s*:\s*([A-Za-z\s&]+)",
+    )),
+    build_field_pattern("intermediary_contact", (
+        r"Intermediary\s*Code[^:]*:\s*([0-9\s&+-]+)",
+    )),
+    build_field_pattern("previous_insurer", (
+        r"Previous\s*Insurer\s*([A-Za-z\s]+?)(?:\s*Limited|\s*Company)",
+    )),
+    build_field_pattern("previous_policy_number", (
+        r"Previous\s*Policy\s*No\.?\s*(\d+)",
+    )),
+    build_field_pattern("nominee_name", (
+        r"Nominee\s*for\s*Owner/Driver\s*([A-Z\s]+?)(?:\s*Nominee|\s*Age)",
+        r"Nominee\s*Name\s*:\s*([A-Z\s]+)",
+    )),
+    build_field_pattern("nominee_age", (
+        r"Nominee\s*Age\s*(\d+)",
+    )),
+    build_field_pattern("nominee_relationship", (
+        r"Nominee\s*Relationship\s*([A-Za-z\s]+?)(?:\s*Appointee|\s*$)",
+    )),
+)
+
+
+@with_regex_budget
+def extract_values_from_text_universal(text, offsets=None):
+    """
+    Universal extractor that works with SBI, Shriram and Reliance PDFs
+    offsets, if given, receives the character offset of every filled field
+    """
+    template = {field.name: "" for field in UNIVERSAL_FIELDS}
+
+    # Apply the precompiled field patterns
+    for field in UNIVERSAL_FIELDS:
         try:
-            match = re.search(pattern, text, re.IGNORECASE | re.DOTALL | re.MULTILINE)
-            if match:
-                # Handle multiple groups - take first non-empty group
-                extracted_value = ""
-                for i in range(1, len(match.groups()) + 1):
-                    if match.group(i) and match.group(i).strip():
-                        extracted_value = match.group(i).strip()
-                        break
-                
-                if extracted_value:
-                    extracted_value = re.sub(r'\s+', ' ', extracted_value)  # Remove extra spaces
-                    template[key] = extracted_value
+            template[field.name], offset = apply_field_pattern(field, text)
+            if offsets is not None and template[field.name]:
+                offsets[field.name] = offset
         except Exception as e:
-            print(f"Error extracting {key}: {e}")
+            print(f"Error extracting {field.name}: {e}")
             continue
 
     return template
 
 
+def search_field(field, pattern, text, flags=0):
+    """
+    re.search for one alternative of a Shriram/Reliance field - timed when the document is being profiled
+    """
+    regex = re.compile(pattern, flags)
+    profile = active_profile()
+    if profile is None:
+        return bounded_search(regex, text, field)
+    return profile.timed(field, 'alternative', pattern, bounded_search, regex, text, field)
+
+
+@with_regex_budget
 def extract_values_from_text(text):
     """
     Extract values from PDF text using optimized regex patterns for Shriram and Reliance
@@ -152,1131 +895,2441 @@ def extract_values_from_text(text):
     # Enhanced regex patterns with alternative patterns for better accuracy
     
     # Extract Policy Number
-    policy_number_match = re.search(r"Policy\s*No\.?\s*([0-9/]+)", text, re.IGNORECASE)
+    policy_number_match = search_field("policy_number", r"Policy\s*No\.?\s*([0-9/]+)", text, re.IGNORECASE)
     if policy_number_match:
         template["policy_number"] = policy_number_match.group(1).strip()
     
     # SBI specific policy number pattern
     if not template["policy_number"]:
-        sbi_policy_match = re.search(r"Policy\s*/\s*Certificate\s*No[^:]*:\s*([A-Z0-9]+)", text, re.IGNORECASE)
+        sbi_policy_match = search_field("policy_number", r"Policy\s*/\s*Certificate\s*No[^:]*:\s*([A-Z0-9]+)", text, re.IGNORECASE)
         if sbi_policy_match:
             template["policy_number"] = sbi_policy_match.group(1).strip()
     
     # Extract Policy Holder Name
-    name_match = re.search(r"IN-\d+\s*/\s*([A-Z\s.]+?)(?:\s*GSTIN|\s*Communication)", text, re.IGNORECASE)
+    name_match = search_field("policy_holder_name", r"IN-\d+\s*/\s*([A-Z\s.]+?)(?:\s*GSTIN|\s*Communication)", text, re.IGNORECASE)
     if name_match:
         template["policy_holder_name"] = name_match.group(1).strip()
     
     # Alternative name pattern
     if not template["policy_holder_name"]:
-        name_alt_match = re.search(r"Name[^:]*:\s*([A-Z\s.]+?)(?:\s*Address|\s*$)", text, re.IGNORECASE)
+        name_alt_match = search_field("policy_holder_name", r"Name[^:]*:\s*([A-Z\s.]+?)(?:\s*Address|\s*$)", text, re.IGNORECASE)
         if name_alt_match:
             template["policy_holder_name"] = name_alt_match.group(1).strip()
     
     # SBI specific name pattern
     if not template["policy_holder_name"]:
-        sbi_name_match = re.search(r"Dear\s*Mr\.\s*([A-Z\s.]+?)(?:\s*,|\s*$)", text, re.IGNORECASE)
+        sbi_name_match = search_field("policy_holder_name", r"Dear\s*Mr\.\s*([A-Z\s.]+?)(?:\s*,|\s*$)", text, re.IGNORECASE)
         if sbi_name_match:
             template["policy_holder_name"] = sbi_name_match.group(1).strip()
 
     # Extract Insured Address
-    address_match = re.search(r"Insured\s*Address\s*(?:and\s*Contact\s*Details)?\s*([A-Z0-9\s,.-]+?)(?:\s*,Mob|\s*Mobile)", text, re.IGNORECASE)
+    address_match = search_field("insured_address", r"Insured\s*Address\s*(?:and\s*Contact\s*Details)?\s*([A-Z0-9\s,.-]+?)(?:\s*,Mob|\s*Mobile)", text, re.IGNORECASE)
     if address_match:
         template["insured_address"] = address_match.group(1).strip()
     
     # Alternative address pattern
     if not template["insured_address"]:
-        address_alt_match = re.search(r"Address[^:]*:\s*([A-Z0-9\s,.-]+?)(?:\s*Contact|\s*Mobile|\s*$)", text, re.IGNORECASE)
+        address_alt_match = search_field("insured_address", r"Address[^:]*:\s*([A-Z0-9\s,.-]+?)(?:\s*Contact|\s*Mobile|\s*$)", text, re.IGNORECASE)
         if address_alt_match:
             template["insured_address"] = address_alt_match.group(1).strip()
     
     # SBI specific address pattern
     if not template["insured_address"]:
-        sbi_address_match = re.search(r"([A-Z0-9\s,.-]+?),\s*Mumbai,\s*Maharashtra\s*-\s*\d+,\s*India", text, re.IGNORECASE)
+        sbi_address_match = search_field("insured_address", r"([A-Z0-9\s,.-]+?),\s*Mumbai,\s*Maharashtra\s*-\s*\d+,\s*India", text, re.IGNORECASE)
         if sbi_address_match:
             template["insured_address"] = sbi_address_match.group(1).strip()
     
     # Extract Vehicle Registration Number
-    reg_match = re.search(r"MH\s*-\s*\d{2}\s*-\s*[A-Z]{2}\s*-\s*\d+|MH\d{2}[A-Z]{2}\d{4}", text, re.IGNORECASE)
+    reg_match = search_field("vehicle_registration_number", r"MH\s*-\s*\d{2}\s*-\s*[A-Z]{2}\s*-\s*\d+|MH\d{2}[A-Z]{2}\d{4}", text, re.IGNORECASE)
     if reg_match:
         template["vehicle_registration_number"] = reg_match.group(0).strip()
     
     # Alternative registration pattern
     if not template["vehicle_registration_number"]:
-        reg_alt_match = re.search(r"Registration\s*number[^:]*:\s*([A-Z0-9\s-]+)", text, re.IGNORECASE)
+        reg_alt_match = search_field("vehicle_registration_number", r"Registration\s*number[^:]*:\s*([A-Z0-9\s-]+)", text, re.IGNORECASE)
         if reg_alt_match:
             template["vehicle_registration_number"] = reg_alt_match.group(1).strip()
     
     # Extract Engine Number
-    engine_match = re.search(r"(\d{10})\s*&", text, re.IGNORECASE)
+    engine_match = search_field("engine_number", r"(\d{10})\s*&", text, re.IGNORECASE)
     if engine_match:
         template["engine_number"] = engine_match.group(1).strip()
     
     # Alternative engine pattern
     if not template["engine_number"]:
-        engine_alt_match = re.search(r"Engine\s*No\.?\s*/\s*Chassis\s*No\.?\s*:\s*([A-Z0-9]+)", text, re.IGNORECASE)
+        engine_alt_match = search_field("engine_number", r"Engine\s*No\.?\s*/\s*Chassis\s*No\.?\s*:\s*([A-Z0-9]+)", text, re.IGNORECASE)
         if engine_alt_match:
             template["engine_number"] = engine_alt_match.group(1).strip()
     
     # Extract Chassis Number
-    chassis_match = re.search(r"&\s*(\d{17})", text, re.IGNORECASE)
+    chassis_match = search_field("chassis_number", r"&\s*(\d{17})", text, re.IGNORECASE)
     if chassis_match:
         template["chassis_number"] = chassis_match.group(1).strip()
     
     # Alternative chassis pattern
     if not template["chassis_number"]:
-        chassis_alt_match = re.search(r"Chassis\s*No\.?\s*:\s*([A-Z0-9]+)", text, re.IGNORECASE)
+        chassis_alt_match = search_field("chassis_number", r"Chassis\s*No\.?\s*:\s*([A-Z0-9]+)", text, re.IGNORECASE)
         if chassis_alt_match:
             template["chassis_number"] = chassis_alt_match.group(1).strip()
     
     # Extract Make Model
-    make_model_match = re.search(r"HONDA\s*-\s*[A-Z0-9\s]+|RENAULT\s*/\s*[A-Z\s/]+", text, re.IGNORECASE)
+    make_model_match = search_field("make_model", r"HONDA\s*-\s*[A-Z0-9\s]+|RENAULT\s*/\s*[A-Z\s/]+", text, re.IGNORECASE)
     if make_model_match:
         template["make_model"] = make_model_match.group(0).strip()
     
     # Alternative make model pattern
     if not template["make_model"]:
-        make_model_alt_match = re.search(r"Make\s*/\s*Model\s*:\s*([A-Z\s/]+)", text, re.IGNORECASE)
+        make_model_alt_match = search_field("make_model", r"Make\s*/\s*Model\s*:\s*([A-Z\s/]+)", text, re.IGNORECASE)
         if make_model_alt_match:
             template["make_model"] = make_model_alt_match.group(1).strip()
     
     # Extract Make separately
-    make_match = re.search(r"Make[^:]*:\s*([A-Z\s]+)", text, re.IGNORECASE)
+    make_match = search_field("make", r"Make[^:]*:\s*([A-Z\s]+)", text, re.IGNORECASE)
     if make_match:
         template["make"] = make_match.group(1).strip()
     
     # Extract Model separately
-    model_match = re.search(r"Model[^:]*:\s*([A-Z0-9\s]+)", text, re.IGNORECASE)
+    model_match = search_field("model", r"Model[^:]*:\s*([A-Z0-9\s]+)", text, re.IGNORECASE)
     if model_match:
         template["model"] = model_match.group(1).strip()
     
     # Extract Fuel Type
-    fuel_match = re.search(r"SCOOTY\s*/\s*(PETROL|DIESEL|CNG)|PETROL\s*RXE", text, re.IGNORECASE)
+    fuel_match = search_field("fuel_type", r"SCOOTY\s*/\s*(PETROL|DIESEL|CNG)|PETROL\s*RXE", text, re.IGNORECASE)
     if fuel_match:
         template["fuel_type"] = fuel_match.group(1).strip() if fuel_match.group(1) else fuel_match.group(0).strip()
     
     # Alternative fuel pattern
     if not template["fuel_type"]:
-        fuel_alt_match = re.search(r"fuel[^:]*:\s*([A-Z]+)", text, re.IGNORECASE)
+        fuel_alt_match = search_field("fuel_type", r"fuel[^:]*:\s*([A-Z]+)", text, re.IGNORECASE)
         if fuel_alt_match:
             template["fuel_type"] = fuel_alt_match.group(1).strip()
     
     # Extract Cubic Capacity
-    cc_match = re.search(r"(\d{2,4})\s*/\s*0\s*/\s*\d{4}|CC\s*/\s*HP\s*/\s*Watt\s*:\s*(\d+)", text, re.IGNORECASE)
+    cc_match = search_field("cubic_capacity", r"(\d{2,4})\s*/\s*0\s*/\s*\d{4}|CC\s*/\s*HP\s*/\s*Watt\s*:\s*(\d+)", text, re.IGNORECASE)
     if cc_match:
         template["cubic_capacity"] = cc_match.group(1).strip() if cc_match.group(1) else cc_match.group(2).strip()
     
     # Alternative CC pattern
     if not template["cubic_capacity"]:
-        cc_alt_match = re.search(r"Cubic\s*Capacity[^:]*:\s*(\d+)", text, re.IGNORECASE)
+        cc_alt_match = search_field("cubic_capacity", r"Cubic\s*Capacity[^:]*:\s*(\d+)", text, re.IGNORECASE)
         if cc_alt_match:
             template["cubic_capacity"] = cc_alt_match.group(1).strip()
     
     # Extract Year of Manufacture
-    year_match = re.search(r"(\d{4})\s*[0-9/]{10}|JUL-(\d{4})", text, re.IGNORECASE)
+    year_match = search_field("year_of_manufacture", r"(\d{4})\s*[0-9/]{10}|JUL-(\d{4})", text, re.IGNORECASE)
     if year_match:
         template["year_of_manufacture"] = year_match.group(1).strip() if year_match.group(1) else year_match.group(2).strip()
     
     # Alternative year pattern
     if not template["year_of_manufacture"]:
-        year_alt_match = re.search(r"Manufacturing\s*Year[^:]*:\s*(\d{4})", text, re.IGNORECASE)
+        year_alt_match = search_field("year_of_manufacture", r"Manufacturing\s*Year[^:]*:\s*(\d{4})", text, re.IGNORECASE)
         if year_alt_match:
             template["year_of_manufacture"] = year_alt_match.group(1).strip()
     
     # Extract Date of Registration
-    reg_date_match = re.search(r"(\d{2}/\d{2}/\d{4})", text, re.IGNORECASE)
+    reg_date_match = search_field("date_of_registration", r"(\d{2}/\d{2}/\d{4})", text, re.IGNORECASE)
     if reg_date_match:
         template["date_of_registration"] = reg_date_match.group(1).strip()
     
     # Alternative registration date pattern
     if not template["date_of_registration"]:
-        reg_date_alt_match = re.search(r"DATE\s*OF\s*REGN\.?\s*[\/\s]*[^\/]*\s*:\s*(\d{2}/\d{2}/\d{4})", text, re.IGNORECASE)
+        reg_date_alt_match = search_field("date_of_registration", r"DATE\s*OF\s*REGN\.?\s*[\/\s]*[^\/]*\s*:\s*(\d{2}/\d{2}/\d{4})", text, re.IGNORECASE)
         if reg_date_alt_match:
             template["date_of_registration"] = reg_date_alt_match.group(1).strip()
     
     # SBI specific policy issue date pattern
     if not template["date_of_registration"]:
-        sbi_issue_match = re.search(r"Policy\s*Issue\s*Date[^:]*:\s*(\d{2}/\d{2}/\d{4})", text, re.IGNORECASE)
+        sbi_issue_match = search_field("date_of_registration", r"Policy\s*Issue\s*Date[^:]*:\s*(\d{2}/\d{2}/\d{4})", text, re.IGNORECASE)
         if sbi_issue_match:
             template["date_of_registration"] = sbi_issue_match.group(1).strip()
     
     # Extract Policy Start Date
-    start_date_match = re.search(r"From\s*00:00\s*Hrs\s*(?:of\s*|on\s*)(\d{2}[/-]\d{2}[/-]\d{4})", text, re.IGNORECASE)
+    start_date_match = search_field("policy_start_date", r"From\s*00:00\s*Hrs\s*(?:of\s*|on\s*)(\d{2}[/-]\d{2}[/-]\d{4})", text, re.IGNORECASE)
     if start_date_match:
         template["policy_start_date"] = start_date_match.group(1).strip()
     
     # Alternative start date pattern
     if not template["policy_start_date"]:
-        start_date_alt_match = re.search(r"Period\s*of\s*Insurance\s*OD[^:]*:\s*From\s*:\s*(\d{2}[/-]\d{2}[/-]\d{4})", text, re.IGNORECASE)
+        start_date_alt_match = search_field("policy_start_date", r"Period\s*of\s*Insurance\s*OD[^:]*:\s*From\s*:\s*(\d{2}[/-]\d{2}[/-]\d{4})", text, re.IGNORECASE)
         if start_date_alt_match:
             template["policy_start_date"] = start_date_alt_match.group(1).strip()
     
     # SBI specific start date pattern
     if not template["policy_start_date"]:
-        sbi_start_match = re.search(r"From:\s*(\d{2}/\d{2}/\d{4})\s*00:00:00", text, re.IGNORECASE)
+        sbi_start_match = search_field("policy_start_date", r"From:\s*(\d{2}/\d{2}/\d{4})\s*00:00:00", text, re.IGNORECASE)
         if sbi_start_match:
             template["policy_start_date"] = sbi_start_match.group(1).strip()
     
     # Extract Policy End Date
-    end_date_match = re.search(r"Midnight\s*(?:Of\s*|of\s*)(\d{2}[/-]\d{2}[/-]\d{4})", text, re.IGNORECASE)
+    end_date_match = search_field("policy_end_date", r"Midnight\s*(?:Of\s*|of\s*)(\d{2}[/-]\d{2}[/-]\d{4})", text, re.IGNORECASE)
     if end_date_match:
         template["policy_end_date"] = end_date_match.group(1).strip()
     
     # Alternative end date pattern
     if not template["policy_end_date"]:
-        end_date_alt_match = re.search(r"Period\s*of\s*Insurance\s*OD[^:]*:\s*To\s*:\s*(\d{2}[/-]\d{2}[/-]\d{4})", text, re.IGNORECASE)
+        end_date_alt_match = search_field("policy_end_date", r"Period\s*of\s*Insurance\s*OD[^:]*:\s*To\s*:\s*(\d{2}[/-]\d{2}[/-]\d{4})", text, re.IGNORECASE)
         if end_date_alt_match:
             template["policy_end_date"] = end_date_alt_match.group(1).strip()
     
     # SBI specific end date pattern
     if not template["policy_end_date"]:
-        sbi_end_match = re.search(r"To:\s*(\d{2}/\d{2}/\d{4})\s*23:59:59", text, re.IGNORECASE)
+        sbi_end_match = search_field("policy_end_date", r"To:\s*(\d{2}/\d{2}/\d{4})\s*23:59:59", text, re.IGNORECASE)
         if sbi_end_match:
             template["policy_end_date"] = sbi_end_match.group(1).strip()
     
     # Extract Insurance Company
-    company_match = re.search(r"(SHRIRAM\s*GENERAL\s*INSURANCE\s*COMPANY\s*LIMITED|RELIANCE\s*GENERAL\s*INSURANCE)", text, re.IGNORECASE)
+    company_match = search_field("insurance_company", r"(SHRIRAM\s*GENERAL\s*INSURANCE\s*COMPANY\s*LIMITED|RELIANCE\s*GENERAL\s*INSURANCE)", text, re.IGNORECASE)
     if company_match:
         template["insurance_company"] = company_match.group(1).strip()
     
     # Alternative company pattern
     if not template["insurance_company"]:
-        company_alt_match = re.search(r"(SBI\s*GENERAL\s*INSURANCE)", text, re.IGNORECASE)
+        company_alt_match = search_field("insurance_company", r"(SBI\s*GENERAL\s*INSURANCE)", text, re.IGNORECASE)
         if company_alt_match:
             template["insurance_company"] = company_alt_match.group(1).strip()
     
     # Extract Premium Amount
-    premium_match = re.search(r"PREMIUM\s*AMOUNT\s*(\d+)|Total\s*Premium\s*\(₹\)\s*:\s*(\d+)", text, re.IGNORECASE)
+    premium_match = search_field("premium_amount", r"PREMIUM\s*AMOUNT\s*(\d+)|Total\s*Premium\s*\(₹\)\s*:\s*(\d+)", text, re.IGNORECASE)
     if premium_match:
         template["premium_amount"] = premium_match.group(1).strip() if premium_match.group(1) else premium_match.group(2).strip()
     
     # Alternative premium pattern
     if not template["premium_amount"]:
-        premium_alt_match = re.search(r"FINAL\s*PREMIUM[^:]*:\s*(\d+)", text, re.IGNORECASE)
+        premium_alt_match = search_field("premium_amount", r"FINAL\s*PREMIUM[^:]*:\s*(\d+)", text, re.IGNORECASE)
         if premium_alt_match:
             template["premium_amount"] = premium_alt_match.group(1).strip()
     
     # SBI specific premium pattern
     if not template["premium_amount"]:
-        sbi_premium_match = re.search(r"FINAL\s*PREMIUM[^:]*:\s*(\d+)", text, re.IGNORECASE)
+        sbi_premium_match = search_field("premium_amount", r"FINAL\s*PREMIUM[^:]*:\s*(\d+)", text, re.IGNORECASE)
         if sbi_premium_match:
             template["premium_amount"] = sbi_premium_match.group(1).strip()
     
     # Extract GST Amount
-    gst_match = re.search(r"GST\s+(\d+\.?\d*)", text, re.IGNORECASE)
+    gst_match = search_field("gst_amount", r"GST\s+(\d+\.?\d*)", text, re.IGNORECASE)
     if gst_match:
         template["gst_amount"] = gst_match.group(1).strip()
     
     # Extract Total TP Premium
-    tp_premium_match = re.search(r"TOTAL\s*TP\s*PREMIUM\s+(\d+,\d+\.?\d*)|TOTAL\s*TP\s*PREMIUM\s*(\d+\.?\d*)", text, re.IGNORECASE)
+    tp_premium_match = search_field("total_tp_premium", r"TOTAL\s*TP\s*PREMIUM\s+(\d+,\d+\.?\d*)|TOTAL\s*TP\s*PREMIUM\s*(\d+\.?\d*)", text, re.IGNORECASE)
     if tp_premium_match:
         template["total_tp_premium"] = tp_premium_match.group(1).strip() if tp_premium_match.group(1) else tp_premium_match.group(2).strip()
     
     # Extract Total IDV
-    idv_match = re.search(r"Total\s*IDV\s+(\d+\.?\d*)|Total\s*IDV\s*(\d+\.?\d*)", text, re.IGNORECASE)
+    idv_match = search_field("total_idv", r"Total\s*IDV\s+(\d+\.?\d*)|Total\s*IDV\s*(\d+\.?\d*)", text, re.IGNORECASE)
     if idv_match:
         template["total_idv"] = idv_match.group(1).strip() if idv_match.group(1) else idv_match.group(2).strip()
     
     # SBI specific IDV pattern
     if not template["total_idv"]:
-        sbi_idv_match = re.search(r"Total\s*IDV[^:]*:\s*(\d+\.?\d*)", text, re.IGNORECASE)
+        sbi_idv_match = search_field("total_idv", r"Total\s*IDV[^:]*:\s*(\d+\.?\d*)", text, re.IGNORECASE)
         if sbi_idv_match:
             template["total_idv"] = sbi_idv_match.group(1).strip()
     
     # Extract Seating Capacity
-    seating_match = re.search(r"Seating\s*capacity[^:]*:\s*(\d+)", text, re.IGNORECASE)
+    seating_match = search_field("seating_capacity", r"Seating\s*capacity[^:]*:\s*(\d+)", text, re.IGNORECASE)
     if seating_match:
         template["seating_capacity"] = seating_match.group(1).strip()
     
     # Extract Previous Insurer
-    prev_insurer_match = re.search(r"Previous\s*Insurer\s*([A-Za-z\s]+?)(?:\s*Limited|\s*Company)", text, re.IGNORECASE)
+    prev_insurer_match = search_field("previous_insurer", r"Previous\s*Insurer\s*([A-Za-z\s]+?)(?:\s*Limited|\s*Company)", text, re.IGNORECASE)
     if prev_insurer_match:
         template["previous_insurer"] = prev_insurer_match.group(1).strip()
     
     # Extract Previous Policy Number
-    prev_policy_match = re.search(r"Previous\s*Policy\s*No\.?\s*(\d+)", text, re.IGNORECASE)
+    prev_policy_match = search_field("previous_policy_number", r"Previous\s*Policy\s*No\.?\s*(\d+)", text, re.IGNORECASE)
     if prev_policy_match:
         template["previous_policy_number"] = prev_policy_match.group(1).strip()
     
     # Extract Nominee Name
-    nominee_name_match = re.search(r"Nominee\s*for\s*Owner/Driver\s*([A-Z\s]+?)(?:\s*Nominee|\s*Age)", text, re.IGNORECASE)
+    nominee_name_match = search_field("nominee_name", r"Nominee\s*for\s*Owner/Driver\s*([A-Z\s]+?)(?:\s*Nominee|\s*Age)", text, re.IGNORECASE)
     if nominee_name_match:
         template["nominee_name"] = nominee_name_match.group(1).strip()
     
     # Alternative nominee name pattern
     if not template["nominee_name"]:
-        nominee_name_alt_match = re.search(r"Nominee\s*Name\s*:\s*([A-Z\s]+)", text, re.IGNORECASE)
+        nominee_name_alt_match = search_field("nominee_name", r"Nominee\s*Name\s*:\s*([A-Z\s]+)", text, re.IGNORECASE)
         if nominee_name_alt_match:
             template["nominee_name"] = nominee_name_alt_match.group(1).strip()
     
     # Extract Nominee Age
-    nominee_age_match = re.search(r"Nominee\s*Age\s*(\d+)", text, re.IGNORECASE)
+    nominee_age_match = search_field("nominee_age", r"Nominee\s*Age\s*(\d+)", text, re.IGNORECASE)
     if nominee_age_match:
         template["nominee_age"] = nominee_age_match.group(1).strip()
     
     # Extract Nominee Relationship
-    nominee_rel_match = re.search(r"Nominee\s*Relationship\s*([A-Za-z\s]+?)(?:\s*Appointee|\s*$)", text, re.IGNORECASE)
+    nominee_rel_match = search_field("nominee_relationship", r"Nominee\s*Relationship\s*([A-Za-z\s]+?)(?:\s*Appointee|\s*$)", text, re.IGNORECASE)
     if nominee_rel_match:
         template["nominee_relationship"] = nominee_rel_match.group(1).strip()
     
     # Extract Intermediary Name
-    intermediary_name_match = re.search(r"Intermediary\s*Name\s*:\s*([A-Za-z\s&]+)", text, re.IGNORECASE)
+    intermediary_name_match = search_field("intermediary_name", r"Intermediary\s*Name\s*:\s*([A-Za-z\s&]+)", text, re.IGNORECASE)
     if intermediary_name_match:
         template["intermediary_name"] = intermediary_name_match.group(1).strip()
     
     # SBI specific intermediary name pattern
     if not template["intermediary_name"]:
-        sbi_intermediary_match = re.search(r"Intermediary\s*Name[^:]*:\s*([A-Za-z\s&]+)", text, re.IGNORECASE)
+        sbi_intermediary_match = search_field("intermediary_name", r"Intermediary\s*Name[^:]*:\s*([A-Za-z\s&]+)", text, re.IGNORECASE)
         if sbi_intermediary_match:
             template["intermediary_name"] = sbi_intermediary_match.group(1).strip()
     
     # Extract Intermediary Contact
-    intermediary_contact_match = re.search(r"Intermediary\s*Code[^:]*:\s*([0-9\s&+-]+)", text, re.IGNORECASE)
+    intermediary_contact_match = search_field("intermediary_contact", r"Intermediary\s*Code[^:]*:\s*([0-9\s&+-]+)", text, re.IGNORECASE)
     if intermediary_contact_match:
         template["intermediary_contact"] = intermediary_contact_match.group(1).strip()
     
     # SBI specific intermediary contact pattern
     if not template["intermediary_contact"]:
-        sbi_contact_match = re.search(r"Intermediary\s*Code\s*&\s*Contact\s*No[^:]*:\s*([0-9\s&+-]+)", text, re.IGNORECASE)
+        sbi_contact_match = search_field("intermediary_contact", r"Intermediary\s*Code\s*&\s*Contact\s*No[^:]*:\s*([0-9\s&+-]+)", text, re.IGNORECASE)
         if sbi_contact_match:
             template["intermediary_contact"] = sbi_contact_match.group(1).strip()
     
     # Extract Supply State Code
-    state_code_match = re.search(r"Supply\s*State\s*Code\s*:\s*(\d+)", text, re.IGNORECASE)
+    state_code_match = search_field("supply_state_code", r"Supply\s*State\s*Code\s*:\s*(\d+)", text, re.IGNORECASE)
     if state_code_match:
         template["supply_state_code"] = state_code_match.group(1).strip()
     
     # Extract Place of Supply
-    place_match = re.search(r"Place\s*of\s*Supply\s*:\s*([A-Z\s]+)", text, re.IGNORECASE)
+    place_match = search_field("place_of_supply", r"Place\s*of\s*Supply\s*:\s*([A-Z\s]+)", text, re.IGNORECASE)
     if place_match:
         template["place_of_supply"] = place_match.group(1).strip()
     
     # Extract Phone
-    phone_match = re.search(r"Phone[^:]*:\s*(\d+)", text, re.IGNORECASE)
+    phone_match = search_field("phone", r"Phone[^:]*:\s*(\d+)", text, re.IGNORECASE)
     if phone_match:
         template["phone"] = phone_match.group(1).strip()
     
     # Extract Mobile
-    mobile_match = re.search(r"Mobile[^:]*:\s*(\d+)", text, re.IGNORECASE)
+    mobile_match = search_field("mobile", r"Mobile[^:]*:\s*(\d+)", text, re.IGNORECASE)
     if mobile_match:
         template["mobile"] = mobile_match.group(1).strip()
     
     # SBI specific contact pattern
     if not template["mobile"]:
-        sbi_contact_match = re.search(r"Contact\s*No[^:]*:\s*(\d{10})", text, re.IGNORECASE)
+        sbi_contact_match = search_field("mobile", r"Contact\s*No[^:]*:\s*(\d{10})", text, re.IGNORECASE)
         if sbi_contact_match:
             template["mobile"] = sbi_contact_match.group(1).strip()
     
     # Extract Email
-    email_match = re.search(r"Email[^:]*:\s*([A-Za-z0-9@.]+)", text, re.IGNORECASE)
+    email_match = search_field("email", r"Email[^:]*:\s*([A-Za-z0-9@.]+)", text, re.IGNORECASE)
     if email_match:
         template["email"] = email_match.group(1).strip()
     
     # SBI specific email pattern
     if not template["email"]:
-        sbi_email_match = re.search(r"Email\s*Id[^:]*:\s*([A-Za-z0-9@.]+)", text, re.IGNORECASE)
+        sbi_email_match = search_field("email", r"Email\s*Id[^:]*:\s*([A-Za-z0-9@.]+)", text, re.IGNORECASE)
         if sbi_email_match:
             template["email"] = sbi_email_match.group(1).strip()
     
     # Extract GSTIN
-    gstin_match = re.search(r"GSTIN[^:]*:\s*([A-Z0-9]+)", text, re.IGNORECASE)
+    gstin_match = search_field("gstin", r"GSTIN[^:]*:\s*([A-Z0-9]+)", text, re.IGNORECASE)
     if gstin_match:
         template["gstin"] = gstin_match.group(1).strip()
 
     return template
 
 
-def extract_kotak_insurance(text):
+# Kotak scanner - a label-to-field dispatch table.
+# Every alternative is keyed by the literal label its match has to start with (its anchor).
+# The document's label index gives the anchor occurrences in text order; each alternative is then only tried,
+# anchored, at those offsets. The first offset that matches is exactly what re.search would
+# have returned, so results are unchanged - and the pass stops once every field is decided.
+ScanRule = namedtuple('ScanRule', ['anchor', 'regex', 'group', 'value', 'postprocess'])
+
+# Non-ASCII characters that re.IGNORECASE treats as equal to an ASCII letter but str.lower() does not
+ANCHOR_FOLD_TABLE = str.maketrans({
+    **{letter: letter.lower() for letter in string.ascii_uppercase},
+    '\u0130': 'i', '\u0131': 'i', '\u017f': 's', '\u212a': 'k',
+})
+
+
+def scan_rule(anchor, pattern, group=1, value=None, postprocess=()):
+    """
+    Describe one alternative of a scanned field.
+    group is the capturing group to take (0 = whole match); value replaces the match with a constant.
+    """
+    if not anchor.isascii():
+        raise ValueError(f"Scan anchors must be ASCII: {anchor!r}")
+    return ScanRule(anchor.lower(), re.compile(pattern, re.IGNORECASE), group, value, tuple(postprocess))
+
+
+def anchor_trie_pattern(anchors):
+    """
+    Build an alternation factored by common prefixes - sre only has to test one branch per character
+    """
+    trie = {}
+    for anchor in anchors:
+        node = trie
+        for char in anchor:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # Greedy optional part, so the longest anchor at an offset is the one reported
+            pattern = '(?:' + pattern + ')?'
+        return pattern
+
+    return build(trie)
+
+
+def build_scan_table(fields):
+    """
+    Precompute everything the scanner needs for a field table, once at import time
+    """
+    anchors = {rule.anchor for _, rules in fields for rule in rules}
+    rules_by_anchor = {}
+    fields_by_regex = {}
+    for name, rules in fields:
+        for rule in rules:
+            if rule not in rules_by_anchor.setdefault(rule.anchor, []):
+                rules_by_anchor[rule.anchor].append(rule)
+            fields_by_regex.setdefault(rule.regex, []).append(name)
+
+    return {
+        'fields': fields,
+        'rules': dict(fields),
+        'anchors': sorted(anchors),
+        'rules_by_anchor': rules_by_anchor,
+        'fields_by_regex': fields_by_regex,
+    }
+
+
+def fold_for_anchors(text):
+    """
+    Lower-case the text for the anchor index without moving any offsets
+    """
+    folded = text.lower()
+    if len(folded) != len(text) or '\u0131' in folded or '\u017f' in folded:
+        folded = text.translate(ANCHOR_FOLD_TABLE)
+    return folded
+
+
+def rule_value(rule, match):
+    if rule.value is not None:
+        return rule.value
+    extracted_value = (match.group(rule.group) or "").strip()
+    for step in rule.postprocess:
+        extracted_value = step(extracted_value)
+    return extracted_value
+
+
+def resolve_field(rules, matches, finished):
+    """
+    Value of a field and the offset it came from - the first alternative with a non-empty value wins.
+    Returns None while an earlier alternative could still match further on in the text.
+    """
+    for rule in rules:
+        match = matches.get(rule.regex)
+        if match is None:
+            if not finished:
+                return None
+            continue
+        extracted_value = rule_value(rule, match)
+        if extracted_value:
+            return extracted_value, match.start() if rule.value is not None else match.start(rule.group)
+    return "", None
+
+
+def scan_fields(text, table, offsets=None):
+    """
+    Fill a template from a scan table in a single pass over the anchor occurrences
+    offsets, if given, receives the character offset of every filled field
+    """
+    rules = table['rules']
+    profile = active_profile()
+    window = app.config['FIELD_WINDOW_CHARS']
+    matches = {}
+    undecided = {name for name, field_rules in table['fields'] if field_rules}
+    timed_out = set()
+
+    with regex_budget() as budget:
+        for offset, anchor in budget.anchor_hits(text, table['anchors']):
+            if budget.exhausted():
+                # Out of time: whatever is still undecided could have matched further on
+                timed_out = set(undecided)
+                for name, _ in table['fields']:
+                    if name in timed_out:
+                        budget.mark_timed_out(name)
+                break
+            for rule in table['rules_by_anchor'][anchor]:
+                if rule.regex in matches:
+                    continue
+                if profile is None:
+                    match = rule.regex.match(text, offset, offset + window)
+                else:
+                    match = profile.timed('/'.join(table['fields_by_regex'][rule.regex]), 'rule', rule.regex.pattern,
+                                          rule.regex.match, text, offset, offset + window)
+                if not match:
+                    continue
+                matches[rule.regex] = match
+                for name in table['fields_by_regex'][rule.regex]:
+                    if name in undecided and resolve_field(rules[name], matches, False) is not None:
+                        undecided.discard(name)
+            if not undecided:
+                break
+
+    template = {}
+    for name, field_rules in table['fields']:
+        if name in timed_out:
+            template[name] = ""
+            continue
+        template[name], offset = resolve_field(field_rules, matches, True)
+        if offsets is not None and template[name]:
+            offsets[name] = offset
+    return template
+
+
+def newline_to_space(value):
+    return value.replace('\n', ' ')
+
+
+KOTAK_FIELDS = (
+    # Policy Information
+    ("policy_number", (
+        scan_rule("Policy", r"Policy\s*/\s*Certificate\s*No\.?\s*:?\s*(\d+)"),
+    )),
+    ("policy_holder_name", (
+        scan_rule("Name", r"Name\s*:\s*Mr\.\s*([A-Za-z\s.]+?)(?:\s*Address|\s*$)"),
+        scan_rule("Mr.", r"Mr\.\s*([A-Za-z\s.]+?)(?:\s*JAMNA|\s*Address|\s*$)"),
+    )),
+    ("policy_issuing_office", (
+        scan_rule("Policy", r"Policy\s*Issuing\s*Office\s*:\s*([A-Za-z0-9\s,.-]+?)(?:\s*Period|\s*$)"),
+    )),
+    ("policy_start_date", (
+        scan_rule("Period", r"Period\s*of\s*Insurance\s*:\s*From:\s*(\d{2}/\d{2}/\d{4})\s*00:00\s*to:\s*(\d{2}/\d{2}/\d{4})Midnight", group=1),
+    )),
+    ("policy_end_date", (
+        scan_rule("Period", r"Period\s*of\s*Insurance\s*:\s*From:\s*(\d{2}/\d{2}/\d{4})\s*00:00\s*to:\s*(\d{2}/\d{2}/\d{4})Midnight", group=2),
+    )),
+    ("policy_issued_date", (
+        scan_rule("Policy", r"Policy\s*issued\s*on\s*:\s*(\d{2}/\d{2}/\d{4})"),
+    )),
+    ("cover_note_number", (
+        scan_rule("Cover", r"Cover\s*Note\s*No\s*:\s*([A-Za-z0-9]+)"),
+    )),
+    ("hypothecated_to", (
+        scan_rule("Hypothecated", r"Hypothecated\s*to\s*:\s*([A-Za-z0-9\s]+?)(?:\s*Mobile|\s*$)"),
+    )),
+
+    # Insured Details
+    ("insured_address", (
+        scan_rule("Address", r"Address\s*:\s*([A-Z0-9\s,.-]+?)(?:\s*District|\s*Place|\s*$)"),
+        scan_rule("JAMNA", r"JAMNA\s*NAGAR\s*Mumbai\s*-\s*\d+", group=0),
+    )),
+    ("place_of_supply", (
+        scan_rule("Place", r"Place\s*of\s*Supply\s*:\s*([A-Z\s]+?)(?:\s*From|\s*$)"),
+    )),
+    ("supply_state_code", (
+        scan_rule("Supply", r"Supply\s*State\s*Code\s*:\s*(\d+)"),
+    )),
+    ("phone", (
+        scan_rule("Phone", r"Phone\s*:\s*(\d{10,})"),
+    )),
+    ("mobile", (
+        scan_rule("Mobile", r"Mobile\s*:\s*(\d{10,})"),
+        scan_rule("95XXXXXX98", r"95XXXXXX98", group=0),
+    )),
+    ("email", (
+        scan_rule("Email", r"Email\s*:\s*([A-Za-z0-9@.]+)"),
+        scan_rule("KXXXXXXXXXXXXS@GMAIL.COM", r"KXXXXXXXXXXXXS@GMAIL\.COM", group=0),
+    )),
+    ("gstin", ()),
+
+    # Vehicle Information
+    ("vehicle_registration_number", (
+        scan_rule("Registration", r"Registration\s*no\.\s*:\s*([A-Z0-9\s-]+)"),
+        scan_rule("RJ", r"RJ\s*\d{2}\s*[A-Z]{2}\s*\d{4}", group=0),
+    )),
+    ("vehicle_type", (
+        scan_rule("Type", r"Type\s*of\s*Vehicle\s*:\s*([A-Za-z\s]+?)(?:\s*Code|\s*$)"),
+    )),
+    ("make", (
+        scan_rule("Make", r"Make\s*:\s*([A-Za-z\s]+)"),
+        scan_rule("BAJAJ", r"BAJAJ", group=0),
+    )),
+    ("model", (
+        scan_rule("Model", r"Model\s*:\s*([A-Za-z\s]+)"),
+        scan_rule("DISCOVER", r"DISCOVER", group=0),
+    )),
+    ("variant", (
+        scan_rule("Variant", r"Variant\s*:\s*([A-Za-z0-9\s]+)"),
+        scan_rule("125", r"125\s*DRUM", group=0),
+    )),
+    ("cubic_capacity", (
+        scan_rule("CC", r"CC\s*:\s*(\d+)"),
+        scan_rule("125", r"125", group=0),
+    )),
+    ("manufacturing_year", (
+        scan_rule("Manufacturing", r"Manufacturing\s*Year\s*:\s*(\d{4})"),
+        scan_rule("2020", r"2020", group=0),
+    )),
+    ("rto_location", (
+        scan_rule("RTO", r"RTO\s*Location\s*:\s*([A-Za-z\s]+)"),
+        scan_rule("JAIPUR", r"JAIPUR", group=0),
+    )),
+    ("engine_number", (
+        scan_rule("Engine", r"Engine\s*Number\s*:\s*([A-Z0-9]+)"),
+        scan_rule("845698587474", r"845698587474", group=0),
+    )),
+    ("chassis_number", (
+        scan_rule("Chassis", r"Chassis\s*No\.\s*:\s*([A-Z0-9]+)"),
+        scan_rule("7854857854", r"7854857854", group=0),
+    )),
+    ("seating_capacity", (
+        scan_rule("Seating", r"Seating\s*Capacity\s*:\s*(\d+)"),
+        scan_rule("2", r"2", group=0),
+    )),
+    ("seating_capacity_sidecar", (
+        scan_rule("Seating", r"Seating\s*Capacity\s*of\s*side\s*car\s*\(if\s*any\)\s*:\s*([A-Za-z0-9\s]+)"),
+    )),
+
+    # IDV (Insured Declared Value) Details
+    ("idv_vehicle", (
+        scan_rule("IDV", r"IDV\s*of\s*the\s*Vehicle\s*\(in\s*₹\)\s*:\s*([0-9,]+)"),
+        scan_rule("24,391", r"24,391", group=0),
+    )),
+    ("idv_sidecar", (
+        scan_rule("IDV", r"IDV\s*of\s*Side\s*Car\s*\(in\s*₹\)\s*:\s*([0-9,]+)"),
+    )),
+    ("additional_accessories", (
+        scan_rule("Additional", r"Additional\s*Accessories\s*\(in\s*₹\)\s*:\s*([0-9,]+)"),
+    )),
+    ("non_electrical_accessories", (
+        scan_rule("Non-Electrical", r"Non-Electrical\s*Accessories\s*fitted\s*to\s*the\s*Vehicle\s*\(in\s*₹\)\s*:\s*([0-9,]+)"),
+    )),
+    ("electrical_electronic_accessories", (
+        scan_rule("Electrical", r"Electrical\s*&\s*Electronic\s*Accessories\s*fitted\s*to\s*the\s*Vehicle\s*\(in\s*₹\)\s*:\s*([0-9,]+)"),
+    )),
+    ("cng_lpg_kit", (
+        scan_rule("CNG", r"CNG\s*/\s*LPG\s*Kit\s*\(in\s*₹\)\s*:\s*([0-9,]+)"),
+    )),
+    ("total_vehicle_value", (
+        scan_rule("Total", r"Total\s*Value\s*of\s*the\s*Vehicle\s*\(in\s*₹\)\s*:\s*([0-9,]+)"),
+    )),
+
+    # Premium Computation - Own Damage
+    ("basic_own_damage", (
+        scan_rule("Basic", r"Basic\s*Own\s*Damage\s*:\s*([0-9,.]+)"),
+        scan_rule("600.26", r"600\.26", group=0),
+    )),
+    ("no_claim_bonus_percent", (
+        scan_rule("Less:", r"Less:\s*No\s*Claim\s*Bonus\s*Percent\s*(\d+)%"),
+        scan_rule("25%", r"25%", value="25"),
+    )),
+    ("no_claim_bonus_amount", (
+        scan_rule("Less:", r"Less:\s*No\s*Claim\s*Bonus\s*Percent\s*\d+%\s*:\s*([0-9,.]+)"),
+        scan_rule("150.07", r"150\.07", group=0),
+    )),
+    ("total_own_damage_premium", (
+        scan_rule("Total", r"Total\s*Own\s*Damage\s*Premium\s*\(A\)\s*:\s*([0-9,.]+)"),
+        scan_rule("450.19", r"450\.19", group=0),
+    )),
+
+    # Premium Computation - Liability
+    ("basic_tp_premium", (
+        scan_rule("Basic", r"Basic\s*TP\s*Including\s*TPPD\s*Premium\s*:\s*([0-9,.]+)"),
+        scan_rule("714.00", r"714\.00", group=0),
+    )),
+    ("pa_cover_amount", (
+        scan_rule("PA", r"PA\s*Cover\s*for\s*Owner\s*Driver\s*of\s*₹\s*([0-9,]+)"),
+    )),
+    ("pa_cover_premium", (
+        scan_rule("PA", r"PA\s*Cover\s*for\s*Owner\s*Driver\s*of\s*₹\s*[0-9,]+\s*:\s*([0-9,.]+)"),
+        scan_rule("330.00", r"330\.00", group=0),
+    )),
+    ("total_liability_premium", (
+        scan_rule("Total", r"Total\s*Liability\s*Premium\s*\(B\)\s*:\s*([0-9,.]+)"),
+        scan_rule("1,044.00", r"1,044\.00", group=0),
+    )),
+
+    # Tax and Total Premium
+    ("taxable_value_services", (
+        scan_rule("Taxable", r"Taxable\s*value\s*of\s*Services\s*\(A\+B\)\s*:\s*([0-9,.]+)"),
+        scan_rule("1,494.19", r"1,494\.19", group=0),
+    )),
+    ("cgst_percent", (
+        scan_rule("CGST", r"CGST\s*@\s*(\d+)%"),
+    )),
+    ("cgst_amount", (
+        scan_rule("CGST", r"CGST\s*@\s*\d+%\s*:\s*([0-9,.]+)"),
+        scan_rule("134.48", r"134\.48", group=0),
+    )),
+    ("sgst_percent", (
+        scan_rule("SGST", r"SGST\s*@\s*(\d+)%"),
+    )),
+    ("sgst_amount", (
+        scan_rule("SGST", r"SGST\s*@\s*\d+%\s*:\s*([0-9,.]+)"),
+        scan_rule("134.48", r"134\.48", group=0),
+    )),
+    ("total_premium", (
+        scan_rule("Total", r"Total\s*Premium\s*\(in\s*₹\)\s*:\s*([0-9,.]+)"),
+        scan_rule("1,763.00", r"1,763\.00", group=0),
+    )),
+
+    # Additional Details
+    ("geographical_area", (
+        scan_rule("Geographical", r"Geographical\s*Area\s*:\s*([A-Z\s]+)"),
+        scan_rule("INDIA", r"INDIA", group=0),
+    )),
+    ("compulsory_deductible", (
+        scan_rule("Compulsory", r"Compulsory\s*Deductibles\s*₹\s*:\s*([0-9,]+)"),
+        scan_rule("100", r"100", group=0),
+    )),
+    ("additional_excess", (
+        scan_rule("Additional", r"Additional\s*Excess\s*₹\s*:\s*([0-9,]+)"),
+        scan_rule("0", r"0", group=0),
+    )),
+    ("voluntary_deductible", (
+        scan_rule("Voluntary", r"Voluntary\s*Deductible\s*₹\s*:\s*([0-9,]+)"),
+        scan_rule("0", r"0", group=0),
+    )),
+    ("total_deductible", (
+        scan_rule("Total", r"Total\s*Deductible\s*₹\s*:\s*([0-9,]+)"),
+        scan_rule("100", r"100", group=0),
+    )),
+    ("depreciation_cover_claims", ()),
+    ("voluntary_deductible_depreciation", ()),
+
+    # Intermediary Information
+    ("intermediary_code", (
+        scan_rule("Intermediary", r"Intermediary\s*Code\s*:\s*([0-9]+)"),
+    )),
+    ("intermediary_name", (
+        scan_rule("Intermediary", r"Intermediary\s*Name\s*:\s*([A-Za-z0-9\s/\-]+)"),
+        scan_rule("DUMMY", r"DUMMY\s*FOR\s*TESTING\s*/\s*ATISH\s*SONAWANE", group=0),
+    )),
+    ("intermediary_mobile", (
+        scan_rule("Intermediary's", r"Intermediary's\s*Mobile\s*No\.\s*:\s*([0-9]+)"),
+    )),
+    ("intermediary_landline", (
+        scan_rule("Intermediary's", r"Intermediary's\s*Landline\s*No\.\s*:\s*([0-9]+)"),
+    )),
+
+    # Nominee Information
+    ("nominee_name", (
+        scan_rule("*Nominee", r"\*Nominee\s*Name\s*:\s*([A-Za-z\s]+)"),
+        scan_rule("KRISHNA", r"KRISHNA\s*DWIVEDI", group=0),
+    )),
+    ("nominee_age", (
+        scan_rule("*Nominee", r"\*Nominee\s*Age\s*:\s*(\d+)"),
+        scan_rule("26", r"26\s*Brother", value="26"),
+    )),
+    ("nominee_relationship", (
+        scan_rule("*Relationship", r"\*Relationship\s*:\s*([A-Za-z\s]+)"),
+        scan_rule("26", r"26\s*(Brother)"),
+    )),
+    ("nominee_appointee_name", (
+        scan_rule("*Name", r"\*Name\s*of\s*Appointee\s*\(if\s*nominee\s*is\s*a\s*minor\)\s*:\s*([A-Za-z\s]+)"),
+    )),
+    ("nominee_appointee_relationship", (
+        scan_rule("Relationship", r"Relationship\s*to\s*the\s*:\s*([A-Za-z\s]+)"),
+    )),
+
+    # Company Information
+    ("insurance_company", (
+        scan_rule("Zurich", r"(Zurich\s*Kotak\s*General\s*Insurance\s*Company)"),
+        scan_rule("KOTAK", r"(KOTAK\s*GENERAL\s*INSURANCE)"),
+    )),
+    ("company_registration", (
+        scan_rule("CIN:", r"CIN:\s*([A-Z0-9]+)"),
+    )),
+    ("irdai_registration", (
+        scan_rule("IRDAI", r"IRDAI\s*Reg\.\s*No\.\s*(\d+)"),
+    )),
+    ("company_address", (
+        scan_rule("Registered", r"Registered\s*&\s*Corporate\s*Office:\s*([A-Za-z0-9\s,.-]+?)(?:\s*Toll|\s*$)"),
+    )),
+    ("toll_free", (
+        scan_rule("Toll", r"Toll\s*Free:\s*([0-9\s]+)"),
+    )),
+    ("company_email", (
+        scan_rule("Email:", r"Email:\s*([A-Za-z0-9@.]+)"),
+    )),
+    ("company_website", (
+        scan_rule("Website:", r"Website:\s*([A-Za-z0-9.]+)"),
+    )),
+
+    # Document Information
+    ("document_type", (
+        scan_rule("Long", r"(Long\s*Term\s*Two\s*Wheeler\s*Secure\s*Comprehensive\s*Policy)", postprocess=(newline_to_space,)),
+        scan_rule("Certificate", r"(Certificate\s*cum\s*Policy\s*Schedule)"),
+    )),
+    ("uin_number", (
+        scan_rule("UIN:", r"UIN:\s*([A-Z0-9]+)"),
+        scan_rule("IRDAN152RP0008V04201617", r"IRDAN152RP0008V04201617", group=0),
+    )),
+    ("contact_assistance", (
+        scan_rule("For", r"For\s*any\s*assistance\s*please\s*call\s*([0-9\s]+)"),
+        scan_rule("1800", r"1800\s*266\s*4545", group=0),
+    )),
+)
+
+KOTAK_SCAN_TABLE = build_scan_table(KOTAK_FIELDS)
+
+
+@with_regex_budget
+def extract_kotak_insurance(text, offsets=None):
     """
     Extract Kotak Insurance PDF data using regex patterns
     Dynamic extraction without default values - only extracts what's actually in the PDF
+    offsets, if given, receives the character offset of every filled field
     """
-    template = {
-        # Policy Information
-        "policy_number": "",
-        "policy_holder_name": "",
-        "policy_issuing_office": "",
-        "policy_start_date": "",
-        "policy_end_date": "",
-        "policy_issued_date": "",
-        "cover_note_number": "",
-        "hypothecated_to": "",
-        
-        # Insured Details
-        "insured_address": "",
-        "place_of_supply": "",
-        "supply_state_code": "",
-        "phone": "",
-        "mobile": "",
-        "email": "",
-        "gstin": "",
-        
-        # Vehicle Information
-        "vehicle_registration_number": "",
-        "vehicle_type": "",
-        "make": "",
-        "model": "",
-        "variant": "",
-        "cubic_capacity": "",
-        "manufacturing_year": "",
-        "rto_location": "",
-        "engine_number": "",
-        "chassis_number": "",
-        "seating_capacity": "",
-        "seating_capacity_sidecar": "",
-        
-        # IDV (Insured Declared Value) Details
-        "idv_vehicle": "",
-        "idv_sidecar": "",
-        "additional_accessories": "",
-        "non_electrical_accessories": "",
-        "electrical_electronic_accessories": "",
-        "cng_lpg_kit": "",
-        "total_vehicle_value": "",
-        
-        # Premium Computation - Own Damage
-        "basic_own_damage": "",
-        "no_claim_bonus_percent": "",
-        "no_claim_bonus_amount": "",
-        "total_own_damage_premium": "",
-        
-        # Premium Computation - Liability
-        "basic_tp_premium": "",
-        "pa_cover_amount": "",
-        "pa_cover_premium": "",
-        "total_liability_premium": "",
-        
-        # Tax and Total Premium
-        "taxable_value_services": "",
-        "cgst_percent": "",
-        "cgst_amount": "",
-        "sgst_percent": "",
-        "sgst_amount": "",
-        "total_premium": "",
-        
-        # Additional Details
-        "geographical_area": "",
-        "compulsory_deductible": "",
-        "additional_excess": "",
-        "voluntary_deductible": "",
-        "total_deductible": "",
-        "depreciation_cover_claims": "",
-        "voluntary_deductible_depreciation": "",
-        
-        # Intermediary Information
-        "intermediary_code": "",
-        "intermediary_name": "",
-        "intermediary_mobile": "",
-        "intermediary_landline": "",
-        
-        # Nominee Information
-        "nominee_name": "",
-        "nominee_age": "",
-        "nominee_relationship": "",
-        "nominee_appointee_name": "",
-        "nominee_appointee_relationship": "",
-        
-        # Company Information
-        "insurance_company": "",
-        "company_registration": "",
-        "irdai_registration": "",
-        "company_address": "",
-        "toll_free": "",
-        "company_email": "",
-        "company_website": "",
-        
-        # Document Information
-        "document_type": "",
-        "uin_number": "",
-        "contact_assistance": ""
+    return scan_fields(text, KOTAK_SCAN_TABLE, offsets)
+
+
+# Policy extractors by name - the statement extractor returns transactions instead of fields
+POLICY_EXTRACTORS = {
+    'universal': extract_values_from_text_universal,
+    'kotak': extract_kotak_insurance,
+}
+
+# Fields a policy schedule is not complete without - lazy extraction stops reading pages once all are filled
+REQUIRED_POLICY_FIELDS = {
+    'universal': (
+        'policy_number', 'policy_holder_name', 'vehicle_registration_number', 'engine_number',
+        'chassis_number', 'policy_start_date', 'policy_end_date', 'premium_amount',
+    ),
+    'kotak': (
+        'policy_number', 'policy_holder_name', 'policy_start_date', 'policy_end_date',
+        'vehicle_registration_number', 'engine_number', 'chassis_number', 'total_premium',
+    ),
+}
+
+def extract_sbi_bank_statement(text, offsets=None):
+    """
+    Extract SBI Bank Statement transactions using regex patterns
+    offsets, if given, receives the character offset of every transaction's line
+    """
+    transactions = []
+    for offset, fields in iter_sbi_transaction_fields(text):
+        transactions.append(dict(zip(SBI_TRANSACTION_FIELDS, fields)))
+        if offsets is not None:
+            offsets.append(offset)
+    return transactions
+
+
+def iter_sbi_transactions(text):
+    """
+    Yield SBI Bank Statement transactions one at a time, in the order they appear in the text
+    """
+    for _, transaction in iter_sbi_transaction_lines(text):
+        yield transaction
+
+
+# SBI statement line engine.
+# Each line is tokenized once, left to right, by one precompiled pattern: dates, labelled references, labelled
+# balances and numbers, each with its position. Amounts therefore keep their column order - a statement row reads
+# ... Debit Credit Balance, with empty columns simply missing - instead of being guessed from an unordered set.
+SBI_DATE_PATTERN = (r'\d{2}[/-]\d{2}[/-]\d{4}|\d{2}[/-][A-Za-z]{3}[/-]\d{4}|\d{2}\.\d{2}\.\d{4}'
+                    r'|\d{1,2}[/-]\d{1,2}[/-]\d{2,4}')
+# 1,000.00 / 1,00,000.00 / 1000.00 / 1000, optionally after a rupee sign - never part of a longer number or word.
+# Money (grouped or with paise) may be negative, an overdrawn balance.
+SBI_NUMBER_PATTERN = (r'(?<![\w.,])(?:₹\s*)?(?:-(?=\d[\d,]*\.\d{2}|\d{1,3},\d))?'
+                      r'(?:\d{1,3}(?:,\d{2,3})+|\d+)(?:\.\d{2})?(?!\d|,\d|\.\d)')
+SBI_LABELLED_REF_PATTERN = r'(?i:CHQ\s*NO|REF|UTR|NEFT|RTGS)[:\s]*(?P<labelled_ref>\d+)(?!\d|,\d|\.\d)'
+SBI_LINE_TOKEN = re.compile(
+    r'(?P<date>' + SBI_DATE_PATTERN + r')'
+    r'|' + SBI_LABELLED_REF_PATTERN +
+    r'|(?i:\bBAL)[:\s]*(?P<balance>' + SBI_NUMBER_PATTERN + r')'
+    r'|(?P<number>' + SBI_NUMBER_PATTERN + r')'
+)
+# The usual row - date, value date, narration, then one to three amounts - is read by one match of SBI_ROW.
+# Its narration may not hold anything that could be an amount (no comma, point or rupee sign), so the row's tokens
+# are known from the match alone: digits inside a word (P2A) are no token, and a lone run of six or more digits is
+# the reference. Only a narration with other digits is scanned again, for references. Every other line, and every
+# row with a balance label, goes through the general tokenizer. Both give the same tokens.
+SBI_MONEY_PATTERN = r'-?(?:\d{1,3}(?:,\d{2,3})+(?:\.\d{2})?|\d+\.\d{2})'
+# A digit after a letter, followed by neither a digit nor a date separator, can start no token - unless the letters
+# end a reference label (REF5)
+SBI_WORD_DIGITS_PATTERN = (r'(?:(?<=[A-Za-z_])(?<!(?i:NO))(?<!(?i:REF))(?<!(?i:UTR))(?<!(?i:NEFT))(?<!(?i:RTGS))'
+                           r'\d(?![\d/-])[^,.₹\d]*)*')
+SBI_ROW = re.compile(
+    # The lookaheads make the dates atomic - the row never settles for a shorter date than the tokenizer finds
+    r'(?=(?P<date>' + SBI_DATE_PATTERN + r'))(?P=date)'
+    r'(?:\s+(?=(?P<value_date>' + SBI_DATE_PATTERN + r'))(?P=value_date))?'
+    r'(?P<narration>[^,.₹\d]*)(?P<word_digits>' + SBI_WORD_DIGITS_PATTERN + r')'
+    r'(?:(?<![\w.,])(?P<ref>\d{6,})(?P<tail>[^,.₹\d]*' + SBI_WORD_DIGITS_PATTERN + r')'
+    r'|(?P<narration_digits>[^,.₹]*?))'
+    r'(?<=\s)(?P<amount1>' + SBI_MONEY_PATTERN + r')'
+    r'(?:\s+(?P<amount2>' + SBI_MONEY_PATTERN + r'))?'
+    r'(?:\s+(?P<amount3>' + SBI_MONEY_PATTERN + r'))?'
+)
+# Dates and bare numbers, as SBI_LINE_TOKEN finds them in text without amounts - every token starts with a digit,
+# which lets the regex engine skip straight from digit to digit
+SBI_NARRATION_TOKEN = re.compile(
+    r'\d(?:(?P<date>\d[/-]\d{2}[/-]\d{4}|\d[/-][A-Za-z]{3}[/-]\d{4}|\d\.\d{2}\.\d{4}|\d?[/-]\d{1,2}[/-]\d{2,4})'
+    r'|(?<![\w.,]\d)\d*)'
+)
+SBI_LABELLED_REF = re.compile(SBI_LABELLED_REF_PATTERN)
+SBI_AMOUNT_JUNK = re.compile(r'[₹,\s]')
+SBI_DESCRIPTION_JUNK = re.compile(r'[^\w\s.,-]')
+SBI_DEBIT_MARKER_WORDS = ('DR', 'DEBIT', 'WITHDRAWAL', 'PAYMENT')
+SBI_CREDIT_MARKER_WORDS = ('CR', 'CREDIT', 'DEPOSIT', 'RECEIPT')
+SBI_DEBIT_MARKERS = re.compile(r'\b(?:' + '|'.join(SBI_DEBIT_MARKER_WORDS) + r')\b', re.IGNORECASE)
+SBI_CREDIT_MARKERS = re.compile(r'\b(?:' + '|'.join(SBI_CREDIT_MARKER_WORDS) + r')\b', re.IGNORECASE)
+SBI_DEBIT_WORDS = re.compile(r'\b(?:PAY|TRANSFER|WITHDRAW|DEBIT)', re.IGNORECASE)
+SBI_CREDIT_WORDS = re.compile(r'\b(?:RECEIVE|DEPOSIT|CREDIT|SALARY)', re.IGNORECASE)
+# Case-sensitive versions without word boundaries, for an upper-cased line - they can skip straight to the
+# first letters, so the slower patterns above only run on lines that hold one of their words
+SBI_REF_HINT = re.compile(r'CHQ|REF|UTR|NEFT|RTGS')
+SBI_DEBIT_HINT = re.compile(r'DR|DEBIT|PAY|TRANSFER|WITHDRAW')
+SBI_CREDIT_HINT = re.compile(r'CR|DEPOSIT|RECEIPT|RECEIVE|SALARY')
+
+
+def word_scan_pattern(words, whole_words=True):
+    """
+    Case-sensitive pattern for any of words starting at a word boundary (and ending at one, with whole_words).
+    It opens with a class of the words' first letters, which the regex engine scans for directly - a leading word
+    boundary would make it try every position of the text instead.
+    """
+    endings = {}
+    for word in words:
+        endings.setdefault(word[0], []).append(re.escape(word[1:]))
+    alternatives = '|'.join(f"(?<={re.escape(first)})(?:{'|'.join(rests)})" for first, rests in endings.items())
+    return re.compile(r'[' + ''.join(endings) + r'](?<!\w.)(?:' + alternatives + r')' + (r'\b' if whole_words else ''))
+
+
+# On an upper-cased ASCII line, these find exactly what the case-insensitive patterns above find in the line.
+# SBI_MARKERS_UPPER finds a marker of either side, so a line without markers costs one search.
+SBI_MARKERS_UPPER = word_scan_pattern(SBI_DEBIT_MARKER_WORDS + SBI_CREDIT_MARKER_WORDS)
+SBI_DEBIT_MARKERS_UPPER = word_scan_pattern(SBI_DEBIT_MARKER_WORDS)
+SBI_DEBIT_WORDS_UPPER = word_scan_pattern(('PAY', 'TRANSFER', 'WITHDRAW', 'DEBIT'), whole_words=False)
+SBI_CREDIT_WORDS_UPPER = word_scan_pattern(('RECEIVE', 'DEPOSIT', 'CREDIT', 'SALARY'), whole_words=False)
+# The ASCII characters SBI_DESCRIPTION_JUNK removes, for bytes.translate
+SBI_ASCII_JUNK = bytes(code for code in range(128) if SBI_DESCRIPTION_JUNK.match(chr(code)))
+
+
+def clean_amount(amount):
+    if '₹' in amount:
+        return SBI_AMOUNT_JUNK.sub('', amount)
+    return amount.replace(',', '')
+
+
+def cut_spans(line, spans, start, end):
+    """
+    line[start:end] without the given (sorted) spans
+    """
+    pieces = []
+    for span_start, span_end in spans:
+        if span_start >= start:
+            pieces.append(line[start:span_start])
+            start = span_end
+    pieces.append(line[start:end])
+    return ''.join(pieces)
+
+
+def tokenize_sbi_row(line):
+    """
+    (dates, ref, amounts, balance, rest) of a line shaped like a statement row, or None to tokenize it in full
+    """
+    row = SBI_ROW.fullmatch(line)
+    if row is None:
+        return None
+    date, value_date, narration, _, ref, _, _, amount1, amount2, amount3 = row.regs[1:]
+    start, end = narration[0], amount1[0]
+    upper = line[start:end].upper()
+    if 'BAL' in upper:
+        return None
+
+    dates = [date] if value_date[0] < 0 else [date, value_date]
+    amounts = [amount1] if amount2[0] < 0 else [amount1, amount2] if amount3[0] < 0 else [amount1, amount2, amount3]
+    if ref[0] >= 0:
+        return dates, ref, amounts, None, line[start:ref[0]] + line[ref[1]:end]
+    if narration[1] == end:
+        return dates, None, amounts, None, line[start:end]
+
+    # A labelled reference takes its digits, as it does in the general tokenizer, which goes on after the label
+    labelled = sbi_labelled_refs(line, start, end, upper)
+    narration_dates = []
+    ref = None
+    token = SBI_NARRATION_TOKEN.search(line, narration[1], end)
+    while token is not None:
+        token_start, token_end = token.span()
+        label = next((label for label in labelled if label.start() <= token_start < label.end()), None)
+        if label is not None:
+            token = SBI_NARRATION_TOKEN.search(line, label.end(), end)
+            continue
+        if token.group('date'):
+            narration_dates.append((token_start, token_end))
+        elif ref is None and token_end - token_start >= 6:
+            ref = (token_start, token_end)
+        token = SBI_NARRATION_TOKEN.search(line, token_end, end)
+    if ref is None and labelled:
+        ref = labelled[0].span('labelled_ref')
+    cut = sorted(narration_dates + [ref]) if ref else narration_dates
+    return dates + narration_dates, ref, amounts, None, cut_spans(line, cut, start, end)
+
+
+def sbi_row_fields(line):
+    """
+    parse_sbi_fields for an ASCII line shaped like a statement row, straight from the SBI_ROW match - False if it is
+    no transaction, None if it has to be tokenized
+    """
+    row = SBI_ROW.fullmatch(line)
+    if row is None or not line.isascii():
+        return None
+    date, _, narration, word_digits, ref, tail, narration_digits, amount1, amount2, amount3 = row.groups()
+    if ref is not None:
+        rest = narration + word_digits + tail
+    elif word_digits or narration_digits:
+        return None
+    else:
+        rest = narration
+    # Dates and amounts hold no letters, so the whole line has the narration's labels and markers
+    upper = line.upper()
+    if 'BAL' in upper:
+        return None
+
+    description = sbi_description(rest, True)
+    if len(description) <= 3:
+        return False
+    amount1 = amount1.replace(',', '')
+    if amount3 is not None:
+        return date, description, ref, amount1, amount2.replace(',', ''), amount3.replace(',', '')
+    balance = amount2.replace(',', '') if amount2 is not None else None
+    if sbi_upper_amount_is_credit(upper, description):
+        return date, description, ref, None, amount1, balance
+    return date, description, ref, amount1, None, balance
+
+
+def sbi_labelled_refs(line, start, end, upper):
+    """
+    SBI_LABELLED_REF matches in line[start:end], whose upper-cased text is upper
+    """
+    if len(upper) != end - start:
+        return list(SBI_LABELLED_REF.finditer(line, start, end))
+    # Case-insensitive patterns cannot skip ahead to their first letter - try the pattern only where a label is
+    labelled = []
+    hint = SBI_REF_HINT.search(upper)
+    while hint is not None:
+        label = SBI_LABELLED_REF.match(line, start + hint.start(), end)
+        if label is None:
+            hint = SBI_REF_HINT.search(upper, hint.start() + 1)
+        else:
+            labelled.append(label)
+            hint = SBI_REF_HINT.search(upper, label.end() - start)
+    return labelled
+
+
+def tokenize_sbi_line(line):
+    """
+    (dates, ref, amounts, balance, rest) of any statement line - rest is the line without those tokens
+    """
+    dates = []
+    refs = []            # bare numbers of 6+ digits - reference or cheque numbers
+    labelled_refs = []   # numbers after CHQ NO / REF / UTR / NEFT / RTGS
+    money = []           # numbers with decimals or digit grouping
+    plain = []           # other bare numbers - only taken as amounts when there is no money on the line
+    balance = None
+    for token in SBI_LINE_TOKEN.finditer(line):
+        kind = token.lastgroup
+        if kind == 'date':
+            dates.append(token.span())
+        elif kind == 'number':
+            value = token.group()
+            if ',' in value or '.' in value or '₹' in value:
+                money.append(token.span())
+            elif len(value) >= 6:
+                refs.append(token.span())
+            else:
+                plain.append(token.span())
+        elif kind == 'labelled_ref':
+            labelled_refs.append(token.span(kind))
+        elif balance is None:
+            balance = token.span(kind)
+    ref = (refs or labelled_refs or [None])[0]
+    amounts = money or plain
+    removed = sorted(dates + amounts + [span for span in (ref, balance) if span is not None])
+    return dates, ref, amounts, balance, cut_spans(line, removed, 0, len(line))
+
+
+# Fields of a transaction, in the order parse_sbi_fields returns them
+SBI_TRANSACTION_FIELDS = ('date', 'description', 'ref_no', 'debit', 'credit', 'balance')
+
+
+def parse_sbi_line(line):
+    """
+    Parse one stripped statement line into a transaction, or None if it is not one
+    """
+    fields = parse_sbi_fields(line)
+    return dict(zip(SBI_TRANSACTION_FIELDS, fields)) if fields is not None else None
+
+
+def parse_sbi_fields(line):
+    """
+    The (date, description, ref_no, debit, credit, balance) of one stripped statement line, or None
+    """
+    fields = sbi_row_fields(line)
+    if fields is not None:
+        return fields or None
+    dates, ref, amounts, balance, rest = tokenize_sbi_row(line) or tokenize_sbi_line(line)
+    if not dates:
+        return None
+
+    # Description: the line without its dates, reference and amounts
+    description = sbi_description(rest, line.isascii())
+
+    # Column order: the last amount is the running balance, the ones before it debit and credit
+    values = [line[start:end].replace(',', '') for start, end in amounts]
+    if '₹' in line:
+        values = [clean_amount(value) for value in values]
+    if balance is not None:
+        balance = clean_amount(line[balance[0]:balance[1]])
+    elif len(values) >= 2:
+        balance = values.pop()
+
+    debit = None
+    credit = None
+    if len(values) >= 2:
+        debit, credit = values[-2], values[-1]
+    elif values:
+        if sbi_amount_is_credit(line, description):
+            credit = values[0]
+        else:
+            debit = values[0]
+
+    # Only add if we have meaningful data
+    if not (debit or credit) or len(description) <= 3:
+        return None
+    return (line[dates[0][0]:dates[0][1]], description, line[ref[0]:ref[1]] if ref else None,
+            debit, credit, balance)
+
+
+def sbi_description(rest, ascii_only):
+    """
+    Description from what is left of a line: whitespace collapsed, then special characters removed
+    """
+    description = ' '.join(rest.split())
+    if ascii_only:
+        return description.encode().translate(None, SBI_ASCII_JUNK).decode().strip()
+    return SBI_DESCRIPTION_JUNK.sub('', description).strip()
+
+
+def sbi_amount_is_credit(line, description):
+    """
+    Side of a line's one transaction amount - from the markers on the line, then from the words of its description.
+    Defaults to debit if unclear.
+    """
+    if line.isascii():
+        # Upper-casing ASCII is exact, so the case-sensitive patterns give the case-insensitive answer
+        return sbi_upper_amount_is_credit(line.upper(), description)
+
+    upper = line.upper()
+    maybe_debit = SBI_DEBIT_HINT.search(upper) is not None
+    maybe_credit = SBI_CREDIT_HINT.search(upper) is not None
+    if maybe_debit and SBI_DEBIT_MARKERS.search(line):
+        return False
+    if maybe_credit and SBI_CREDIT_MARKERS.search(line):
+        return True
+    if maybe_debit and SBI_DEBIT_WORDS.search(description):
+        return False
+    return maybe_credit and SBI_CREDIT_WORDS.search(description) is not None
+
+
+def sbi_upper_amount_is_credit(upper, description):
+    """
+    sbi_amount_is_credit for an ASCII line, given upper-cased
+    """
+    marker = SBI_MARKERS_UPPER.search(upper)
+    if marker is not None:
+        # A debit marker anywhere on the line wins; none can come before the first marker
+        return (marker.group() in SBI_CREDIT_MARKER_WORDS
+                and SBI_DEBIT_MARKERS_UPPER.search(upper, marker.end()) is None)
+    upper_description = description.upper()
+    if SBI_DEBIT_WORDS_UPPER.search(upper_description):
+        return False
+    return SBI_CREDIT_WORDS_UPPER.search(upper_description) is not None
+
+
+def iter_sbi_transaction_lines(text):
+    """
+    Yield (offset, transaction) for every statement line that parses as a transaction
+    """
+    for offset, fields in iter_sbi_transaction_fields(text):
+        yield offset, dict(zip(SBI_TRANSACTION_FIELDS, fields))
+
+
+def iter_sbi_transaction_fields(text):
+    """
+    Yield (offset, fields) for every statement line that parses as a transaction - fields as parse_sbi_fields
+    """
+    line_offset = 0
+    for line in text.split('\n'):
+        offset = line_offset
+        line_offset += len(line) + 1
+        line = line.strip()
+        if len(line) < 10:  # Skip very short lines
+            continue
+        fields = parse_sbi_fields(line)
+        if fields is not None:
+            yield offset, fields
+
+
+# SBI statement table mode.
+# A statement printed as a table is read from the positions of its words instead of flattened text. The column
+# x-boundaries are found once per statement, on its header row, and reused to bucket the words of every later page,
+# so debit, credit and balance come from the column an amount is printed in rather than from DR/CR keywords.
+SBI_TABLE_HEADERS = {
+    'date': ('txn date', 'transaction date', 'tran date', 'post date', 'date'),
+    'value_date': ('value date',),
+    'description': ('description', 'narration', 'particulars', 'details'),
+    'ref_no': ('ref no./cheque no.', 'chq./ref.no.', 'ref no.', 'ref no', 'cheque no.', 'chq no.', 'reference'),
+    'debit': ('debit', 'withdrawal amt.', 'withdrawals', 'withdrawal'),
+    'credit': ('credit', 'deposit amt.', 'deposits', 'deposit'),
+    'balance': ('balance',),
+}
+# (header words, column), longest first so 'value date' is never read as a second 'date'
+SBI_TABLE_HEADER_WORDS = sorted(((tuple(header.split()), column)
+                                 for column, headers in SBI_TABLE_HEADERS.items() for header in headers),
+                                key=lambda entry: -len(entry[0]))
+SBI_AMOUNT_COLUMNS = ('debit', 'credit', 'balance')
+SBI_TABLE_DATE = re.compile(SBI_DATE_PATTERN)
+SBI_TABLE_AMOUNT = re.compile(SBI_NUMBER_PATTERN)
+SBI_ROW_TOLERANCE = 3      # points - words whose tops are closer than this are on the same row
+SBI_COLUMN_TOLERANCE = 2   # points - slack before a left-aligned column or after a right-aligned one
+# Column headers of a real table are further apart than this (in ems of the header text) - header words merely
+# separated by spaces are flowed text, whose word positions say nothing about columns
+SBI_MIN_COLUMN_GAP = 0.75
+
+TableColumn = namedtuple('TableColumn', ['name', 'x0', 'x1'])
+
+
+class StatementColumns:
+    """
+    Column geometry of a tabular statement, read once from its header row.
+    Words are bucketed by their horizontal centre. Text columns are left-aligned, so one starts a little before its
+    header; amount columns are right-aligned, so one ends a little after its header; between a text column and an
+    amount column the boundary is halfway across the gap between their headers.
+    """
+
+    def __init__(self, columns, header_text):
+        self.names = [column.name for column in columns]
+        self.bounds = []
+        for left, right in zip(columns, columns[1:]):
+            if right.name not in SBI_AMOUNT_COLUMNS:
+                self.bounds.append(right.x0 - SBI_COLUMN_TOLERANCE)
+            elif left.name in SBI_AMOUNT_COLUMNS:
+                self.bounds.append(left.x1 + SBI_COLUMN_TOLERANCE)
+            else:
+                self.bounds.append((left.x1 + right.x0) / 2)
+        self.header_text = header_text
+
+    @classmethod
+    def from_header(cls, row):
+        """
+        The geometry of a row of words if it is a statement header row, else None
+        """
+        texts = [word['text'].lower() for word in row]
+        columns = {}
+        i = 0
+        while i < len(texts):
+            for words, column in SBI_TABLE_HEADER_WORDS:
+                if column not in columns and tuple(texts[i:i + len(words)]) == words:
+                    columns[column] = TableColumn(column, row[i]['x0'], row[i + len(words) - 1]['x1'])
+                    i += len(words)
+                    break
+            else:
+                i += 1
+        if not {'date', 'debit', 'credit', 'balance'} <= columns.keys():
+            return None
+        columns = sorted(columns.values(), key=lambda column: column.x0)
+        min_gap = SBI_MIN_COLUMN_GAP * (row[0]['bottom'] - row[0]['top'])
+        if any(right.x0 - left.x1 < min_gap for left, right in zip(columns, columns[1:])):
+            return None
+        return cls(columns, ' '.join(texts))
+
+    def is_header(self, row):
+        """
+        Whether a row repeats the header row - many statements print it again on every page
+        """
+        return ' '.join(word['text'] for word in row).lower() == self.header_text
+
+    def cells(self, row):
+        """
+        column -> text of the words of a row that fall in it
+        """
+        cells = {}
+        for word in row:
+            name = self.names[bisect.bisect_right(self.bounds, (word['x0'] + word['x1']) / 2)]
+            cells[name] = cells[name] + ' ' + word['text'] if name in cells else word['text']
+        return cells
+
+
+def page_word_rows(page):
+    """
+    Words of a pdfplumber page grouped into rows, top to bottom, each row left to right
+    """
+    rows = []
+    row_top = None
+    for word in page.extract_words():
+        if row_top is None or abs(word['top'] - row_top) > SBI_ROW_TOLERANCE:
+            rows.append([])
+            row_top = word['top']
+        rows[-1].append(word)
+    for row in rows:
+        row.sort(key=lambda word: word['x0'])
+    return rows
+
+
+def table_amount(cell):
+    amount = SBI_TABLE_AMOUNT.search(cell) if cell else None
+    return clean_amount(amount.group()) if amount else None
+
+
+def sbi_table_transaction(cells):
+    """
+    Transaction from the cells of one table row, or None if the row has no date or no debit/credit amount
+    """
+    date = cells.get('date')
+    if not date or not SBI_TABLE_DATE.fullmatch(date):
+        return None
+    debit = table_amount(cells.get('debit'))
+    credit = table_amount(cells.get('credit'))
+    if not (debit or credit):
+        return None
+    return {
+        "date": date,
+        "description": SBI_DESCRIPTION_JUNK.sub('', cells.get('description', '')).strip(),
+        "ref_no": cells.get('ref_no'),
+        "debit": debit,
+        "credit": credit,
+        "balance": table_amount(cells.get('balance'))
     }
-    
-    # Extract Policy Information
-    policy_number_match = re.search(r"Policy\s*/\s*Certificate\s*No\.?\s*:?\s*(\d+)", text, re.IGNORECASE)
-    if policy_number_match:
-        template["policy_number"] = policy_number_match.group(1).strip()
-    
-    # Extract Policy Holder Name
-    name_match = re.search(r"Name\s*:\s*Mr\.\s*([A-Za-z\s.]+?)(?:\s*Address|\s*$)", text, re.IGNORECASE)
-    if name_match:
-        template["policy_holder_name"] = name_match.group(1).strip()
-    
-    # Alternative pattern for name extraction
-    if not template["policy_holder_name"]:
-        name_alt_match = re.search(r"Mr\.\s*([A-Za-z\s.]+?)(?:\s*JAMNA|\s*Address|\s*$)", text, re.IGNORECASE)
-        if name_alt_match:
-            template["policy_holder_name"] = name_alt_match.group(1).strip()
-    
-    # Extract Insured Address
-    address_match = re.search(r"Address\s*:\s*([A-Z0-9\s,.-]+?)(?:\s*District|\s*Place|\s*$)", text, re.IGNORECASE)
-    if address_match:
-        template["insured_address"] = address_match.group(1).strip()
-    
-    # Alternative address pattern
-    if not template["insured_address"]:
-        address_alt_match = re.search(r"JAMNA\s*NAGAR\s*Mumbai\s*-\s*\d+", text, re.IGNORECASE)
-        if address_alt_match:
-            template["insured_address"] = address_alt_match.group(0).strip()
-    
-    # Extract Place of Supply
-    place_match = re.search(r"Place\s*of\s*Supply\s*:\s*([A-Z\s]+?)(?:\s*From|\s*$)", text, re.IGNORECASE)
-    if place_match:
-        template["place_of_supply"] = place_match.group(1).strip()
-    
-    # Extract Supply State Code
-    state_code_match = re.search(r"Supply\s*State\s*Code\s*:\s*(\d+)", text, re.IGNORECASE)
-    if state_code_match:
-        template["supply_state_code"] = state_code_match.group(1).strip()
-    
-    # Extract Contact Information
-    phone_match = re.search(r"Phone\s*:\s*(\d{10,})", text, re.IGNORECASE)
-    if phone_match:
-        template["phone"] = phone_match.group(1).strip()
-    
-    mobile_match = re.search(r"Mobile\s*:\s*(\d{10,})", text, re.IGNORECASE)
-    if mobile_match:
-        template["mobile"] = mobile_match.group(1).strip()
-    
-    # Alternative mobile pattern
-    if not template["mobile"]:
-        mobile_alt_match = re.search(r"95XXXXXX98", text, re.IGNORECASE)
-        if mobile_alt_match:
-            template["mobile"] = mobile_alt_match.group(0).strip()
-    
-    email_match = re.search(r"Email\s*:\s*([A-Za-z0-9@.]+)", text, re.IGNORECASE)
-    if email_match:
-        template["email"] = email_match.group(1).strip()
-    
-    # Alternative email pattern
-    if not template["email"]:
-        email_alt_match = re.search(r"KXXXXXXXXXXXXS@GMAIL\.COM", text, re.IGNORECASE)
-        if email_alt_match:
-            template["email"] = email_alt_match.group(0).strip()
-    
-    # Extract Policy Issuing Office
-    office_match = re.search(r"Policy\s*Issuing\s*Office\s*:\s*([A-Za-z0-9\s,.-]+?)(?:\s*Period|\s*$)", text, re.IGNORECASE)
-    if office_match:
-        template["policy_issuing_office"] = office_match.group(1).strip()
-    
-    # Extract Policy Period
-    period_match = re.search(r"Period\s*of\s*Insurance\s*:\s*From:\s*(\d{2}/\d{2}/\d{4})\s*00:00\s*to:\s*(\d{2}/\d{2}/\d{4})Midnight", text, re.IGNORECASE)
-    if period_match:
-        template["policy_start_date"] = period_match.group(1).strip()
-        template["policy_end_date"] = period_match.group(2).strip()
-    
-    # Extract Policy Issued Date
-    issued_match = re.search(r"Policy\s*issued\s*on\s*:\s*(\d{2}/\d{2}/\d{4})", text, re.IGNORECASE)
-    if issued_match:
-        template["policy_issued_date"] = issued_match.group(1).strip()
-    
-    # Extract Cover Note Number
-    cover_note_match = re.search(r"Cover\s*Note\s*No\s*:\s*([A-Za-z0-9]+)", text, re.IGNORECASE)
-    if cover_note_match:
-        template["cover_note_number"] = cover_note_match.group(1).strip()
-    
-    # Extract Hypothecated To
-    hypothecated_match = re.search(r"Hypothecated\s*to\s*:\s*([A-Za-z0-9\s]+?)(?:\s*Mobile|\s*$)", text, re.IGNORECASE)
-    if hypothecated_match:
-        template["hypothecated_to"] = hypothecated_match.group(1).strip()
-    
-    # Extract Vehicle Type
-    vehicle_type_match = re.search(r"Type\s*of\s*Vehicle\s*:\s*([A-Za-z\s]+?)(?:\s*Code|\s*$)", text, re.IGNORECASE)
-    if vehicle_type_match:
-        template["vehicle_type"] = vehicle_type_match.group(1).strip()
-    
-    # Extract Vehicle Details from Table
-    # Registration Number
-    reg_match = re.search(r"Registration\s*no\.\s*:\s*([A-Z0-9\s-]+)", text, re.IGNORECASE)
-    if reg_match:
-        template["vehicle_registration_number"] = reg_match.group(1).strip()
-    
-    # Alternative registration pattern
-    if not template["vehicle_registration_number"]:
-        reg_alt_match = re.search(r"RJ\s*\d{2}\s*[A-Z]{2}\s*\d{4}", text, re.IGNORECASE)
-        if reg_alt_match:
-            template["vehicle_registration_number"] = reg_alt_match.group(0).strip()
-    
-    # Make
-    make_match = re.search(r"Make\s*:\s*([A-Za-z\s]+)", text, re.IGNORECASE)
-    if make_match:
-        template["make"] = make_match.group(1).strip()
-    
-    # Alternative make pattern
-    if not template["make"]:
-        make_alt_match = re.search(r"BAJAJ", text, re.IGNORECASE)
-        if make_alt_match:
-            template["make"] = make_alt_match.group(0).strip()
-    
-    # Model
-    model_match = re.search(r"Model\s*:\s*([A-Za-z\s]+)", text, re.IGNORECASE)
-    if model_match:
-        template["model"] = model_match.group(1).strip()
-    
-    # Alternative model pattern
-    if not template["model"]:
-        model_alt_match = re.search(r"DISCOVER", text, re.IGNORECASE)
-        if model_alt_match:
-            template["model"] = model_alt_match.group(0).strip()
-    
-    # Variant
-    variant_match = re.search(r"Variant\s*:\s*([A-Za-z0-9\s]+)", text, re.IGNORECASE)
-    if variant_match:
-        template["variant"] = variant_match.group(1).strip()
-    
-    # Alternative variant pattern
-    if not template["variant"]:
-        variant_alt_match = re.search(r"125\s*DRUM", text, re.IGNORECASE)
-        if variant_alt_match:
-            template["variant"] = variant_alt_match.group(0).strip()
-    
-    # CC (Cubic Capacity)
-    cc_match = re.search(r"CC\s*:\s*(\d+)", text, re.IGNORECASE)
-    if cc_match:
-        template["cubic_capacity"] = cc_match.group(1).strip()
-    
-    # Alternative CC pattern
-    if not template["cubic_capacity"]:
-        cc_alt_match = re.search(r"125", text, re.IGNORECASE)
-        if cc_alt_match:
-            template["cubic_capacity"] = cc_alt_match.group(0).strip()
-    
-    # Manufacturing Year
-    year_match = re.search(r"Manufacturing\s*Year\s*:\s*(\d{4})", text, re.IGNORECASE)
-    if year_match:
-        template["manufacturing_year"] = year_match.group(1).strip()
-    
-    # Alternative manufacturing year pattern
-    if not template["manufacturing_year"]:
-        year_alt_match = re.search(r"2020", text, re.IGNORECASE)
-        if year_alt_match:
-            template["manufacturing_year"] = year_alt_match.group(0).strip()
-    
-    # RTO Location
-    rto_match = re.search(r"RTO\s*Location\s*:\s*([A-Za-z\s]+)", text, re.IGNORECASE)
-    if rto_match:
-        template["rto_location"] = rto_match.group(1).strip()
-    
-    # Alternative RTO location pattern
-    if not template["rto_location"]:
-        rto_alt_match = re.search(r"JAIPUR", text, re.IGNORECASE)
-        if rto_alt_match:
-            template["rto_location"] = rto_alt_match.group(0).strip()
-    
-    # Engine Number
-    engine_match = re.search(r"Engine\s*Number\s*:\s*([A-Z0-9]+)", text, re.IGNORECASE)
-    if engine_match:
-        template["engine_number"] = engine_match.group(1).strip()
-    
-    # Alternative engine pattern
-    if not template["engine_number"]:
-        engine_alt_match = re.search(r"845698587474", text, re.IGNORECASE)
-        if engine_alt_match:
-            template["engine_number"] = engine_alt_match.group(0).strip()
-    
-    # Chassis Number
-    chassis_match = re.search(r"Chassis\s*No\.\s*:\s*([A-Z0-9]+)", text, re.IGNORECASE)
-    if chassis_match:
-        template["chassis_number"] = chassis_match.group(1).strip()
-    
-    # Alternative chassis pattern
-    if not template["chassis_number"]:
-        chassis_alt_match = re.search(r"7854857854", text, re.IGNORECASE)
-        if chassis_alt_match:
-            template["chassis_number"] = chassis_alt_match.group(0).strip()
-    
-    # Seating Capacity
-    seating_match = re.search(r"Seating\s*Capacity\s*:\s*(\d+)", text, re.IGNORECASE)
-    if seating_match:
-        template["seating_capacity"] = seating_match.group(1).strip()
-    
-    # Alternative seating capacity pattern
-    if not template["seating_capacity"]:
-        seating_alt_match = re.search(r"2", text, re.IGNORECASE)
-        if seating_alt_match:
-            template["seating_capacity"] = seating_alt_match.group(0).strip()
-    
-    # Seating Capacity of Side Car
-    sidecar_match = re.search(r"Seating\s*Capacity\s*of\s*side\s*car\s*\(if\s*any\)\s*:\s*([A-Za-z0-9\s]+)", text, re.IGNORECASE)
-    if sidecar_match:
-        template["seating_capacity_sidecar"] = sidecar_match.group(1).strip()
-    
-    # Extract IDV Details
-    idv_vehicle_match = re.search(r"IDV\s*of\s*the\s*Vehicle\s*\(in\s*₹\)\s*:\s*([0-9,]+)", text, re.IGNORECASE)
-    if idv_vehicle_match:
-        template["idv_vehicle"] = idv_vehicle_match.group(1).strip()
-    
-    # Alternative IDV pattern
-    if not template["idv_vehicle"]:
-        idv_alt_match = re.search(r"24,391", text, re.IGNORECASE)
-        if idv_alt_match:
-            template["idv_vehicle"] = idv_alt_match.group(0).strip()
-    
-    idv_sidecar_match = re.search(r"IDV\s*of\s*Side\s*Car\s*\(in\s*₹\)\s*:\s*([0-9,]+)", text, re.IGNORECASE)
-    if idv_sidecar_match:
-        template["idv_sidecar"] = idv_sidecar_match.group(1).strip()
-    
-    additional_accessories_match = re.search(r"Additional\s*Accessories\s*\(in\s*₹\)\s*:\s*([0-9,]+)", text, re.IGNORECASE)
-    if additional_accessories_match:
-        template["additional_accessories"] = additional_accessories_match.group(1).strip()
-    
-    non_electrical_match = re.search(r"Non-Electrical\s*Accessories\s*fitted\s*to\s*the\s*Vehicle\s*\(in\s*₹\)\s*:\s*([0-9,]+)", text, re.IGNORECASE)
-    if non_electrical_match:
-        template["non_electrical_accessories"] = non_electrical_match.group(1).strip()
-    
-    electrical_match = re.search(r"Electrical\s*&\s*Electronic\s*Accessories\s*fitted\s*to\s*the\s*Vehicle\s*\(in\s*₹\)\s*:\s*([0-9,]+)", text, re.IGNORECASE)
-    if electrical_match:
-        template["electrical_electronic_accessories"] = electrical_match.group(1).strip()
-    
-    cng_lpg_match = re.search(r"CNG\s*/\s*LPG\s*Kit\s*\(in\s*₹\)\s*:\s*([0-9,]+)", text, re.IGNORECASE)
-    if cng_lpg_match:
-        template["cng_lpg_kit"] = cng_lpg_match.group(1).strip()
-    
-    total_vehicle_value_match = re.search(r"Total\s*Value\s*of\s*the\s*Vehicle\s*\(in\s*₹\)\s*:\s*([0-9,]+)", text, re.IGNORECASE)
-    if total_vehicle_value_match:
-        template["total_vehicle_value"] = total_vehicle_value_match.group(1).strip()
-    
-    # Extract Premium Computation - Own Damage
-    basic_own_damage_match = re.search(r"Basic\s*Own\s*Damage\s*:\s*([0-9,.]+)", text, re.IGNORECASE)
-    if basic_own_damage_match:
-        template["basic_own_damage"] = basic_own_damage_match.group(1).strip()
-    
-    # Alternative basic own damage pattern
-    if not template["basic_own_damage"]:
-        basic_own_alt_match = re.search(r"600\.26", text, re.IGNORECASE)
-        if basic_own_alt_match:
-            template["basic_own_damage"] = basic_own_alt_match.group(0).strip()
-    
-    no_claim_bonus_percent_match = re.search(r"Less:\s*No\s*Claim\s*Bonus\s*Percent\s*(\d+)%", text, re.IGNORECASE)
-    if no_claim_bonus_percent_match:
-        template["no_claim_bonus_percent"] = no_claim_bonus_percent_match.group(1).strip()
-    
-    # Alternative no claim bonus percent pattern
-    if not template["no_claim_bonus_percent"]:
-        ncb_percent_alt_match = re.search(r"25%", text, re.IGNORECASE)
-        if ncb_percent_alt_match:
-            template["no_claim_bonus_percent"] = "25"
-    
-    no_claim_bonus_amount_match = re.search(r"Less:\s*No\s*Claim\s*Bonus\s*Percent\s*\d+%\s*:\s*([0-9,.]+)", text, re.IGNORECASE)
-    if no_claim_bonus_amount_match:
-        template["no_claim_bonus_amount"] = no_claim_bonus_amount_match.group(1).strip()
-    
-    # Alternative no claim bonus amount pattern
-    if not template["no_claim_bonus_amount"]:
-        ncb_amount_alt_match = re.search(r"150\.07", text, re.IGNORECASE)
-        if ncb_amount_alt_match:
-            template["no_claim_bonus_amount"] = ncb_amount_alt_match.group(0).strip()
-    
-    total_own_damage_match = re.search(r"Total\s*Own\s*Damage\s*Premium\s*\(A\)\s*:\s*([0-9,.]+)", text, re.IGNORECASE)
-    if total_own_damage_match:
-        template["total_own_damage_premium"] = total_own_damage_match.group(1).strip()
-    
-    # Alternative total own damage premium pattern
-    if not template["total_own_damage_premium"]:
-        total_own_alt_match = re.search(r"450\.19", text, re.IGNORECASE)
-        if total_own_alt_match:
-            template["total_own_damage_premium"] = total_own_alt_match.group(0).strip()
-    
-    # Extract Premium Computation - Liability
-    basic_tp_match = re.search(r"Basic\s*TP\s*Including\s*TPPD\s*Premium\s*:\s*([0-9,.]+)", text, re.IGNORECASE)
-    if basic_tp_match:
-        template["basic_tp_premium"] = basic_tp_match.group(1).strip()
-    
-    # Alternative basic TP premium pattern
-    if not template["basic_tp_premium"]:
-        basic_tp_alt_match = re.search(r"714\.00", text, re.IGNORECASE)
-        if basic_tp_alt_match:
-            template["basic_tp_premium"] = basic_tp_alt_match.group(0).strip()
-    
-    pa_cover_amount_match = re.search(r"PA\s*Cover\s*for\s*Owner\s*Driver\s*of\s*₹\s*([0-9,]+)", text, re.IGNORECASE)
-    if pa_cover_amount_match:
-        template["pa_cover_amount"] = pa_cover_amount_match.group(1).strip()
-    
-    pa_cover_premium_match = re.search(r"PA\s*Cover\s*for\s*Owner\s*Driver\s*of\s*₹\s*[0-9,]+\s*:\s*([0-9,.]+)", text, re.IGNORECASE)
-    if pa_cover_premium_match:
-        template["pa_cover_premium"] = pa_cover_premium_match.group(1).strip()
-    
-    # Alternative PA cover premium pattern
-    if not template["pa_cover_premium"]:
-        pa_cover_alt_match = re.search(r"330\.00", text, re.IGNORECASE)
-        if pa_cover_alt_match:
-            template["pa_cover_premium"] = pa_cover_alt_match.group(0).strip()
-    
-    total_liability_match = re.search(r"Total\s*Liability\s*Premium\s*\(B\)\s*:\s*([0-9,.]+)", text, re.IGNORECASE)
-    if total_liability_match:
-        template["total_liability_premium"] = total_liability_match.group(1).strip()
-    
-    # Alternative total liability premium pattern
-    if not template["total_liability_premium"]:
-        total_liability_alt_match = re.search(r"1,044\.00", text, re.IGNORECASE)
-        if total_liability_alt_match:
-            template["total_liability_premium"] = total_liability_alt_match.group(0).strip()
-    
-    # Extract Tax and Total Premium
-    taxable_value_match = re.search(r"Taxable\s*value\s*of\s*Services\s*\(A\+B\)\s*:\s*([0-9,.]+)", text, re.IGNORECASE)
-    if taxable_value_match:
-        template["taxable_value_services"] = taxable_value_match.group(1).strip()
-    
-    # Alternative taxable value pattern
-    if not template["taxable_value_services"]:
-        taxable_alt_match = re.search(r"1,494\.19", text, re.IGNORECASE)
-        if taxable_alt_match:
-            template["taxable_value_services"] = taxable_alt_match.group(0).strip()
-    
-    cgst_percent_match = re.search(r"CGST\s*@\s*(\d+)%", text, re.IGNORECASE)
-    if cgst_percent_match:
-        template["cgst_percent"] = cgst_percent_match.group(1).strip()
-    
-    cgst_amount_match = re.search(r"CGST\s*@\s*\d+%\s*:\s*([0-9,.]+)", text, re.IGNORECASE)
-    if cgst_amount_match:
-        template["cgst_amount"] = cgst_amount_match.group(1).strip()
-    
-    # Alternative CGST amount pattern
-    if not template["cgst_amount"]:
-        cgst_amount_alt_match = re.search(r"134\.48", text, re.IGNORECASE)
-        if cgst_amount_alt_match:
-            template["cgst_amount"] = cgst_amount_alt_match.group(0).strip()
-    
-    sgst_percent_match = re.search(r"SGST\s*@\s*(\d+)%", text, re.IGNORECASE)
-    if sgst_percent_match:
-        template["sgst_percent"] = sgst_percent_match.group(1).strip()
-    
-    sgst_amount_match = re.search(r"SGST\s*@\s*\d+%\s*:\s*([0-9,.]+)", text, re.IGNORECASE)
-    if sgst_amount_match:
-        template["sgst_amount"] = sgst_amount_match.group(1).strip()
-    
-    # Alternative SGST amount pattern
-    if not template["sgst_amount"]:
-        sgst_amount_alt_match = re.search(r"134\.48", text, re.IGNORECASE)
-        if sgst_amount_alt_match:
-            template["sgst_amount"] = sgst_amount_alt_match.group(0).strip()
-    
-    total_premium_match = re.search(r"Total\s*Premium\s*\(in\s*₹\)\s*:\s*([0-9,.]+)", text, re.IGNORECASE)
-    if total_premium_match:
-        template["total_premium"] = total_premium_match.group(1).strip()
-    
-    # Alternative total premium pattern
-    if not template["total_premium"]:
-        total_premium_alt_match = re.search(r"1,763\.00", text, re.IGNORECASE)
-        if total_premium_alt_match:
-            template["total_premium"] = total_premium_alt_match.group(0).strip()
-    
-    # Extract Additional Details
-    geographical_area_match = re.search(r"Geographical\s*Area\s*:\s*([A-Z\s]+)", text, re.IGNORECASE)
-    if geographical_area_match:
-        template["geographical_area"] = geographical_area_match.group(1).strip()
-    
-    # Alternative geographical area pattern
-    if not template["geographical_area"]:
-        geo_alt_match = re.search(r"INDIA", text, re.IGNORECASE)
-        if geo_alt_match:
-            template["geographical_area"] = geo_alt_match.group(0).strip()
-    
-    compulsory_deductible_match = re.search(r"Compulsory\s*Deductibles\s*₹\s*:\s*([0-9,]+)", text, re.IGNORECASE)
-    if compulsory_deductible_match:
-        template["compulsory_deductible"] = compulsory_deductible_match.group(1).strip()
-    
-    # Alternative compulsory deductible pattern
-    if not template["compulsory_deductible"]:
-        comp_deduct_alt_match = re.search(r"100", text, re.IGNORECASE)
-        if comp_deduct_alt_match:
-            template["compulsory_deductible"] = comp_deduct_alt_match.group(0).strip()
-    
-    additional_excess_match = re.search(r"Additional\s*Excess\s*₹\s*:\s*([0-9,]+)", text, re.IGNORECASE)
-    if additional_excess_match:
-        template["additional_excess"] = additional_excess_match.group(1).strip()
-    
-    # Alternative additional excess pattern
-    if not template["additional_excess"]:
-        add_excess_alt_match = re.search(r"0", text, re.IGNORECASE)
-        if add_excess_alt_match:
-            template["additional_excess"] = add_excess_alt_match.group(0).strip()
-    
-    voluntary_deductible_match = re.search(r"Voluntary\s*Deductible\s*₹\s*:\s*([0-9,]+)", text, re.IGNORECASE)
-    if voluntary_deductible_match:
-        template["voluntary_deductible"] = voluntary_deductible_match.group(1).strip()
-    
-    # Alternative voluntary deductible pattern
-    if not template["voluntary_deductible"]:
-        vol_deduct_alt_match = re.search(r"0", text, re.IGNORECASE)
-        if vol_deduct_alt_match:
-            template["voluntary_deductible"] = vol_deduct_alt_match.group(0).strip()
-    
-    total_deductible_match = re.search(r"Total\s*Deductible\s*₹\s*:\s*([0-9,]+)", text, re.IGNORECASE)
-    if total_deductible_match:
-        template["total_deductible"] = total_deductible_match.group(1).strip()
-    
-    # Alternative total deductible pattern
-    if not template["total_deductible"]:
-        total_deduct_alt_match = re.search(r"100", text, re.IGNORECASE)
-        if total_deduct_alt_match:
-            template["total_deductible"] = total_deduct_alt_match.group(0).strip()
-    
-    # Extract Intermediary Details
-    intermediary_code_match = re.search(r"Intermediary\s*Code\s*:\s*([0-9]+)", text, re.IGNORECASE)
-    if intermediary_code_match:
-        template["intermediary_code"] = intermediary_code_match.group(1).strip()
-    
-    intermediary_name_match = re.search(r"Intermediary\s*Name\s*:\s*([A-Za-z0-9\s/\-]+)", text, re.IGNORECASE)
-    if intermediary_name_match:
-        template["intermediary_name"] = intermediary_name_match.group(1).strip()
-    
-    # Alternative intermediary name pattern
-    if not template["intermediary_name"]:
-        intermediary_name_alt_match = re.search(r"DUMMY\s*FOR\s*TESTING\s*/\s*ATISH\s*SONAWANE", text, re.IGNORECASE)
-        if intermediary_name_alt_match:
-            template["intermediary_name"] = intermediary_name_alt_match.group(0).strip()
-    
-    intermediary_mobile_match = re.search(r"Intermediary's\s*Mobile\s*No\.\s*:\s*([0-9]+)", text, re.IGNORECASE)
-    if intermediary_mobile_match:
-        template["intermediary_mobile"] = intermediary_mobile_match.group(1).strip()
-    
-    intermediary_landline_match = re.search(r"Intermediary's\s*Landline\s*No\.\s*:\s*([0-9]+)", text, re.IGNORECASE)
-    if intermediary_landline_match:
-        template["intermediary_landline"] = intermediary_landline_match.group(1).strip()
-    
-    # Extract Nominee Details
-    nominee_name_match = re.search(r"\*Nominee\s*Name\s*:\s*([A-Za-z\s]+)", text, re.IGNORECASE)
-    if nominee_name_match:
-        template["nominee_name"] = nominee_name_match.group(1).strip()
-    
-    # Alternative nominee name pattern
-    if not template["nominee_name"]:
-        nominee_name_alt_match = re.search(r"KRISHNA\s*DWIVEDI", text, re.IGNORECASE)
-        if nominee_name_alt_match:
-            template["nominee_name"] = nominee_name_alt_match.group(0).strip()
-    
-    nominee_age_match = re.search(r"\*Nominee\s*Age\s*:\s*(\d+)", text, re.IGNORECASE)
-    if nominee_age_match:
-        template["nominee_age"] = nominee_age_match.group(1).strip()
-    
-    # Alternative nominee age pattern
-    if not template["nominee_age"]:
-        nominee_age_alt_match = re.search(r"26\s*Brother", text, re.IGNORECASE)
-        if nominee_age_alt_match:
-            template["nominee_age"] = "26"
-    
-    nominee_relationship_match = re.search(r"\*Relationship\s*:\s*([A-Za-z\s]+)", text, re.IGNORECASE)
-    if nominee_relationship_match:
-        template["nominee_relationship"] = nominee_relationship_match.group(1).strip()
-    
-    # Alternative nominee relationship pattern
-    if not template["nominee_relationship"]:
-        nominee_rel_alt_match = re.search(r"26\s*(Brother)", text, re.IGNORECASE)
-        if nominee_rel_alt_match:
-            template["nominee_relationship"] = nominee_rel_alt_match.group(1).strip()
-    
-    nominee_appointee_match = re.search(r"\*Name\s*of\s*Appointee\s*\(if\s*nominee\s*is\s*a\s*minor\)\s*:\s*([A-Za-z\s]+)", text, re.IGNORECASE)
-    if nominee_appointee_match:
-        template["nominee_appointee_name"] = nominee_appointee_match.group(1).strip()
-    
-    nominee_appointee_rel_match = re.search(r"Relationship\s*to\s*the\s*:\s*([A-Za-z\s]+)", text, re.IGNORECASE)
-    if nominee_appointee_rel_match:
-        template["nominee_appointee_relationship"] = nominee_appointee_rel_match.group(1).strip()
-    
-    # Extract Company Information
-    company_match = re.search(r"(Zurich\s*Kotak\s*General\s*Insurance\s*Company)", text, re.IGNORECASE)
-    if company_match:
-        template["insurance_company"] = company_match.group(1).strip()
-    
-    # Alternative company name pattern
-    if not template["insurance_company"]:
-        company_alt_match = re.search(r"(KOTAK\s*GENERAL\s*INSURANCE)", text, re.IGNORECASE)
-        if company_alt_match:
-            template["insurance_company"] = company_alt_match.group(1).strip()
-    
-    company_reg_match = re.search(r"CIN:\s*([A-Z0-9]+)", text, re.IGNORECASE)
-    if company_reg_match:
-        template["company_registration"] = company_reg_match.group(1).strip()
-    
-    irdai_match = re.search(r"IRDAI\s*Reg\.\s*No\.\s*(\d+)", text, re.IGNORECASE)
-    if irdai_match:
-        template["irdai_registration"] = irdai_match.group(1).strip()
-    
-    company_address_match = re.search(r"Registered\s*&\s*Corporate\s*Office:\s*([A-Za-z0-9\s,.-]+?)(?:\s*Toll|\s*$)", text, re.IGNORECASE)
-    if company_address_match:
-        template["company_address"] = company_address_match.group(1).strip()
-    
-    toll_free_match = re.search(r"Toll\s*Free:\s*([0-9\s]+)", text, re.IGNORECASE)
-    if toll_free_match:
-        template["toll_free"] = toll_free_match.group(1).strip()
-    
-    company_email_match = re.search(r"Email:\s*([A-Za-z0-9@.]+)", text, re.IGNORECASE)
-    if company_email_match:
-        template["company_email"] = company_email_match.group(1).strip()
-    
-    company_website_match = re.search(r"Website:\s*([A-Za-z0-9.]+)", text, re.IGNORECASE)
-    if company_website_match:
-        template["company_website"] = company_website_match.group(1).strip()
-    
-    # Extract Document Information
-    document_type_match = re.search(r"(Long\s*Term\s*Two\s*Wheeler\s*Secure\s*Comprehensive\s*Policy)", text, re.IGNORECASE)
-    if document_type_match:
-        template["document_type"] = document_type_match.group(1).strip().replace('\n', ' ')
-    
-    # Alternative document type pattern
-    if not template["document_type"]:
-        doc_type_alt_match = re.search(r"(Certificate\s*cum\s*Policy\s*Schedule)", text, re.IGNORECASE)
-        if doc_type_alt_match:
-            template["document_type"] = doc_type_alt_match.group(1).strip()
-    
-    uin_match = re.search(r"UIN:\s*([A-Z0-9]+)", text, re.IGNORECASE)
-    if uin_match:
-        template["uin_number"] = uin_match.group(1).strip()
-    
-    # Alternative UIN pattern
-    if not template["uin_number"]:
-        uin_alt_match = re.search(r"IRDAN152RP0008V04201617", text, re.IGNORECASE)
-        if uin_alt_match:
-            template["uin_number"] = uin_alt_match.group(0).strip()
-    
-    contact_assistance_match = re.search(r"For\s*any\s*assistance\s*please\s*call\s*([0-9\s]+)", text, re.IGNORECASE)
-    if contact_assistance_match:
-        template["contact_assistance"] = contact_assistance_match.group(1).strip()
-    
-    # Alternative contact assistance pattern
-    if not template["contact_assistance"]:
-        contact_alt_match = re.search(r"1800\s*266\s*4545", text, re.IGNORECASE)
-        if contact_alt_match:
-            template["contact_assistance"] = contact_alt_match.group(0).strip()
-    
-    return template
 
-def extract_sbi_bank_statement(text):
+
+class SbiTableReader:
+    """
+    Reads the pages of one tabular statement in order. Rows before the header row is found go through the line
+    engine, as flattened text; once found, its geometry is kept for the rest of the statement.
+    """
+
+    def __init__(self):
+        self.columns = None
+
+    @property
+    def layout(self):
+        return 'table' if self.columns is not None else 'text'
+
+    def read_page(self, page_num, rows):
+        """
+        Transactions of one page's word rows, each tagged with page_num
+        """
+        transactions = []
+        last = None          # the transaction a wrapped description continues
+        last_bottom = None
+        for row in rows:
+            if self.columns is None:
+                self.columns = StatementColumns.from_header(row)
+                if self.columns is None:
+                    line = ' '.join(word['text'] for word in row)
+                    transaction = parse_sbi_line(line) if len(line) >= 10 else None
+                    if transaction is not None:
+                        transaction['page'] = page_num
+                        transactions.append(transaction)
+                continue
+            if self.columns.is_header(row):
+                last = None
+                continue
+
+            cells = self.columns.cells(row)
+            transaction = sbi_table_transaction(cells)
+            if transaction is not None:
+                transaction['page'] = page_num
+                transactions.append(transaction)
+                last = transaction
+            elif (last is not None and cells.keys() <= {'description', 'ref_no'}
+                  and row[0]['top'] - last_bottom <= row[0]['bottom'] - row[0]['top']):
+                # A wrapped description (or reference) - only when the row sits right under the last one
+                for name in ('description', 'ref_no'):
+                    if name in cells:
+                        extra = SBI_DESCRIPTION_JUNK.sub('', cells[name]).strip() if name == 'description' else cells[name]
+                        last[name] = f"{last[name]} {extra}".strip() if last[name] else extra
+            else:
+                last = None
+            last_bottom = max(word['bottom'] for word in row)
+        return transactions
+
+
+def iter_sbi_table_pages(pdf_bytes, reader, progress=None):
+    """
+    Yield (page_num, text, transactions) one page at a time, reading the statement's table with reader.
+    The page text is rebuilt from the word rows, so no page is parsed twice.
+    """
+    with open_pdf(pdf_bytes) as pdf:
+        with timed_stage('pdf_open'):
+            page_count = len(pdf.pages)
+        for page_num, page in enumerate(pdf.pages, start=1):
+            with timed_stage('page_text'):
+                rows = page_word_rows(page)
+            finish_page(page)
+            with timed_stage('extract'):
+                transactions = reader.read_page(page_num, rows)
+            yield page_num, '\n'.join(' '.join(word['text'] for word in row) for row in rows), transactions
+            if progress:
+                progress(page_num, page_count)
+
+
+# Document type detection - a keyword index over the first page.
+# Every keyword found adds its weight to the kind of document it points at; insurer names then pick the policy extractor.
+DOCUMENT_KEYWORDS = {
+    # Bank statements
+    'state bank of india': ('statement', 3),
+    'account statement': ('statement', 3),
+    'statement of account': ('statement', 3),
+    'txn date': ('statement', 3),
+    'value date': ('statement', 2),
+    'ref no./cheque no.': ('statement', 2),
+    'opening balance': ('statement', 2),
+    'closing balance': ('statement', 2),
+    'ifs code': ('statement', 1),
+    'account number': ('statement', 1),
+    'debit': ('statement', 1),
+    'credit': ('statement', 1),
+    'balance': ('statement', 1),
+    # Motor policy schedules
+    'policy': ('policy', 1),
+    'policy schedule': ('policy', 2),
+    'certificate of insurance': ('policy', 2),
+    'period of insurance': ('policy', 2),
+    'insurance': ('policy', 1),
+    'insured': ('policy', 1),
+    'premium': ('policy', 1),
+    'idv': ('policy', 2),
+    'chassis': ('policy', 2),
+    'engine': ('policy', 1),
+    'nominee': ('policy', 1),
+    # Insurers with their own extractor
+    'kotak': ('kotak', 3),
+}
+DOCUMENT_KEYWORD_REGEX = re.compile(anchor_trie_pattern(DOCUMENT_KEYWORDS))
+
+
+def classify_document(first_page_text):
+    """
+    Fingerprint a document from its first page.
+    Returns the extractor to route it to and the share of the keyword weight that agrees with that choice.
+    """
+    scores = {'statement': 0, 'policy': 0, 'kotak': 0}
+    for keyword in set(DOCUMENT_KEYWORD_REGEX.findall(fold_for_anchors(first_page_text))):
+        kind, weight = DOCUMENT_KEYWORDS[keyword]
+        scores[kind] += weight
+
+    policy_score = scores['policy'] + scores['kotak']
+    total = scores['statement'] + policy_score
+    if total == 0:
+        document_type, confidence = 'universal', 0.0
+    elif scores['statement'] > policy_score:
+        document_type, confidence = 'sbi_statement', scores['statement'] / total
+    else:
+        document_type = 'kotak' if scores['kotak'] else 'universal'
+        confidence = policy_score / total
+    return {'document_type': document_type, 'detection_confidence': round(confidence, 2)}
+
+
+def page_chunk(page_num, text):
+    return f"=== PAGE {page_num} ===\n{text}\n\n"
+
+
+class DocumentText:
+    """
+    Text of a whole PDF joined once from its page texts, with an index from character offset to page.
+    Pages without text are left out, as they always were.
+    """
+
+    def __init__(self, page_texts):
+        chunks = []
+        self.page_numbers = []
+        self.page_starts = []
+        offset = 0
+        for page_num, text in page_texts:
+            if not text:
+                continue
+            chunk = page_chunk(page_num, text)
+            self.page_numbers.append(page_num)
+            self.page_starts.append(offset)
+            chunks.append(chunk)
+            offset += len(chunk)
+        self.text = "".join(chunks)
+
+    def page_at(self, offset):
+        """
+        Page number the character at offset came from
+        """
+        index = bisect.bisect_right(self.page_starts, offset) - 1
+        return self.page_numbers[index] if index >= 0 else None
+
+    def pages(self):
+        """
+        Yield (page_num, page_chunk) straight from the index, without re-splitting the text
+        """
+        ends = self.page_starts[1:] + [len(self.text)]
+        for page_num, start, end in zip(self.page_numbers, self.page_starts, ends):
+            yield page_num, self.text[start:end]
+
+
+def extract_document_text(pdf_bytes, allow_parallel=True, progress=None):
+    """
+    Extract the text of every page into a DocumentText.
+    Large documents are spread over the page pool when PARALLEL_PAGES is enabled.
+    progress, if given, is called with (pages_done, pages_total) as pages complete.
+    """
+    with open_pdf(pdf_bytes) as pdf:
+        page_count = len(pdf.pages)
+        workers = app.config['PAGE_WORKERS']
+        parallel = (allow_parallel and app.config['PARALLEL_PAGES'] and workers > 1
+                    and page_count >= app.config['PARALLEL_MIN_PAGES'])
+        if not parallel:
+            return DocumentText(iter_pdf_pages(pdf, progress))
+
+    # Page ranges come back in order; memory and the deadline are checked between them, as between pages on the
+    # serial path - and waiting for a range never runs past the deadline
+    page_texts = []
+    ranges = iter_pages_parallel(pdf_bytes, page_count, workers, request_deadline())
+    try:
+        while True:
+            with timed_stage('page_text'):
+                try:
+                    texts = next(ranges, None)
+                except TimeoutError:
+                    check_deadline()
+                    raise
+            if texts is None:
+                break
+            page_texts.extend(texts)
+            count_pages(len(texts))
+            check_request_memory()
+            check_deadline()
+            if progress:
+                progress(len(page_texts), page_count)
+    finally:
+        ranges.close()
+    return DocumentText(enumerate(page_texts, start=1))
+
+
+def upload_stream(pdf_bytes):
+    """
+    A file object over an upload - a mapped upload is read in place, rewound, instead of being copied
+    """
+    if isinstance(pdf_bytes, mmap.mmap):
+        pdf_bytes.seek(0)
+        return pdf_bytes
+    return io.BytesIO(pdf_bytes)
+
+
+def open_pdf(pdf_bytes):
+    with timed_stage('pdf_open'):
+        pdf = get_pdf_backend().open(upload_stream(pdf_bytes))
+    check_deadline()
+    return pdf
+
+
+def iter_pdf_pages(pdf, progress=None):
+    """
+    Yield (page_num, text) from an open PDF one page at a time - pages after the consumer stops are never parsed.
+    progress, if given, is called with (pages_done, pages_total) after each page is consumed.
+    """
+    with timed_stage('pdf_open'):
+        page_count = len(pdf.pages)
+    for page_num, page in enumerate(pdf.pages, start=1):
+        with timed_stage('page_text'):
+            text = page.extract_text() or ""
+        finish_page(page)
+        yield page_num, text
+        if progress:
+            progress(page_num, page_count)
+
+
+def iter_page_texts(pdf_bytes):
+    """
+    Yield (page_num, text) one page at a time, so callers can act on a page before the next is parsed
+    """
+    with open_pdf(pdf_bytes) as pdf:
+        yield from iter_pdf_pages(pdf)
+
+
+def build_result(extractor, document):
+    """
+    Run one extractor over a DocumentText and build its response body
+    """
+    if extractor == 'sbi_statement':
+        # Extract SBI bank statement transactions, each tagged with the page it was read from
+        offsets = []
+        with timed_stage('extract'):
+            transactions = extract_sbi_bank_statement(document.text, offsets)
+            for transaction, offset in zip(transactions, offsets):
+                transaction['page'] = document.page_at(offset)
+        check_deadline()
+        return statement_result(document, transactions)
+
+    # Extract structured data using the insurer's regex patterns
+    offsets = {}
+    with timed_stage('extract'), regex_profiling(extractor), regex_budget() as budget:
+        extracted_values = POLICY_EXTRACTORS[extractor](document.text, offsets)
+    check_deadline()
+    return policy_result(document, extracted_values, offsets, budget.timed_out)
+
+
+def reconcile_transactions(transactions, reconciliation):
+    """
+    Run the balance check over transaction dicts (see ledger.Reconciliation), swapping debit and credit in the rows
+    it fixes; returns their StatementLedger
+    """
+    with timed_stage('reconcile'):
+        ledger = StatementLedger.from_amounts(
+            (transaction['debit'], transaction['credit'], transaction['balance']) for transaction in transactions)
+        for row in reconciliation.check(ledger):
+            transaction = transactions[row]
+            transaction['debit'], transaction['credit'] = transaction['credit'], transaction['debit']
+    return ledger
+
+
+def statement_result(document, transactions):
+    """
+    Response body for a statement's transactions - with every amount in integer paise, column by column,
+    and the report of the running-balance check
+    """
+    reconciliation = Reconciliation()
+    ledger = reconcile_transactions(transactions, reconciliation)
+    return {
+        'success': True,
+        'text': document.text.strip(),
+        'transactions': transactions,
+        'transaction_count': len(transactions),
+        'amounts': {'unit': 'paise', **{column: ledger.column(column) for column in AMOUNT_COLUMNS}},
+        'reconciliation': reconciliation.report(),
+        'text_length': len(document.text),
+        'extraction_timestamp': datetime.now().isoformat()
+    }
+
+
+def extract_sbi_table(pdf_bytes, progress=None):
+    """
+    Read a statement in table mode (see SbiTableReader); the result adds the layout it was read with
+    """
+    reader = SbiTableReader()
+    page_texts = []
+    transactions = []
+    for page_num, text, page_transactions in iter_sbi_table_pages(pdf_bytes, reader, progress):
+        page_texts.append((page_num, text))
+        transactions.extend(page_transactions)
+    return {**statement_result(DocumentText(page_texts), transactions), 'layout': reader.layout}
+
+
+def policy_result(document, extracted_values, offsets, timed_out=()):
+    """
+    Response body for a policy extractor's values
+    timed_out lists the fields left empty because the regex budget ran out before they were searched
+    """
+    # Count filled fields
+    filled_fields = sum(1 for v in extracted_values.values() if v and str(v).strip())
+
+    return {
+        'success': True,
+        'text': document.text.strip(),
+        'extracted_json': extracted_values,
+        'field_pages': {name: document.page_at(offset) for name, offset in offsets.items()},
+        'text_length': len(document.text),
+        'filled_fields': filled_fields,
+        'total_fields': len(extracted_values),
+        'timed_out_fields': list(timed_out),
+        'extraction_timestamp': datetime.now().isoformat()
+    }
+
+
+def extract_uncached(extractor, pdf_bytes, allow_parallel=True, progress=None):
+    """
+    Parse the PDF and run one extractor - also the unit of work handed to pool processes
+    """
+    if extractor == 'sbi_table':
+        return extract_sbi_table(pdf_bytes, progress)
+    return build_result(extractor, extract_document_text(pdf_bytes, allow_parallel, progress))
+
+
+def extract_policy_lazy(extractor, pdf_bytes, page_cap):
+    """
+    Read a policy only as far as its required fields (see read_policy_lazy)
+    """
+    with open_pdf(pdf_bytes) as pdf:
+        return read_policy_lazy(extractor, iter_pdf_pages(pdf), len(pdf.pages), page_cap)
+
+
+def read_policy_lazy(extractor, pages, page_count, page_cap):
+    """
+    Pull pages one at a time, stopping as soon as every required field is filled or page_cap pages have been read.
+    Each new page is searched together with the page before it, so a field split over the break is still found,
+    and the whole text read is extracted only once, when reading stops. Later pages are never parsed.
+    """
+    extract = POLICY_EXTRACTORS[extractor]
+    required = REQUIRED_POLICY_FIELDS[extractor]
+    page_texts = []
+    recent = []
+    text_pages = 0
+    extracted_pages = None
+    missing = set(required)
+    # One budget for the whole document - searching page after page must not reset the clock
+    with regex_profiling(extractor), regex_budget() as budget:
+        for page_num, text in pages:
+            page_texts.append((page_num, text))
+            if text:
+                text_pages += 1
+                recent = recent[-1:] + [(page_num, text)]
+                window_offsets = {}
+                with timed_stage('extract'):
+                    window_values = extract(DocumentText(recent).text, window_offsets)
+                missing = {name for name in missing if not window_values[name]}
+                if text_pages == len(recent):
+                    # The window is still the whole text read
+                    extracted_values, offsets, extracted_pages = window_values, window_offsets, text_pages
+            if missing and page_num < page_cap and not budget.timed_out:
+                continue
+            if extracted_pages != text_pages:
+                offsets = {}
+                with timed_stage('extract'):
+                    extracted_values = extract(DocumentText(page_texts).text, offsets)
+                extracted_pages = text_pages
+            # A field found in the window can still read differently over the whole text - trust only the full run
+            missing = {name for name in required if not extracted_values[name]}
+            if not missing or page_num >= page_cap or budget.timed_out:
+                break
+        if extracted_pages != text_pages:
+            offsets = {}
+            with timed_stage('extract'):
+                extracted_values = extract(DocumentText(page_texts).text, offsets)
+
+    result = policy_result(DocumentText(page_texts), extracted_values, offsets, budget.timed_out)
+    result['pages_read'] = len(page_texts)
+    result['page_count'] = page_count
+    return result
+
+
+def extract_detected(pdf_bytes, lazy=False, progress=None):
+    """
+    Classify a PDF from its first page and run the matching extractor over the same open document,
+    so no page is parsed twice. Returns (detection, result).
+    """
+    with open_pdf(pdf_bytes) as pdf:
+        page_count = len(pdf.pages)
+        pages = iter_pdf_pages(pdf, progress)
+        first_page = next(pages, (1, ""))
+        with timed_stage('classify'):
+            detection = classify_document(first_page[1])
+        extractor = detection['document_type']
+
+        pages = itertools.chain([first_page], pages)
+        if lazy and extractor in POLICY_EXTRACTORS:
+            result = read_policy_lazy(extractor, pages, page_count, app.config['LAZY_PAGE_CAP'])
+        else:
+            result = build_result(extractor, DocumentText(pages))
+    return detection, result
+
+
+def result_cache_key(extractor, digest, page_cap=None):
+    """
+    Cache key for one extractor's result on the upload with this content digest - lazy results depend on the
+    page cap they were read with
+    """
+    name = extractor if page_cap is None else f"{extractor}-lazy{page_cap}"
+    return content_key(digest, name, EXTRACTOR_VERSIONS[extractor])
+
+
+def cache_result(cache_key, result):
+    """
+    Cache a result unless the regex budget cut it short - a timeout depends on load, not on the document
+    """
+    if not result.get('timed_out_fields'):
+        result_cache.put(cache_key, result)
+
+
+def extract_result(extractor, pdf_bytes, digest, lazy=False):
+    """
+    Run one extractor over an uploaded PDF (digest: its content digest, from read_upload), answering from the
+    result cache when the same bytes were already extracted by the same extractor version. Returns
+    (result, cache_hit). lazy reads a policy only as far as its required fields (see extract_policy_lazy).
+    """
+    page_cap = app.config['LAZY_PAGE_CAP'] if lazy else None
+    with timed_stage('cache'):
+        cache_key = result_cache_key(extractor, digest, page_cap)
+        cached_result = result_cache.get(cache_key) if not profiling_requested() else None
+    if cached_result is not None:
+        return cached_result, True
+
+    if lazy:
+        result = extract_policy_lazy(extractor, pdf_bytes, page_cap)
+    else:
+        result = extract_uncached(extractor, pdf_bytes)
+    cache_result(cache_key, result)
+    return result, False
+
+
+def wants_lazy_pages():
+    """
+    Lazy page extraction is chosen with ?lazy=1 / ?lazy=0, defaulting to LAZY_POLICY_PAGES
+    """
+    lazy = request.args.get('lazy')
+    if lazy is None:
+        return app.config['LAZY_POLICY_PAGES']
+    return lazy == '1'
+
+
+def wants_table_layout():
+    """
+    Table mode for statements is chosen with ?table=1 / ?table=0, defaulting to SBI_TABLE_MODE
+    """
+    table = request.args.get('table')
+    if table is None:
+        return app.config['SBI_TABLE_MODE']
+    return table == '1'
+
+
+def detection_cache_key(digest):
+    return content_key(digest, 'document_type', DOCUMENT_TYPE_VERSION)
+
+
+def cached_detection(digest, lazy=False):
     """
-    Extract SBI Bank Statement transactions using regex patterns
+    The cached document type of the upload with this content digest and the cached result of its extractor -
+    either may be None
     """
-    transactions = []
-    
-    # Enhanced SBI Bank Statement patterns
-    # Date patterns: DD/MM/YYYY, DD-MMM-YYYY, DD.MM.YYYY
-    date_patterns = [
-        r'(\d{2}[/-]\d{2}[/-]\d{4})',  # DD/MM/YYYY or DD-MM-YYYY
-        r'(\d{2}[/-][A-Za-z]{3}[/-]\d{4})',  # DD-MMM-YYYY
-        r'(\d{2}\.\d{2}\.\d{4})',  # DD.MM.YYYY
-        r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'  # Flexible date format
-    ]
-    
-    # Enhanced amount patterns: 1,000.00, 1000.00, 1,00,000.00
-    amount_patterns = [
-        r'\d{1,3}(?:,\d{3})*(?:\.\d{2})?',  # Standard format
-        r'\d+(?:\.\d{2})?',  # Simple format
-        r'[₹]?\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?',  # With currency symbol
-        r'\d{1,3}(?:,\d{2})*(?:\.\d{2})?'  # Indian number format
-    ]
-    
-    # Enhanced reference/Cheque number patterns
-    ref_patterns = [
-        r'\b\d{6,}\b',  # 6+ digits
-        r'CHQ\s*NO[:\s]*(\d+)',  # Cheque number
-        r'REF[:\s]*(\d+)',  # Reference number
-        r'UTR[:\s]*(\d+)',  # UTR number
-        r'NEFT[:\s]*(\d+)',  # NEFT reference
-        r'RTGS[:\s]*(\d+)'  # RTGS reference
-    ]
-    
-    # Split text into lines for processing
-    lines = text.split('\n')
-    
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line or len(line) < 10:  # Skip very short lines
+    detection = result_cache.get(detection_cache_key(digest))
+    if detection is None:
+        return None, None
+    extractor = detection['document_type']
+    page_cap = app.config['LAZY_PAGE_CAP'] if lazy and extractor in POLICY_EXTRACTORS else None
+    return detection, result_cache.get(result_cache_key(extractor, digest, page_cap))
+
+
+def cache_detected(digest, detection, result, lazy=False):
+    extractor = detection['document_type']
+    page_cap = app.config['LAZY_PAGE_CAP'] if lazy and extractor in POLICY_EXTRACTORS else None
+    result_cache.put(detection_cache_key(digest), detection)
+    cache_result(result_cache_key(extractor, digest, page_cap), result)
+
+
+def extract_auto(pdf_bytes, digest, lazy=False):
+    """
+    Detect the document type of an upload and extract it with the matching extractor.
+    Returns (result, cache_hit); the result also reports document_type and detection_confidence.
+    """
+    detection = cached_result = None
+    if not profiling_requested():
+        with timed_stage('cache'):
+            detection, cached_result = cached_detection(digest, lazy)
+    if cached_result is not None:
+        return {**cached_result, **detection}, True
+    if detection is not None:
+        # Type already known - skip the classifier and take the normal path for that extractor
+        result, cache_hit = extract_result(detection['document_type'], pdf_bytes, digest,
+                                           lazy and detection['document_type'] in POLICY_EXTRACTORS)
+        return {**result, **detection}, cache_hit
+
+    detection, result = extract_detected(pdf_bytes, lazy)
+    cache_detected(digest, detection, result, lazy)
+    return {**result, **detection}, False
+
+
+def wants_ndjson():
+    """
+    Streaming is requested with ?stream=1 or by preferring application/x-ndjson in the Accept header
+    """
+    if request.args.get('stream') == '1':
+        return True
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+
+def dumps_json(value, sort_keys=False):
+    """
+    UTF-8 JSON bytes - through orjson when it is installed, several times faster on long transaction lists
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except TypeError:
+            pass  # something orjson cannot encode - let json report or handle it
+    return json.dumps(value, sort_keys=sort_keys, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def ndjson_record(record):
+    return dumps_json(record) + b"\n"
+
+
+TEXT_MODES = {'full': 'full', '1': 'full', 'preview': 'preview', 'none': 'none', '0': 'none'}
+
+
+def requested_text_mode():
+    """
+    How much document text to send back: ?include_text=full|preview|none (or 1/0), defaulting to RESPONSE_TEXT.
+    Routes read it before anything else, so an unknown value is refused before the upload is read or extracted.
+    """
+    value = request.args.get('include_text') or request.form.get('include_text') or app.config['RESPONSE_TEXT']
+    if value not in TEXT_MODES:
+        raise ValueError(f'Unknown include_text: {value} (expected full, preview or none)')
+    return TEXT_MODES[value]
+
+
+def shape_text(body, text_mode):
+    """
+    A copy of a result body without its document text, or with only the first TEXT_PREVIEW_CHARS of it
+    """
+    if text_mode == 'full' or 'text' not in body:
+        return body
+    body = dict(body)
+    text = body.pop('text')
+    if text_mode == 'preview':
+        limit = app.config['TEXT_PREVIEW_CHARS']
+        body['text'] = text[:limit]
+        body['text_truncated'] = len(text) > limit
+    return body
+
+
+def iter_sbi_text_pages(pdf_bytes):
+    """
+    Yield (page_num, text, transactions) one page at a time, reading each page's text with the line engine
+    """
+    for page_num, text in iter_page_texts(pdf_bytes):
+        transactions = []
+        if text:
+            with timed_stage('extract'):
+                transactions = list(iter_sbi_transactions(page_chunk(page_num, text)))
+        yield page_num, text, transactions
+
+
+def requested_export_format():
+    """
+    Export format for /extract-sbi: ?format=csv|jsonl|parquet|arrow (json for the normal result),
+    else the best match of the Accept header - None means the normal JSON result
+    """
+    value = request.args.get('format')
+    if value is not None:
+        if value != 'json' and value not in EXPORT_MIMETYPES:
+            raise ValueError(f"Unknown format: {value} (expected json, {', '.join(EXPORT_MIMETYPES)})")
+        return None if value == 'json' else value
+    best = request.accept_mimetypes.best_match(['application/json', *EXPORT_MIMETYPES.values()])
+    return next((name for name, mimetype in EXPORT_MIMETYPES.items() if mimetype == best), None)
+
+
+def iter_statement_rows(extractor, pdf_bytes):
+    """
+    Yield the transactions of a statement as row tuples (exports.TRANSACTION_COLUMNS) one page at a time -
+    the line engine's fields go straight into the rows, without a dict per transaction
+    """
+    reconciliation = Reconciliation()
+    if extractor == 'sbi_table':
+        for _, _, transactions in iter_sbi_table_pages(pdf_bytes, SbiTableReader()):
+            reconcile_transactions(transactions, reconciliation)
+            yield from map(transaction_row, transactions)
+        return
+    for page_num, text in iter_page_texts(pdf_bytes):
+        if not text:
             continue
-        
-        # Try different date patterns
-        date = None
-        for pattern in date_patterns:
-            date_match = re.search(pattern, line)
-            if date_match:
-                date = date_match.group(1)
-                break
-        
-        if not date:
+        with timed_stage('extract'):
+            rows = [fields + (page_num,) for _, fields in iter_sbi_transaction_fields(page_chunk(page_num, text))]
+        with timed_stage('reconcile'):
+            for row in reconciliation.check(StatementLedger.from_amounts(row[3:6] for row in rows)):
+                date, description, ref_no, debit, credit, balance, page = rows[row]
+                rows[row] = (date, description, ref_no, credit, debit, balance, page)
+        yield from rows
+
+
+def export_statement(extractor, pdf_bytes, digest, export_format):
+    """
+    Response with a statement's transactions as CSV or JSONL (streamed) or as a Parquet or Arrow file.
+    A cached result is exported as it is; otherwise the PDF is parsed page by page.
+    """
+    with timed_stage('cache'):
+        cached_result = result_cache.get(result_cache_key(extractor, digest))
+    if cached_result is not None:
+        rows = map(transaction_row, cached_result['transactions'])
+    else:
+        rows = iter_statement_rows(extractor, pdf_bytes)
+    mimetype = EXPORT_MIMETYPES[export_format]
+
+    if export_format in COLUMNAR_FORMATS:
+        if get_arrow() is None:
+            return jsonify({'success': False, 'error': f'{export_format} export needs pyarrow installed'})
+        rows = list(rows)
+        with timed_stage('serialize'):
+            body = columnar_export(rows, export_format)
+        return Response(body, mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename=transactions.{export_format}'})
+
+    chunks = csv_chunks(rows) if export_format == 'csv' else jsonl_chunks(rows, dumps_json)
+    return Response(stream_with_context(chunks), mimetype=mimetype)
+
+
+def stream_sbi_statement(pdf_bytes, cached_result=None, table=False):
+    """
+    Generate the NDJSON body for /extract-sbi - transaction records followed by one summary record.
+    Only the current page is held in memory; the raw text is not part of the stream.
+    table reads the statement in table mode (see SbiTableReader).
+    """
+    started = time.perf_counter()
+    transaction_count = 0
+    page_count = 0
+    text_length = 0
+    try:
+        if cached_result is not None:
+            for transaction in cached_result['transactions']:
+                transaction_count += 1
+                yield ndjson_record({'type': 'transaction', **transaction})
+            text_length = cached_result['text_length']
+            page_count = None
+            reconciliation_report = cached_result['reconciliation']
+        else:
+            # Pages are checked as they come - the balance carries over page breaks
+            reconciliation = Reconciliation()
+            pages = iter_sbi_table_pages(pdf_bytes, SbiTableReader()) if table else iter_sbi_text_pages(pdf_bytes)
+            for page_num, text, transactions in pages:
+                page_count = page_num
+                if not text:
+                    continue
+                text_length += len(page_chunk(page_num, text))
+                reconcile_transactions(transactions, reconciliation)
+                for transaction in transactions:
+                    transaction_count += 1
+                    yield ndjson_record({'type': 'transaction', 'page': page_num, **transaction})
+            reconciliation_report = reconciliation.report()
+
+        yield ndjson_record({
+            'type': 'summary',
+            'success': True,
+            'transaction_count': transaction_count,
+            'reconciliation': reconciliation_report,
+            'page_count': page_count,
+            'text_length': text_length,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+            'cache_hit': cached_result is not None,
+            'extraction_timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        note_error()
+        yield ndjson_record({'type': 'error', **error_body(e)[0]})
+
+
+def read_batch_uploads(files):
+    """
+    Collect (filename, pdf_bytes, digest, error) for every uploaded file - zip archives are expanded
+    """
+    uploads = []
+    max_files = app.config['BATCH_MAX_FILES']
+    max_file_bytes = app.config['BATCH_MAX_FILE_BYTES']
+    for file in files:
+        if not file or file.filename == '':
             continue
-        
-        # Find amounts using multiple patterns
-        amounts = []
-        for pattern in amount_patterns:
-            matches = re.findall(pattern, line)
-            amounts.extend(matches)
-        
-        # Remove duplicates and clean amounts
-        amounts = list(set(amounts))
-        amounts = [re.sub(r'[₹,\s]', '', amount) for amount in amounts if amount]
-        
-        # Find reference number using multiple patterns
-        ref_no = None
-        for pattern in ref_patterns:
-            ref_match = re.search(pattern, line, re.IGNORECASE)
-            if ref_match:
-                ref_no = ref_match.group(1) if ref_match.groups() else ref_match.group(0)
-                break
-            
-        # Extract description (everything except date, amounts, and ref)
-        description = line
-        
-        # Remove date from description
-        for pattern in date_patterns:
-            description = re.sub(pattern, '', description)
-        
-        # Remove reference from description
-        if ref_no:
-            description = description.replace(ref_no, '').strip()
-        
-        # Remove amounts from description
-        for amount in amounts:
-            description = description.replace(amount, '').strip()
-        
-        # Clean up description
-        description = re.sub(r'\s+', ' ', description).strip()
-        description = re.sub(r'[^\w\s.,-]', '', description).strip()  # Remove special chars except common ones
-        
-        # Determine debit/credit with enhanced logic
-        debit = None
-        credit = None
-        balance = None
-        
-        if amounts:
-            # Enhanced debit/credit detection
-            line_upper = line.upper()
-            
-            # Check for explicit indicators
-            if any(indicator in line_upper for indicator in ['DR', 'DEBIT', 'WITHDRAWAL', 'PAYMENT']):
-                debit = amounts[0] if amounts else None
-            elif any(indicator in line_upper for indicator in ['CR', 'CREDIT', 'DEPOSIT', 'RECEIPT']):
-                credit = amounts[0] if amounts else None
+        if file.filename.lower().endswith('.zip'):
+            try:
+                read_upload(file, track=False)  # timed and counted - the archive is read from its spooled file
+                file.stream.seek(0)
+                with zipfile.ZipFile(file.stream) as archive:
+                    for member in archive.infolist():
+                        if member.is_dir() or not member.filename.lower().endswith('.pdf'):
+                            continue
+                        if member.file_size > max_file_bytes:
+                            uploads.append((member.filename, None, None, 'File is too large'))
+                            continue
+                        member_bytes = archive.read(member)
+                        digest = content_digest(member_bytes)
+                        try:
+                            check_quarantine(digest)
+                        except DocumentQuarantined as e:
+                            uploads.append((member.filename, None, None, str(e)))
+                        else:
+                            uploads.append((member.filename, member_bytes, digest, None))
+            except zipfile.BadZipFile:
+                uploads.append((file.filename, None, None, 'Not a valid zip archive'))
+            except DocumentQuarantined as e:
+                uploads.append((file.filename, None, None, str(e)))
+        elif file.filename.lower().endswith('.pdf'):
+            # Batch files are pickled over to the pool processes, so they are read into memory
+            try:
+                data, digest = read_upload(file, track=False)
+            except DocumentQuarantined as e:
+                uploads.append((file.filename, None, None, str(e)))
             else:
-                # If multiple amounts, first is usually debit, second is credit
-                if len(amounts) >= 2:
-                    debit = amounts[0]
-                    credit = amounts[1]
+                if len(data) > max_file_bytes:
+                    uploads.append((file.filename, None, None, 'File is too large'))
                 else:
-                    # Single amount - try to determine from context
-                    if any(word in description.upper() for word in ['PAY', 'TRANSFER', 'WITHDRAW', 'DEBIT']):
-                        debit = amounts[0]
-                    elif any(word in description.upper() for word in ['RECEIVE', 'DEPOSIT', 'CREDIT', 'SALARY']):
-                        credit = amounts[0]
-                    else:
-                        # Default to debit if unclear
-                        debit = amounts[0]
-        
-        # Extract balance if available
-        balance_match = re.search(r'BAL[:\s]*([₹]?\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?)', line, re.IGNORECASE)
-        if balance_match:
-            balance = re.sub(r'[₹,\s]', '', balance_match.group(1))
-            
-        # Only add if we have meaningful data
-        if date and (debit or credit) and description and len(description) > 3:
-            transaction = {
-                "date": date,
-                "description": description,
-                "ref_no": ref_no,
-                "debit": debit,
-                "credit": credit,
-                "balance": balance
-            }
-            transactions.append(transaction)
-    
-    return transactions
+                    uploads.append((file.filename, bytes(data), digest, None))
+        else:
+            uploads.append((file.filename, None, None, 'Please upload a PDF file'))
+
+        if len(uploads) > max_files:
+            raise ValueError(f'Too many files in batch (max {max_files})')
+    return uploads
+
+
+def batch_record(index, filename, extractor, result=None, cache_hit=False, error=None, text_mode='full'):
+    if error is not None:
+        return {'type': 'result', 'index': index, 'filename': filename, 'extractor': extractor,
+                'success': False, 'error': error}
+    return {'type': 'result', 'index': index, 'filename': filename, 'extractor': extractor,
+            **shape_text(result, text_mode), 'cache_hit': cache_hit}
+
+
+def stream_batch(uploads, requested_extractor, text_mode='full', deadline=None):
+    """
+    Fan the files out over the batch pool and yield one NDJSON record per file as each one finishes.
+    Every file gets BATCH_FILE_TIMEOUT seconds of its own; one that overruns it is reported as timed out and
+    quarantined. Files still unfinished at deadline (a time.perf_counter() value) are reported as timed out too,
+    without quarantine - queued ones are cancelled, and running ones stop at the same deadline.
+    """
+    started = time.perf_counter()
+    succeeded = 0
+    pending = {}
+    pool = get_process_pool('batch', app.config['BATCH_WORKERS'])
+
+    def submit(function, *args):
+        wall_deadline = None if deadline is None else time.time() + deadline - time.perf_counter()
+        return pool.submit(run_before, wall_deadline, function, *args, budget=app.config['BATCH_FILE_TIMEOUT'])
+
+    def finished_record(future):
+        nonlocal succeeded
+        index, filename, extractor, digest = pending[future]
+        try:
+            result = future.result()
+        except DeadlineExceeded as e:
+            if isinstance(e, TaskBudgetExceeded):
+                quarantine.add(digest)
+            return {**batch_record(index, filename, extractor, error=str(e)), 'timed_out': True}
+        except Exception as e:
+            return batch_record(index, filename, extractor, error=str(e))
+        if extractor == 'auto':
+            detection, result = result
+            cache_detected(digest, detection, result)
+            extractor = detection['document_type']
+            result = {**result, **detection}
+        else:
+            cache_result(result_cache_key(extractor, digest), result)
+        succeeded += 1
+        return batch_record(index, filename, extractor, result, text_mode=text_mode)
+
+    for index, (filename, pdf_bytes, digest, error) in enumerate(uploads):
+        extractor = requested_extractor
+        if error is not None:
+            yield ndjson_record(batch_record(index, filename, extractor, error=error))
+            continue
+
+        # Cache hits are answered straight away; misses go to the pool
+        if extractor == 'auto':
+            detection, cached_result = cached_detection(digest)
+            if cached_result is not None:
+                extractor = detection['document_type']
+                cached_result = {**cached_result, **detection}
+        else:
+            cached_result = result_cache.get(result_cache_key(extractor, digest))
+        if cached_result is not None:
+            succeeded += 1
+            yield ndjson_record(batch_record(index, filename, extractor, cached_result, cache_hit=True,
+                                             text_mode=text_mode))
+            continue
+
+        if extractor == 'auto':
+            future = submit(extract_detected, pdf_bytes)
+        else:
+            future = submit(extract_uncached, extractor, pdf_bytes, False)
+        pending[future] = (index, filename, extractor, digest)
+
+    reported = set()
+    try:
+        for future in as_completed(pending, None if deadline is None else max(0.0, deadline - time.perf_counter())):
+            reported.add(future)
+            yield ndjson_record(finished_record(future))
+    except TimeoutError:
+        for future, (index, filename, extractor, _) in pending.items():
+            if future in reported:
+                continue
+            if future.done():
+                # Finished as the deadline hit - its result still counts
+                yield ndjson_record(finished_record(future))
+                continue
+            future.cancel()
+            yield ndjson_record({**batch_record(index, filename, extractor, error='Batch ran past its deadline'),
+                                 'timed_out': True})
+
+    yield ndjson_record({
+        'type': 'summary',
+        'success': True,
+        'file_count': len(uploads),
+        'succeeded': succeeded,
+        'failed': len(uploads) - succeeded,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+        'extraction_timestamp': datetime.now().isoformat()
+    })
+
+
+_job_store = None
+_jobs_recovered = False
+_job_lock = threading.Lock()
+
+
+def get_job_store():
+    global _job_store
+    with _job_lock:
+        if _job_store is None:
+            _job_store = JobStore(app.config['JOBS_DIR'])
+        return _job_store
+
+
+def run_extraction_job(job_id):
+    """
+    Process one queued job inside a job pool process, recording page progress as it goes
+    """
+    store = get_job_store()
+    job = store.claim(job_id)
+    if job is None:
+        return None
+
+    try:
+        with open(job['pdf_path'], 'rb') as spool:
+            pdf_bytes = spool.read()
+        digest = content_digest(pdf_bytes)
+
+        def progress(pages_done, pages_total):
+            store.update_progress(job_id, pages_done, pages_total)
+
+        if job['extractor'] == 'auto':
+            detection, result = extract_detected(pdf_bytes, progress=progress)
+            store.finish(job_id, {**result, **detection})
+            return [(detection_cache_key(digest), detection),
+                    (result_cache_key(detection['document_type'], digest), result)]
+
+        result = extract_uncached(job['extractor'], pdf_bytes, allow_parallel=False, progress=progress)
+        store.finish(job_id, result)
+        return [(result_cache_key(job['extractor'], digest), result)]
+
+    except Exception as e:
+        store.fail(job_id, str(e))
+        return None
+
+
+def cache_job_result(job_id, future):
+    """
+    Pool callback in the HTTP worker - finished job results also warm this worker's result cache.
+    A job whose pool process died (run_extraction_job records its own errors) is marked failed.
+    """
+    try:
+        outcome = future.result()
+    except Exception as e:
+        app.logger.exception('Extraction job %s crashed', job_id)
+        store = get_job_store()
+        job = store.get(job_id)
+        if job is not None and job['status'] != JOB_DONE:
+            store.fail(job_id, f'Extraction job crashed: {e}')
+        return
+    for cache_key, value in outcome or ():
+        cache_result(cache_key, value)
+
+
+def submit_job(job_id):
+    future = get_process_pool('jobs', app.config['JOB_WORKERS']).submit(run_extraction_job, job_id)
+    future.add_done_callback(functools.partial(cache_job_result, job_id))
+
+
+def recover_jobs():
+    """
+    Once per process: requeue jobs left behind by a restarted worker
+    """
+    global _jobs_recovered
+    with _job_lock:
+        if _jobs_recovered:
+            return
+        _jobs_recovered = True
+    store = get_job_store()
+    store.purge(app.config['JOB_RETENTION_SECONDS'])
+    for job_id in store.recover():
+        submit_job(job_id)
+
+
+def job_status(job, text_mode='full'):
+    """
+    Public view of a job record - text_mode shapes the document text of its result (see shape_text)
+    """
+    status = {
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'extractor': job['extractor'],
+        'filename': job['filename'],
+        'pages_done': job['pages_done'],
+        'pages_total': job['pages_total'],
+        'created_at': datetime.fromtimestamp(job['created_at']).isoformat(),
+        'updated_at': datetime.fromtimestamp(job['updated_at']).isoformat()
+    }
+    if job['status'] == JOB_DONE:
+        status['result'] = shape_text(json.loads(job['result']), text_mode)
+    elif job['status'] == JOB_FAILED:
+        status['error'] = job['error']
+    return status
+
+
+def read_upload(file, track=True):
+    """
+    (data, digest) of an upload: its bytes - for a spooled upload, a read-only mmap of its file (see uploads.py) -
+    and their SHA-256 hex digest, which keys both the quarantine and the result cache.
+    Raises DocumentQuarantined for a document that recently ran past its deadline. track records it as the
+    document this request is working on (see quarantine_upload) - not for the files of a batch.
+    """
+    with timed_stage('upload'):
+        data = map_upload(file.stream)
+        digest = content_digest(data)
+    if has_request_context() and 'stage_timings' in g:
+        UPLOAD_BYTES.inc(metric_route(), amount=len(data))
+        if track:
+            uploads_in_progress[threading.get_ident()] = digest
+    check_quarantine(digest)
+    return data, digest
+
+
+def check_quarantine(digest):
+    """
+    Raise DocumentQuarantined if the document with this content hash recently ran past its deadline
+    """
+    remaining = quarantine.remaining(digest)
+    if remaining is not None:
+        raise DocumentQuarantined(f'This document recently took too long to process and is refused for '
+                                  f'another {remaining:.0f}s')
+
+
+def quarantine_upload(thread_id=None):
+    """
+    Quarantine the upload the current request - or the given thread - is working on
+    """
+    digest = uploads_in_progress.get(threading.get_ident() if thread_id is None else thread_id)
+    if digest is not None:
+        quarantine.add(digest)
+
+
+def error_body(e):
+    """
+    (body, status) for a request that failed with e. A request stopped at its deadline answers 504 and
+    quarantines its document; a quarantined document is refused with 422.
+    """
+    if isinstance(e, DeadlineExceeded):
+        quarantine_upload()
+        return {'success': False, 'error': str(e), 'timed_out': True}, 504
+    if isinstance(e, DocumentQuarantined):
+        return {'success': False, 'error': str(e), 'quarantined': True}, 422
+    return {'success': False, 'error': str(e)}, 200
+
+
+def error_response(e):
+    body, status = error_body(e)
+    return jsonify(body), status
+
+
+def json_response(body, text_mode):
+    body = shape_text(body, text_mode)
+    if request.args.get('profile') == '1' and 'regex_profile' in g:
+        body = {**body, 'regex_profile': g.regex_profile.rows()}
+    with timed_stage('serialize'):
+        return Response(dumps_json(body, sort_keys=True), mimetype='application/json')
+
+
+def metric_route():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def is_error_response(response):
+    """
+    Error bodies are the small {'success': False, 'error': ...} dicts, so only small JSON bodies are parsed
+    """
+    if response.status_code >= 400:
+        return True
+    if (response.is_streamed or not response.is_json or 'Content-Encoding' in response.headers
+            or (response.content_length or 0) > 2048):
+        return False
+    body = response.get_json(silent=True)
+    return isinstance(body, dict) and body.get('success') is False
+
+
+@app.before_request
+def start_request_timing():
+    if request.endpoint in ('static', 'prometheus_metrics'):
+        return
+    g.request_started = time.perf_counter()
+    g.stage_timings = {}
+    g.pages_processed = 0
+    g.request_error = False
+    g.memory_started = g.memory_peak = current_rss()
+    g.deadline = g.request_started + route_timeout(request.path)
+
+
+@app.teardown_request
+def forget_upload(exception=None):
+    uploads_in_progress.pop(threading.get_ident(), None)
+
+
+@app.after_request
+def finish_request_timing(response):
+    """
+    Send the stages timed so far as Server-Timing and record the request's metrics once its body is done
+    """
+    if 'stage_timings' not in g:
+        return response
+    timings = g.stage_timings
+    started = g.request_started
+    route = metric_route()
+    if is_error_response(response):
+        g.request_error = True
+
+    elapsed = time.perf_counter() - started
+    response.headers['Server-Timing'] = ', '.join(
+        [f'{stage};dur={seconds * 1000:.2f}' for stage, seconds in timings.items()] + [f'total;dur={elapsed * 1000:.2f}'])
+    if g.memory_started is not None and not response.is_streamed:
+        g.memory_peak = max(g.memory_peak, current_rss())
+        response.headers['X-Memory-Peak'] = str(g.memory_peak - g.memory_started)
+
+    # Streamed bodies keep running after this hook - observe when the response is closed
+    request_state = g._get_current_object()
+
+    def observe():
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route)
+        for stage, seconds in timings.items():
+            STAGE_SECONDS.observe(seconds, route, stage)
+        if request_state.pages_processed:
+            PAGES_PROCESSED.inc(route, amount=request_state.pages_processed)
+        if request_state.request_error:
+            REQUEST_ERRORS.inc(route)
+        if request_state.memory_started is not None:
+            REQUEST_MEMORY.observe(request_state.memory_peak - request_state.memory_started, route)
+
+    if response.is_streamed:
+        response.call_on_close(observe)
+    else:
+        observe()
+    return response
+
+
+@app.after_request
+def compress_response(response):
+    """
+    gzip or brotli JSON, NDJSON and text bodies for clients that accept it - runs before finish_request_timing,
+    so compression shows up in Server-Timing
+    """
+    if (response.direct_passthrough or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_chunks(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_BYTES']:
+            return response
+        with timed_stage('compress'):
+            response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
 
 
 @app.route('/')
@@ -1287,6 +3340,7 @@ def index():
 @app.route('/extract-sbi', methods=['POST'])
 def extract_sbi_statement():
     try:
+        text_mode = requested_text_mode()
         if 'pdf' not in request.files:
             return jsonify({'success': False, 'error': 'No file uploaded'})
 
@@ -1296,33 +3350,33 @@ def extract_sbi_statement():
         if not file.filename.lower().endswith('.pdf'):
             return jsonify({'success': False, 'error': 'Please upload a PDF file'})
 
-        # Extract text from PDF
-        all_text = ""
-        with pdfplumber.open(file) as pdf:
-            for page_num, page in enumerate(pdf.pages, start=1):
-                text = page.extract_text() or ""
-                if text:
-                    all_text += f"=== PAGE {page_num} ===\n{text}\n\n"
+        pdf_bytes, digest = read_upload(file)
+        extractor = 'sbi_table' if wants_table_layout() else 'sbi_statement'
 
-        # Extract SBI bank statement transactions
-        transactions = extract_sbi_bank_statement(all_text)
+        # Flat exports of the transactions - CSV, JSONL, Parquet or Arrow
+        export_format = requested_export_format()
+        if export_format is not None:
+            return export_statement(extractor, pdf_bytes, digest, export_format)
 
-        return jsonify({
-            'success': True,
-            'text': all_text.strip(),
-            'transactions': transactions,
-            'transaction_count': len(transactions),
-            'text_length': len(all_text),
-            'extraction_timestamp': datetime.now().isoformat()
-        })
+        # Streaming mode: one NDJSON record per transaction as soon as its page is parsed
+        if wants_ndjson():
+            with timed_stage('cache'):
+                cached_result = result_cache.get(result_cache_key(extractor, digest))
+            return Response(stream_with_context(stream_sbi_statement(pdf_bytes, cached_result,
+                                                                     extractor == 'sbi_table')),
+                            mimetype='application/x-ndjson')
+
+        result, cache_hit = extract_result(extractor, pdf_bytes, digest)
+        return json_response({**result, 'cache_hit': cache_hit}, text_mode)
 
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return error_response(e)
 
 
 @app.route('/extract', methods=['POST'])
 def extract_text():
     try:
+        text_mode = requested_text_mode()
         if 'pdf' not in request.files:
             return jsonify({'success': False, 'error': 'No file uploaded'})
 
@@ -1332,37 +3386,42 @@ def extract_text():
         if not file.filename.lower().endswith('.pdf'):
             return jsonify({'success': False, 'error': 'Please upload a PDF file'})
 
-        # Extract text from PDF
-        all_text = ""
-        with pdfplumber.open(file) as pdf:
-            for page_num, page in enumerate(pdf.pages, start=1):
-                text = page.extract_text() or ""
-                if text:
-                    all_text += f"=== PAGE {page_num} ===\n{text}\n\n"
+        pdf_bytes, digest = read_upload(file)
+        result, cache_hit = extract_result('universal', pdf_bytes, digest, wants_lazy_pages())
+        return json_response({**result, 'cache_hit': cache_hit}, text_mode)
 
-        # Extract structured data using regex patterns
-        extracted_values = extract_values_from_text_universal(all_text)
+    except Exception as e:
+        return error_response(e)
 
-        # Count filled fields
-        filled_fields = sum(1 for v in extracted_values.values() if v and str(v).strip())
 
-        return jsonify({
-            'success': True,
-            'text': all_text.strip(),
-            'extracted_json': extracted_values,
-            'text_length': len(all_text),
-            'filled_fields': filled_fields,
-            'total_fields': len(extracted_values),
-            'extraction_timestamp': datetime.now().isoformat()
-        })
+@app.route('/extract-kotak', methods=['POST'])
+def extract_kotak():
+    try:
+        text_mode = requested_text_mode()
+        if 'pdf' not in request.files:
+            return jsonify({'success': False, 'error': 'No file uploaded'})
+
+        file = request.files['pdf']
+        if not file or file.filename == '':
+            return jsonify({'success': False, 'error': 'No file selected'})
+        if not file.filename.lower().endswith('.pdf'):
+            return jsonify({'success': False, 'error': 'Please upload a PDF file'})
+
+        pdf_bytes, digest = read_upload(file)
+        result, cache_hit = extract_result('kotak', pdf_bytes, digest, wants_lazy_pages())
+        return json_response({**result, 'cache_hit': cache_hit}, text_mode)
 
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return error_response(e)
 
 
-@app.route('/extract-kotak', methods=['POST'])
-def extract_kotak():
+@app.route('/extract-auto', methods=['POST'])
+def extract_auto_detected():
+    """
+    Detect what kind of document was uploaded from its first page and run the matching extractor
+    """
     try:
+        text_mode = requested_text_mode()
         if 'pdf' not in request.files:
             return jsonify({'success': False, 'error': 'No file uploaded'})
 
@@ -1372,32 +3431,140 @@ def extract_kotak():
         if not file.filename.lower().endswith('.pdf'):
             return jsonify({'success': False, 'error': 'Please upload a PDF file'})
 
-        # Extract text from PDF
-        all_text = ""
-        with pdfplumber.open(file) as pdf:
-            for page_num, page in enumerate(pdf.pages, start=1):
-                text = page.extract_text() or ""
-                if text:
-                    all_text += f"=== PAGE {page_num} ===\n{text}\n\n"
+        pdf_bytes, digest = read_upload(file)
+        result, cache_hit = extract_auto(pdf_bytes, digest, wants_lazy_pages())
+        return json_response({**result, 'cache_hit': cache_hit}, text_mode)
 
-        # Extract Kotak insurance data using regex patterns
-        extracted_values = extract_kotak_insurance(all_text)
+    except Exception as e:
+        return error_response(e)
 
-        # Count filled fields
-        filled_fields = sum(1 for v in extracted_values.values() if v and str(v).strip())
 
-        return jsonify({
-            'success': True,
-            'text': all_text.strip(),
-            'extracted_json': extracted_values,
-            'text_length': len(all_text),
-            'filled_fields': filled_fields,
-            'total_fields': len(extracted_values),
-            'extraction_timestamp': datetime.now().isoformat()
-        })
+@app.route('/extract-batch', methods=['POST'])
+def extract_batch():
+    """
+    Many PDFs in one request - as multipart 'pdfs' files or a zip archive.
+    Per-file results stream back as NDJSON in completion order; one bad file does not fail the batch.
+    """
+    try:
+        text_mode = requested_text_mode()
+        files = request.files.getlist('pdfs') + request.files.getlist('pdf')
+        if not files:
+            return jsonify({'success': False, 'error': 'No file uploaded'})
+
+        extractor = request.form.get('extractor') or request.args.get('extractor') or 'auto'
+        if extractor != 'auto' and extractor not in EXTRACTOR_VERSIONS:
+            return jsonify({'success': False, 'error': f'Unknown extractor: {extractor}'})
+
+        uploads = read_batch_uploads(files)
+        if not uploads:
+            return jsonify({'success': False, 'error': 'No PDF files found'})
+
+        return Response(stream_batch(uploads, extractor, text_mode, request_deadline()),
+                        mimetype='application/x-ndjson')
+
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_extraction_job():
+    """
+    Accept an upload and return a job id straight away - parsing happens in the job pool
+    """
+    try:
+        text_mode = requested_text_mode()
+        if 'pdf' not in request.files:
+            return jsonify({'success': False, 'error': 'No file uploaded'})
+
+        file = request.files['pdf']
+        if not file or file.filename == '':
+            return jsonify({'success': False, 'error': 'No file selected'})
+        if not file.filename.lower().endswith('.pdf'):
+            return jsonify({'success': False, 'error': 'Please upload a PDF file'})
+
+        extractor = request.form.get('extractor') or request.args.get('extractor') or 'auto'
+        if extractor != 'auto' and extractor not in EXTRACTOR_VERSIONS:
+            return jsonify({'success': False, 'error': f'Unknown extractor: {extractor}'})
+
+        recover_jobs()
+        store = get_job_store()
+        pdf_bytes, digest = read_upload(file)
+
+        # Already extracted -> the job is born finished
+        if extractor == 'auto':
+            detection, cached_result = cached_detection(digest)
+            if cached_result is not None:
+                extractor = detection['document_type']
+                cached_result = {**cached_result, **detection}
+        else:
+            cached_result = result_cache.get(result_cache_key(extractor, digest))
+        if cached_result is not None:
+            job_id = store.create(extractor, file.filename, result=cached_result)
+        else:
+            job_id = store.create(extractor, file.filename, pdf_bytes=pdf_bytes)
+            submit_job(job_id)
+
+        return jsonify(job_status(store.get(job_id), text_mode)), 202
 
     except Exception as e:
+        return error_response(e)
+
+
+@app.route('/jobs/<job_id>')
+def get_extraction_job(job_id):
+    recover_jobs()
+    job = get_job_store().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    try:
+        text_mode = requested_text_mode()
+    except ValueError as e:
         return jsonify({'success': False, 'error': str(e)})
+    return jsonify(job_status(job, text_mode))
+
+
+@app.route('/regex-profile', methods=['GET', 'DELETE'])
+def regex_profile_report():
+    """
+    Aggregated regex profile, most expensive pattern first - ?format=csv downloads it, DELETE starts over
+    """
+    if request.method == 'DELETE':
+        regex_profiles.reset()
+        return jsonify({'success': True})
+    if request.args.get('format') == 'csv':
+        return Response(regex_profiles.csv(), mimetype='text/csv',
+                        headers={'Content-Disposition': 'attachment; filename=regex-profile.csv'})
+    return jsonify({'success': True, **regex_profiles.report()})
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/cache-stats')
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+
+def route_timeout(path):
+    return app.config['ROUTE_TIMEOUTS'].get(path, app.config['REQUEST_TIMEOUT'])
+
+
+def warm_up():
+    """
+    Run the bundled sample PDF (a policy schedule, a Kotak schedule, and a statement as text and as a table)
+    through every extractor, bypassing the result cache, so pdfminer's fonts and encodings and the extractors'
+    lookup tables are loaded before the first request. Returns seconds taken per extractor.
+    """
+    with open(app.config['WARMUP_PDF'], 'rb') as f:
+        pdf_bytes = f.read()
+    timings = {}
+    for extractor in EXTRACTOR_VERSIONS:
+        started = time.perf_counter()
+        extract_uncached(extractor, pdf_bytes, allow_parallel=False)
+        timings[extractor] = time.perf_counter() - started
+    return timings
 
 
 if __name__ == '__main__':
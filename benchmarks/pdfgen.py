@@ -0,0 +1,371 @@
+"""
+Deterministic synthetic PDFs for the benchmarks - no network, no fixtures on disk.
+Every document is generated from a seed, so two runs time exactly the same bytes.
+"""
+import random
+
+# One WinAnsi slot is remapped to the rupee sign the Kotak and Reliance patterns look for
+RUPEE_CODE = 0x80
+LINES_PER_PAGE = 60
+
+FIRST_NAMES = ("RAHUL", "AMIT", "SUNITA", "PRIYA", "RAVI", "NEHA", "ARJUN", "KAVITA", "VIKRAM", "ANITA")
+LAST_NAMES = ("SHARMA", "SINGH", "PATIL", "KUMAR", "DESAI", "NAIR", "GUPTA", "JOSHI", "REDDY", "MEHTA")
+CITIES = ("PUNE", "MUMBAI", "JAIPUR", "NAGPUR", "NASHIK", "THANE", "INDORE", "SURAT")
+VEHICLES = (("HONDA", "ACTIVA 125 DLX"), ("BAJAJ", "DISCOVER 125"), ("MARUTI", "SWIFT VXI"),
+            ("RENAULT", "KWID RXE"), ("HERO", "SPLENDOR PLUS"), ("TVS", "JUPITER ZX"))
+NARRATIONS = ("BY TRANSFER-NEFT SALARY", "TO TRANSFER-UPI/DR/{ref}/SWIGGY", "ATM WDL CASH WITHDRAWAL",
+              "CHQ NO {ref} PAYMENT TO RENT", "UPI/CR/{ref}/RECEIVE", "RTGS {ref} DEPOSIT FROM CLIENT",
+              "ELECTRICITY BILL", "INTEREST CREDIT", "DEBIT CARD POS {ref} GROCERY", "IMPS/P2A/{ref}/TRANSFER")
+
+# Columns of the tabular statement: header, x and alignment - amounts are right-aligned under their headers
+STATEMENT_COLUMNS = (("Txn Date", 30, 'left'), ("Value Date", 85, 'left'), ("Description", 140, 'left'),
+                     ("Ref No./Cheque No.", 290, 'left'), ("Debit", 440, 'right'), ("Credit", 500, 'right'),
+                     ("Balance", 565, 'right'))
+DESCRIPTION_WIDTH = 26
+# Helvetica advance widths (1/1000 em) of the characters amounts are made of - others are taken as 600
+HELVETICA_WIDTHS = {**dict.fromkeys('0123456789', 556), ',': 278, '.': 278, '-': 333, ' ': 278}
+
+
+def escape_pdf_text(line):
+    line = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return line.encode('latin-1', 'replace')
+
+
+def encode_line(line):
+    """
+    Latin-1 bytes for a PDF string, with the rupee sign mapped to RUPEE_CODE
+    """
+    parts = [escape_pdf_text(part) for part in line.split('₹')]
+    return bytes([RUPEE_CODE]).join(parts)
+
+
+def text_width(text, size):
+    return sum(HELVETICA_WIDTHS.get(char, 600) for char in text) * size / 1000
+
+
+def page_ops(lines):
+    """
+    Content stream of one page. Lines are flowed down from the top left; a page with table rows - tuples of
+    (x, text, align) cells - places every cell at its own x instead, right-aligned cells ending at x.
+    """
+    if all(isinstance(line, str) for line in lines):
+        ops = [b"BT /F1 9 Tf 40 800 Td 11 TL"]
+        ops.extend(b"(" + encode_line(line) + b") Tj T*" for line in lines)
+        ops.append(b"ET")
+        return ops
+
+    ops = [b"BT /F1 9 Tf"]
+    for row, line in enumerate(lines):
+        y = 800 - 11 * row
+        for x, text, align in ([(40, line, 'left')] if isinstance(line, str) else line):
+            if align == 'right':
+                x -= text_width(text, 9)
+            ops.append(b"1 0 0 1 %.2f %d Tm (" % (x, y) + encode_line(text) + b") Tj")
+    ops.append(b"ET")
+    return ops
+
+
+def make_pdf(pages):
+    """
+    Minimal PDF writer: one Helvetica text block per page, one line of text (or one table row) per entry of each page
+    """
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding << /Type /Encoding "
+               b"/BaseEncoding /WinAnsiEncoding /Differences [%d /uni20B9] >> >>" % RUPEE_CODE)
+    pages_id = len(objects) + 1 + 2 * len(pages)
+    kids = []
+    for lines in pages:
+        stream = b"\n".join(page_ops(lines))
+        contents = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+                        b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font, contents)))
+    add(b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % kid for kid in kids) + b"] /Count %d >>" % len(kids))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+def person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def date(rng, year=2023):
+    return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{year}"
+
+
+def terms_pages(rng, count):
+    """
+    Terms and conditions filler - the pages policy extractors should not need
+    """
+    pages = []
+    for page in range(count):
+        pages.append([f"{page + 1}.{clause} The insured shall take all reasonable steps to safeguard the vehicle "
+                      f"from loss or damage and maintain it in efficient condition {rng.randint(100, 999)}"
+                      for clause in range(1, LINES_PER_PAGE + 1)])
+    return pages
+
+
+def shriram_policy(rng, page_count):
+    make, model = rng.choice(VEHICLES)
+    schedule = [
+        "SHRIRAM GENERAL INSURANCE COMPANY LIMITED",
+        f"Policy No. 10003/31/24/{rng.randint(100000, 999999)}",
+        f"IN-27 / {person(rng)} GSTIN",
+        f"Insured Address and Contact Details {rng.randint(1, 99)} SHIVAJI NAGAR, {rng.choice(CITIES)}, "
+        f"{rng.randint(400000, 499999)} ,Mobile 98{rng.randint(10000000, 99999999)}",
+        f"Registration number : MH-{rng.randint(10, 50)}-AB-{rng.randint(1000, 9999)}",
+        f"Engine & Chassis Number : {rng.randint(10 ** 9, 10 ** 10 - 1)} & {rng.randint(10 ** 16, 10 ** 17 - 1)}",
+        f"{make} - {model}",
+        "SCOOTY / PETROL",
+        f"{rng.choice((110, 125, 150))} / 0 / {rng.randint(2015, 2023)}",
+        f"DATE OF REGN. / DATE OF PURCHASE : {date(rng, 2019)}",
+        f"From 00:00 Hrs of {date(rng, 2023)} to Midnight Of {date(rng, 2024)}",
+        f"PREMIUM AMOUNT {rng.randint(800, 9000)}",
+        f"GST {rng.randint(100, 999)}.{rng.randint(10, 99)}",
+        f"TOTAL TP PREMIUM 1,{rng.randint(100, 999)}.00",
+        f"Total IDV {rng.randint(20000, 90000)}",
+        "Seating capacity including driver : 2",
+        "Intermediary Name : ABC BROKERS & CO",
+        f"Intermediary Code & Contact No : {rng.randint(10000, 99999)} & 98765",
+        "Previous Insurer ICICI Lombard General Insurance Company",
+        f"Previous Policy No. {rng.randint(10 ** 7, 10 ** 8 - 1)}",
+        f"Nominee for Owner/Driver {person(rng)} Nominee Age {rng.randint(18, 70)} Nominee Relationship Wife Appointee",
+    ]
+    return [schedule] + terms_pages(rng, page_count - 1)
+
+
+def reliance_policy(rng, page_count):
+    make, model = rng.choice(VEHICLES)
+    schedule = [
+        "RELIANCE GENERAL INSURANCE COMPANY LIMITED",
+        "Private Car Package Policy - Certificate of Insurance cum Policy Schedule",
+        f"Policy / Certificate No : {rng.randint(10 ** 9, 10 ** 10 - 1)}",
+        f"Insured Name : {person(rng)} Communication",
+        f"Address : {rng.randint(1, 99)} LINK ROAD, ANDHERI, Mumbai, Maharashtra - {rng.randint(400000, 400099)}, India Contact",
+        f"Registration No.: MH{rng.randint(10, 50)}AB{rng.randint(1000, 9999)}",
+        f"Engine No./Chassis No.: ENG{rng.randint(100000, 999999)}",
+        f"Chassis No.: CHS{rng.randint(100000, 999999)}",
+        f"Make / Model : {make} / {model}",
+        "fuel type : PETROL",
+        f"Cubic Capacity : {rng.choice((799, 999, 1197, 1498))}",
+        f"Manufacturing Year : {rng.randint(2015, 2023)}",
+        f"Period of Insurance OD : From : {date(rng, 2023)} to",
+        f"Policy Issue Date : {date(rng, 2023)}",
+        f"Total Premium (₹) : {rng.randint(2000, 20000)}",
+        f"Total IDV : {rng.randint(200000, 900000)}.00",
+    ]
+    return [schedule] + terms_pages(rng, page_count - 1)
+
+
+def sbi_policy(rng, page_count):
+    make, model = rng.choice(VEHICLES)
+    name = person(rng)
+    schedule = [
+        "SBI GENERAL INSURANCE",
+        f"Dear Mr. {name}, ",
+        f"Policy / Certificate No : POL{rng.randint(1000000, 9999999)}",
+        f"Name of Insured : {name} Address",
+        f"Address : FLAT {rng.randint(1, 99)}, ANDHERI, Mumbai, Maharashtra - 400053, India Contact",
+        f"Registration No.: MH{rng.randint(10, 50)}AB{rng.randint(1000, 9999)}",
+        f"Engine No./Chassis No.: ENG{rng.randint(100, 999)}",
+        f"Chassis No.: CHS{rng.randint(100, 999)}",
+        f"Make / Model : {make} / {model}",
+        "fuel type : PETROL",
+        f"Cubic Capacity : {rng.choice((799, 999, 1197, 1498))}",
+        f"Manufacturing Year : {rng.randint(2015, 2023)}",
+        f"Period of Insurance OD : From : {date(rng, 2023)} to",
+        f"Policy Issue Date : {date(rng, 2023)}",
+        f"From: {date(rng, 2023)} 00:00:00 To: {date(rng, 2024)} 23:59:59",
+        f"FINAL PREMIUM : {rng.randint(2000, 20000)}",
+        f"Total IDV : {rng.randint(200000, 900000)}.00",
+        f"Contact No : 91{rng.randint(10000000, 99999999)}",
+        "Email Id : customer@example.com",
+        "GSTIN : 27ABCDE1234F1Z5",
+    ]
+    return [schedule] + terms_pages(rng, page_count - 1)
+
+
+def kotak_policy(rng, page_count):
+    make, model = rng.choice(VEHICLES)
+    idv = f"{rng.randint(10, 99)},{rng.randint(100, 999)}"
+    schedule = [
+        "Zurich Kotak General Insurance Company (India) Limited",
+        "Long Term Two Wheeler Secure Comprehensive Policy",
+        "Certificate cum Policy Schedule",
+        f"Policy / Certificate No. : {rng.randint(10 ** 10, 10 ** 11 - 1)}",
+        f"Name : Mr. {person(rng)} Address : {rng.randint(1, 99)} MG ROAD, {rng.choice(CITIES)} District {rng.choice(CITIES)}",
+        "Place of Supply : RAJASTHAN From",
+        "Supply State Code : 08",
+        f"Phone : 0141{rng.randint(1000000, 9999999)} Mobile : 98{rng.randint(10000000, 99999999)} Email : CUSTOMER@GMAIL.COM",
+        "Policy Issuing Office : Jaipur Branch, C-Scheme Period",
+        f"Period of Insurance : From: {date(rng, 2023)} 00:00 to: {date(rng, 2028)}Midnight",
+        f"Policy issued on : {date(rng, 2023)}",
+        f"Cover Note No : CN{rng.randint(10000, 99999)}",
+        "Hypothecated to : HDFC BANK Mobile",
+        "Type of Vehicle : Two Wheeler Code",
+        f"Registration no. : RJ14AB{rng.randint(1000, 9999)}",
+        f"Make : {make}",
+        f"Model : {model.split()[0]}",
+        f"Variant : {rng.choice(('125 DRUM', 'DISC', 'STD'))}",
+        f"CC : {rng.choice((110, 125, 150))}",
+        f"Manufacturing Year : {rng.randint(2015, 2023)}",
+        f"RTO Location : {rng.choice(CITIES)}",
+        f"Engine Number : ENG{rng.randint(10 ** 11, 10 ** 12 - 1)}",
+        f"Chassis No. : CH{rng.randint(10 ** 9, 10 ** 10 - 1)}",
+        "Seating Capacity : 2",
+        "Seating Capacity of side car (if any) : NIL",
+        f"IDV of the Vehicle (in ₹) : {idv}",
+        "IDV of Side Car (in ₹) : 0",
+        "Additional Accessories (in ₹) : 0",
+        "Non-Electrical Accessories fitted to the Vehicle (in ₹) : 0",
+        "Electrical & Electronic Accessories fitted to the Vehicle (in ₹) : 0",
+        "CNG / LPG Kit (in ₹) : 0",
+        f"Total Value of the Vehicle (in ₹) : {idv}",
+        f"Basic Own Damage : {rng.randint(300, 900)}.{rng.randint(10, 99)}",
+        "Less: No Claim Bonus Percent 25% : 150.07",
+        "Total Own Damage Premium (A) : 450.19",
+        "Basic TP Including TPPD Premium : 714.00",
+        "PA Cover for Owner Driver of ₹ 15,00,000 : 330.00",
+        "Total Liability Premium (B) : 1,044.00",
+        "Taxable value of Services (A+B) : 1,494.19",
+        "CGST @ 9% : 134.48",
+        "SGST @ 9% : 134.48",
+        f"Total Premium (in ₹) : 1,{rng.randint(100, 999)}.00",
+        "Geographical Area : INDIA",
+        "Compulsory Deductibles ₹ : 100",
+        "Additional Excess ₹ : 0",
+        "Voluntary Deductible ₹ : 0",
+        "Total Deductible ₹ : 100",
+        f"Intermediary Code : {rng.randint(1000000, 9999999)}",
+        "Intermediary Name : DUMMY FOR TESTING / ATISH SONAWANE",
+        "Intermediary's Mobile No. : 9999999999",
+        "Intermediary's Landline No. : 0222222222",
+        f"*Nominee Name : {person(rng)}",
+        f"*Nominee Age : {rng.randint(18, 70)}",
+        "*Relationship : Brother",
+        "*Name of Appointee (if nominee is a minor) : NA",
+        "Relationship to the : NA",
+    ]
+    footer = [
+        "CIN: U66000MH2014PLC260291 IRDAI Reg. No. 152",
+        "Registered & Corporate Office: 27 BKC, Bandra Kurla Complex, Mumbai Toll Free: 1800 266 4545",
+        "Email: care@kotak.com Website: www.kotakgeneral.com UIN: IRDAN152RP0008V04201617",
+        "For any assistance please call 1800 266 4545",
+    ]
+    if page_count == 1:
+        return [schedule + footer]
+    pages = [schedule[:32], schedule[32:]] + terms_pages(rng, page_count - 2)
+    pages[-1] = pages[-1] + footer
+    return pages
+
+
+def amount(value):
+    return f"{value:,.2f}"
+
+
+def sbi_statement(rng, page_count):
+    balance = rng.randint(10000, 500000) + 0.0
+    header = [
+        "STATE BANK OF INDIA",
+        "Account Statement from 01/04/2023 to 31/03/2024",
+        "Txn Date Value Date Description Ref No./Cheque No. Debit Credit Balance",
+    ]
+    pages = []
+    day = 0
+    for page in range(page_count):
+        lines = list(header) if page == 0 else []
+        while len(lines) < LINES_PER_PAGE:
+            day += 1
+            txn_date = f"{day % 28 + 1:02d}/{(day // 28) % 12 + 1:02d}/2023"
+            narration = rng.choice(NARRATIONS).format(ref=rng.randint(10 ** 8, 10 ** 12))
+            value = round(rng.uniform(10, 50000), 2)
+            balance = balance + value if 'CR' in narration or 'CREDIT' in narration or 'DEPOSIT' in narration else balance - value
+            lines.append(f"{txn_date} {txn_date} {narration} {amount(value)} {amount(balance)}")
+        pages.append(lines)
+    return pages
+
+
+def wrap_words(text, width):
+    lines = []
+    for word in text.split():
+        if lines and len(lines[-1]) + 1 + len(word) <= width:
+            lines[-1] += ' ' + word
+        else:
+            lines.append(word)
+    return lines
+
+
+def sbi_statement_table(rng, page_count):
+    """
+    The same kind of statement laid out as a table: every page repeats the column header, cheque and RTGS
+    numbers sit in their own column and long descriptions wrap onto continuation rows
+    """
+    balance = rng.randint(10000, 500000) + 0.0
+    header = tuple((x, title, align) for title, x, align in STATEMENT_COLUMNS)
+    columns = {title: (x, align) for title, x, align in STATEMENT_COLUMNS}
+
+    def cell(title, text):
+        x, align = columns[title]
+        return x, text, align
+
+    pages = []
+    day = 0
+    for page in range(page_count):
+        lines = ["STATE BANK OF INDIA", "Account Statement from 01/04/2023 to 31/03/2024"] if page == 0 else []
+        lines.append(header)
+        while len(lines) < LINES_PER_PAGE - 2:
+            day += 1
+            txn_date = f"{day % 28 + 1:02d}/{(day // 28) % 12 + 1:02d}/2023"
+            ref = rng.randint(10 ** 8, 10 ** 12)
+            narration = rng.choice(NARRATIONS)
+            in_column = narration.startswith(('CHQ', 'RTGS'))
+            description = narration.format(ref='' if in_column else ref)
+            value = round(rng.uniform(10, 50000), 2)
+            credited = 'CR' in narration or 'CREDIT' in narration or 'DEPOSIT' in narration
+            balance = balance + value if credited else balance - value
+            description_lines = wrap_words(description, DESCRIPTION_WIDTH)
+            row = [cell("Txn Date", txn_date), cell("Value Date", txn_date), cell("Description", description_lines[0]),
+                   cell("Credit" if credited else "Debit", amount(value)), cell("Balance", amount(balance))]
+            if in_column:
+                row.insert(3, cell("Ref No./Cheque No.", str(ref)))
+            lines.append(tuple(row))
+            lines.extend((cell("Description", text),) for text in description_lines[1:])
+        pages.append(lines)
+    return pages
+
+
+DOCUMENT_BUILDERS = {
+    'shriram': shriram_policy,
+    'reliance': reliance_policy,
+    'sbi_policy': sbi_policy,
+    'kotak': kotak_policy,
+    'sbi_statement': sbi_statement,
+    'sbi_statement_table': sbi_statement_table,
+}
+
+
+def document_pages(kind, page_count, seed=0):
+    """
+    Lines of every page of one synthetic document - the same (kind, page_count, seed) always gives the same pages
+    """
+    rng = random.Random(f"{kind}:{page_count}:{seed}")
+    return DOCUMENT_BUILDERS[kind](rng, max(1, page_count))
+
+
+def synthetic_pdf(kind, page_count, seed=0):
+    return make_pdf(document_pages(kind, page_count, seed))
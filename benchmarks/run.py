@@ -0,0 +1,198 @@
+"""
+Benchmark every stage of extraction over the synthetic corpus in pdfgen.py.
+
+    python benchmarks/run.py                          # all kinds at 1, 10, 50 and 200 pages
+    python benchmarks/run.py --pages 1,10 --repeat 5  # quicker, steadier numbers
+    python benchmarks/run.py --compare benchmarks/results/<earlier run>.json
+    python benchmarks/run.py --regex-profile          # also rank every field pattern by cost
+
+Stages timed per document: PDF open, page.extract_text over every page, each extractor function over
+the document text, and each full route through the Flask test client (with the result cache cleared).
+Results are written as JSON so two runs can be compared.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+import pdfplumber  # noqa: E402
+
+import app  # noqa: E402
+from pdfgen import DOCUMENT_BUILDERS, synthetic_pdf  # noqa: E402
+from regex_profile import ProfileAggregate, profiling  # noqa: E402
+
+DEFAULT_PAGES = (1, 10, 50, 200)
+
+EXTRACTORS = {
+    'universal': app.extract_values_from_text_universal,
+    'shriram_reliance': app.extract_values_from_text,
+    'kotak': app.extract_kotak_insurance,
+    'sbi_statement': app.extract_sbi_bank_statement,
+}
+
+# The route each kind of document is normally sent to - every kind also goes through /extract-auto
+ROUTES = {
+    'shriram': '/extract',
+    'reliance': '/extract',
+    'sbi_policy': '/extract',
+    'kotak': '/extract-kotak',
+    'sbi_statement': '/extract-sbi',
+    'sbi_statement_table': '/extract-sbi?table=1',
+}
+
+
+def time_runs(function, repeat):
+    """
+    Run function repeat times - returns the wall time of every run in seconds and the last return value
+    """
+    runs = []
+    value = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = function()
+        runs.append(time.perf_counter() - started)
+    return runs, value
+
+
+def record(stage, name, kind, pages, runs):
+    return {
+        'stage': stage,
+        'name': name,
+        'kind': kind,
+        'pages': pages,
+        'runs': [round(run, 6) for run in runs],
+        'min_seconds': round(min(runs), 6),
+        'median_seconds': round(statistics.median(runs), 6),
+    }
+
+
+def open_pdf(pdf_bytes):
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        return len(pdf.pages)
+
+
+def extract_page_texts(pdf_bytes):
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+def post_pdf(client, route, pdf_bytes):
+    app.result_cache.clear()
+    response = client.post(route, data={'pdf': (io.BytesIO(pdf_bytes), 'benchmark.pdf')})
+    body = response.get_json()
+    if not body or not body.get('success'):
+        raise RuntimeError(f"{route} failed: {body}")
+    return body
+
+
+def benchmark_document(client, kind, pages, repeat, regex_profiles=None):
+    """
+    Time every stage for one synthetic document
+    """
+    pdf_bytes = synthetic_pdf(kind, pages)
+    runs, _ = time_runs(lambda: open_pdf(pdf_bytes), repeat)
+    results = [record('pdf_open', 'pdfplumber.open', kind, pages, runs)]
+
+    runs, page_texts = time_runs(lambda: extract_page_texts(pdf_bytes), repeat)
+    results.append(record('extract_text', 'page.extract_text', kind, pages, runs))
+
+    text = app.DocumentText(enumerate(page_texts, start=1)).text
+    for name, extractor in EXTRACTORS.items():
+        runs, _ = time_runs(lambda: extractor(text), repeat)
+        results.append(record('extractor', name, kind, pages, runs))
+        if regex_profiles is not None:
+            with profiling(name) as profile:
+                extractor(text)
+            regex_profiles.merge(profile)
+
+    for route in (ROUTES[kind], '/extract-auto'):
+        runs, _ = time_runs(lambda: post_pdf(client, route, pdf_bytes), repeat)
+        results.append(record('route', route, kind, pages, runs))
+    return results
+
+
+def compare(baseline_path, results):
+    """
+    Print the change in median time of every measurement also present in the baseline run
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = {(r['stage'], r['name'], r['kind'], r['pages']): r for r in json.load(baseline_file)['results']}
+
+    print(f"\n{'stage':<13} {'name':<20} {'kind':<14} {'pages':>5} {'before ms':>10} {'after ms':>10} {'change':>8}")
+    for result in results:
+        before = baseline.get((result['stage'], result['name'], result['kind'], result['pages']))
+        if before is None:
+            continue
+        old, new = before['median_seconds'], result['median_seconds']
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{result['stage']:<13} {result['name']:<20} {result['kind']:<14} {result['pages']:>5} "
+              f"{old * 1000:>10.2f} {new * 1000:>10.2f} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', default=','.join(map(str, DEFAULT_PAGES)),
+                        help='comma-separated page counts (default: %(default)s)')
+    parser.add_argument('--kinds', default=','.join(DOCUMENT_BUILDERS),
+                        help='comma-separated document kinds (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement (default: %(default)s)')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='earlier results file to compare against')
+    parser.add_argument('--regex-profile', action='store_true',
+                        help='profile every field pattern of the extractors and add the ranked report to the results')
+    args = parser.parse_args()
+
+    page_counts = [int(pages) for pages in args.pages.split(',')]
+    kinds = args.kinds.split(',')
+    unknown = set(kinds) - set(DOCUMENT_BUILDERS)
+    if unknown:
+        parser.error(f"unknown kinds: {', '.join(sorted(unknown))}")
+
+    client = app.app.test_client()
+    regex_profiles = ProfileAggregate() if args.regex_profile else None
+    results = []
+    for kind in kinds:
+        for pages in page_counts:
+            document_results = benchmark_document(client, kind, pages, args.repeat, regex_profiles)
+            results.extend(document_results)
+            summary = ', '.join(f"{r['name']} {r['median_seconds'] * 1000:.1f}ms" for r in document_results)
+            print(f"{kind} x {pages} pages: {summary}", flush=True)
+
+    output = args.output or os.path.join(BENCHMARK_DIR, 'results', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as output_file:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'pdfplumber': pdfplumber.__version__,
+                'cpu_count': os.cpu_count(),
+                'repeat': args.repeat,
+                'pages': page_counts,
+                'kinds': kinds,
+            },
+            'results': results,
+            'regex_profile': regex_profiles.report() if regex_profiles is not None else None,
+        }, output_file, indent=2)
+    print(f"\nWrote {len(results)} measurements to {output}")
+
+    if regex_profiles is not None:
+        print("\nMost expensive patterns:")
+        for row in regex_profiles.rows()[:10]:
+            print(f"  {row['total_ms']:>10.2f}ms  {row['extractor']}.{row['field']} ({row['kind']}): {row['pattern'][:70]}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Measure how quickly a fresh process gets going.
+
+    python benchmarks/startup.py                # 5 fresh interpreters
+    python benchmarks/startup.py --repeat 10
+    python benchmarks/startup.py --compare benchmarks/results/<earlier startup run>.json
+
+Every run starts a new interpreter and times `import app`, the first request to each extraction route (through the
+Flask test client, with samples/warmup.pdf) and the time from launching the interpreter to the first response.
+Two checks go with it: importing app must leave the PDF stack (pdfplumber, pdfminer, PIL, pyarrow) unloaded, and
+the text extractors must run with pdfplumber made unimportable. Exits non-zero if either check fails.
+Results are written in the same format as run.py's, so --compare works the same way.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from run import compare, record  # noqa: E402
+
+ROUTES = ('/extract', '/extract-kotak', '/extract-sbi')
+PDF_STACK = ('pdfplumber', 'pdfminer', 'PIL', 'pyarrow')
+
+STARTUP_PROBE = """
+import io, json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+loaded = [name for name in {stack!r} if name in sys.modules]
+client = app.app.test_client()
+with open(app.app.config['WARMUP_PDF'], 'rb') as pdf_file:
+    pdf_bytes = pdf_file.read()
+first_requests = {{}}
+first_response = None
+for route in {routes!r}:
+    request_started = time.perf_counter()
+    response = client.post(route, data={{'pdf': (io.BytesIO(pdf_bytes), 'warmup.pdf')}})
+    first_requests[route] = time.perf_counter() - request_started
+    first_response = first_response or time.time()
+    if response.status_code != 200 or not response.get_json()['success']:
+        sys.exit(f'{{route}} failed: {{response.get_data(as_text=True)[:200]}}')
+print(json.dumps({{'import': imported - started, 'loaded': loaded, 'first_requests': first_requests,
+                  'first_response': first_response}}))
+"""
+
+# pdfplumber set to None in sys.modules makes every `import pdfplumber` raise ImportError
+TEXT_ONLY_PROBE = """
+import json, sys
+sys.modules['pdfplumber'] = None
+sys.path.insert(0, {benchmark_dir!r})
+import app
+from pdfgen import document_pages
+text = lambda kind: '\\n'.join(line if isinstance(line, str) else ' '.join(cell[1] for cell in line)
+                                for line in document_pages(kind, 1)[0])
+universal = app.extract_values_from_text_universal(text('shriram'))
+kotak = app.extract_kotak_insurance(text('kotak'))
+transactions = app.extract_sbi_bank_statement(text('sbi_statement'))
+print(json.dumps({{'universal_fields': sum(1 for value in universal.values() if value),
+                  'kotak_fields': sum(1 for value in kotak.values() if value),
+                  'transactions': len(transactions)}}))
+"""
+
+
+def run_probe(code):
+    """
+    Run code in a fresh interpreter from the repository root - returns (launch time, its JSON output)
+    """
+    launched = time.time()
+    completed = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip() or completed.stdout.strip())
+    return launched, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters to start (default: %(default)s)')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/startup-<timestamp>.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    imports, first_responses, loaded = [], [], set()
+    first_requests = {route: [] for route in ROUTES}
+    for _ in range(args.repeat):
+        launched, report = run_probe(STARTUP_PROBE.format(stack=PDF_STACK, routes=ROUTES))
+        imports.append(report['import'])
+        first_responses.append(report['first_response'] - launched)
+        loaded.update(report['loaded'])
+        for route, seconds in report['first_requests'].items():
+            first_requests[route].append(seconds)
+
+    results = [record('startup', 'import app', 'process', 0, imports)]
+    results += [record('first_request', route, 'warmup', 1, runs) for route, runs in first_requests.items()]
+    results.append(record('startup', 'first response', 'process', 0, first_responses))
+    for result in results:
+        print(f"{result['stage']:<13} {result['name']:<16} median {result['median_seconds'] * 1000:8.1f}ms  "
+              f"min {result['min_seconds'] * 1000:8.1f}ms")
+
+    failures = []
+    if loaded:
+        failures.append(f"importing app loaded {', '.join(sorted(loaded))}")
+    try:
+        _, text_only = run_probe(TEXT_ONLY_PROBE.format(benchmark_dir=BENCHMARK_DIR))
+        print(f"\nText extractors without pdfplumber: {text_only}")
+    except RuntimeError as e:
+        failures.append(f'text extractors need pdfplumber: {e}')
+
+    output = args.output or os.path.join(BENCHMARK_DIR, 'results',
+                                         'startup-' + datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as output_file:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'repeat': args.repeat,
+            },
+            'results': results,
+        }, output_file, indent=2)
+    print(f"\nWrote {len(results)} measurements to {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Run the policy extractors over adversarial texts and check that each one finishes within its regex budget.
+
+    python benchmarks/stress.py                 # default budget (REGEX_BUDGET_SECONDS)
+    python benchmarks/stress.py --budget 0.5    # tighter budget
+    python benchmarks/stress.py --size 1000000  # bigger texts
+
+The texts are built to make the field patterns backtrack: labels with no value after them, long runs of
+address-like characters with no ", Mumbai" to end them, thousands of repeated labels and a huge Kotak-like
+tail. An extractor passes if it returns within the budget plus --slack seconds. Exits non-zero on failure.
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+import app  # noqa: E402
+from pdfgen import document_pages  # noqa: E402
+
+EXTRACTORS = {
+    'universal': app.extract_values_from_text_universal,
+    'shriram_reliance': app.extract_values_from_text,
+    'kotak': app.extract_kotak_insurance,
+}
+
+
+def repeat_to(unit, size):
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def adversarial_texts(size):
+    """
+    name -> text of roughly size characters
+    """
+    kotak_head = '\n'.join(document_pages('kotak', 1)[0])
+    return {
+        'labels_without_values': repeat_to('Name Policy Address Insured Nominee Period ', size),
+        'address_without_city': 'Address ' + repeat_to('A1 B2 C3 D4, ', size),
+        'city_without_pin': repeat_to('A1 B2 C3 D4, Mumbai, Maharashtra - ', size),
+        'repeated_labels': repeat_to('Address\nIN-1 / Insured Name\nPolicy No\n', size),
+        'digits_and_spaces': repeat_to('1234 5678 ', size),
+        'kotak_tail': kotak_head + '\n' + repeat_to('Vehicle Make / Model Registration No. Engine No ', size),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=app.app.config['REGEX_BUDGET_SECONDS'],
+                        help='regex budget per document in seconds (default: %(default)s)')
+    parser.add_argument('--slack', type=float, default=1.0,
+                        help='seconds allowed on top of the budget (default: %(default)s)')
+    parser.add_argument('--size', type=int, default=500_000, help='characters per text (default: %(default)s)')
+    args = parser.parse_args()
+
+    app.app.config['REGEX_BUDGET_SECONDS'] = args.budget
+    limit = args.budget + args.slack
+    texts = adversarial_texts(args.size)
+    failures = 0
+    for text_name, text in texts.items():
+        for extractor_name, extractor in EXTRACTORS.items():
+            with app.regex_budget() as budget:
+                started = time.perf_counter()
+                extractor(text)
+                elapsed = time.perf_counter() - started
+            status = 'ok' if elapsed <= limit else 'SLOW'
+            failures += status != 'ok'
+            timed_out = ', '.join(budget.timed_out) or '-'
+            print(f"{status:<4} {text_name:<22} {extractor_name:<17} {elapsed:>7.2f}s  timed out: {timed_out}",
+                  flush=True)
+
+    print(f"\n{failures} of {len(EXTRACTORS) * len(texts)} runs exceeded {limit:.1f}s")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
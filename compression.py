@@ -0,0 +1,65 @@
+"""
+Response compression negotiated from Accept-Encoding: brotli when the Brotli package is installed, else gzip.
+Streamed bodies are compressed chunk by chunk and flushed after every chunk, so NDJSON records still reach the
+client as soon as they are produced.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional - gzip only
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # fast settings - the bodies are large and mostly repetitive JSON
+
+COMPRESSIBLE_MIMETYPES = frozenset(('application/json', 'application/x-ndjson', 'application/jsonl', 'text/csv',
+                                    'text/plain', 'text/html'))
+
+
+def supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encodings):
+    """
+    The best encoding the client accepts (a werkzeug Accept of content codings), or None
+    """
+    best = None
+    best_quality = 0
+    for encoding in supported_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    stream = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return stream.compress(data) + stream.flush()
+
+
+def compress_chunks(chunks, encoding):
+    """
+    Compress a streamed body, flushing after every chunk; closes the original iterable when done
+    """
+    if encoding == 'br':
+        stream = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, flush, finish = stream.process, stream.flush, stream.finish
+    else:
+        stream = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        process, flush, finish = stream.compress, lambda: stream.flush(zlib.Z_SYNC_FLUSH), stream.flush
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = process(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
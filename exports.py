@@ -0,0 +1,121 @@
+"""
+Flat exports of statement transactions for analytics loaders.
+Rows are tuples in TRANSACTION_COLUMNS order, straight from the line parser. CSV and JSONL are streamed row by row;
+Parquet and Arrow files are built column by column, with typed date, amount and page columns. Those two need pyarrow,
+which is optional and only imported when one is asked for.
+"""
+import csv
+import functools
+import io
+from datetime import date
+
+TRANSACTION_COLUMNS = ('date', 'description', 'ref_no', 'debit', 'credit', 'balance', 'page')
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/jsonl',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file',
+}
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+CSV_BATCH_ROWS = 500
+
+MONTHS = {name: number for number, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), start=1)}
+
+
+@functools.lru_cache(maxsize=None)
+def get_arrow():
+    """
+    pyarrow, with its ipc and parquet modules, imported on first use - None when it is not installed
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:  # optional - only the columnar formats need it
+        return None
+    return pyarrow
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_date(text):
+    """
+    datetime.date of a statement date (dd/mm/yyyy, dd-mm-yyyy, dd-Mon-yyyy, dd.mm.yyyy, d/m/yy), or None
+    """
+    parts = text.replace('-', '/').replace('.', '/').split('/') if text else ()
+    if len(parts) != 3:
+        return None
+    day, month, year = parts
+    try:
+        month = MONTHS[month.lower()] if month.isalpha() else int(month)
+        year = int(year)
+        return date(year + 2000 if year < 100 else year, month, int(day))
+    except (KeyError, ValueError):
+        return None
+
+
+def transaction_row(transaction):
+    """
+    Row tuple of a transaction dict, as stored in a result
+    """
+    return tuple(transaction.get(column) for column in TRANSACTION_COLUMNS)
+
+
+def csv_chunks(rows):
+    """
+    Yield the CSV text of rows, header first, CSV_BATCH_ROWS rows at a time
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TRANSACTION_COLUMNS)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % CSV_BATCH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def jsonl_chunks(rows, dumps):
+    """
+    Yield one JSON object per row, each encoded by dumps (a function returning bytes) and ending in a newline
+    """
+    for row in rows:
+        yield dumps(dict(zip(TRANSACTION_COLUMNS, row))) + b"\n"
+
+
+def arrow_table(rows):
+    """
+    pyarrow Table of rows: date32 dates, decimal128(18, 2) amounts, int32 pages
+    """
+    pyarrow = get_arrow()
+    columns = list(zip(*rows)) or [()] * len(TRANSACTION_COLUMNS)
+    dates, descriptions, refs, debits, credits, balances, pages = columns
+    amount_type = pyarrow.decimal128(18, 2)
+    return pyarrow.table({
+        'date': pyarrow.array([parse_date(value) for value in dates], type=pyarrow.date32()),
+        'description': pyarrow.array(descriptions, type=pyarrow.string()),
+        'ref_no': pyarrow.array(refs, type=pyarrow.string()),
+        # Amounts are plain decimal strings by now - Arrow casts the whole column at once
+        'debit': pyarrow.array(debits, type=pyarrow.string()).cast(amount_type),
+        'credit': pyarrow.array(credits, type=pyarrow.string()).cast(amount_type),
+        'balance': pyarrow.array(balances, type=pyarrow.string()).cast(amount_type),
+        'page': pyarrow.array(pages, type=pyarrow.int32()),
+    })
+
+
+def columnar_export(rows, export_format):
+    """
+    Parquet or Arrow IPC file bytes of rows
+    """
+    pyarrow = get_arrow()
+    table = arrow_table(rows)
+    sink = pyarrow.BufferOutputStream()
+    if export_format == 'parquet':
+        pyarrow.parquet.write_table(table, sink)
+    else:
+        with pyarrow.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,104 @@
+"""
+Gunicorn settings for production - gunicorn reads this file from the working directory (see Procfile).
+The app is imported and warmed up once in the master, then forked: every worker starts with pdfplumber/pdfminer
+imported, all patterns compiled and the extractors' first-use work done, shared copy-on-write.
+Everything can be overridden with the usual GUNICORN_CMD_ARGS, or with the variables below.
+"""
+import os
+import threading
+import time
+
+cpu_count = os.cpu_count() or 1
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+preload_app = True
+
+# Extraction is CPU-bound, so one process per core, each running one request at a time. More threads
+# (GUNICORN_THREADS) keep a worker serving /metrics, /jobs polls and cache hits while another thread parses, but
+# when the watchdog below restarts a worker, its other requests only get graceful_timeout to finish.
+workers = int(os.environ.get('WEB_CONCURRENCY', cpu_count))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+# The per-request memory limit (REQUEST_MEMORY_LIMIT_BYTES in app.py) measures how far the whole worker has grown,
+# which is only the current request's doing if the worker runs one request at a time. A second thread's growth
+# would stop whichever request checks next, so while the limit is on (anything but 0) workers get one thread.
+if int(os.environ.get('REQUEST_MEMORY_LIMIT_BYTES', 1)) != 0:
+    threads = 1
+worker_class = 'gthread'
+
+# Workers are recycled now and then to return memory fragmented by large documents
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+# Heartbeat timeout of an idle or stuck worker. Slow requests are stopped by the app at their route's timeout;
+# the watchdog below kills a worker that is still stuck in one TIMEOUT_GRACE_SECONDS after that
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+
+
+def on_starting(server):
+    # With preload_app the app is already imported here. This runs before the listening socket is bound, so no
+    # connection is accepted - or queued - until the warm-up is done and the workers are forked.
+    from app import warm_up
+
+    started = time.perf_counter()
+    timings = warm_up()
+    server.log.info('Warm-up done in %.0fms (%s)', (time.perf_counter() - started) * 1000,
+                    ', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in timings.items()))
+
+
+def post_fork(server, worker):
+    # Requests in progress in this worker: thread id -> (deadline, path)
+    worker.requests_in_progress = {}
+    threading.Thread(target=watch_requests, args=(worker,), daemon=True).start()
+
+
+def pre_request(worker, req):
+    from app import app, route_timeout
+
+    deadline = time.monotonic() + route_timeout(req.path) + app.config['TIMEOUT_GRACE_SECONDS']
+    worker.requests_in_progress[threading.get_ident()] = (deadline, req.path)
+
+
+def post_request(worker, req, environ, resp):
+    worker.requests_in_progress.pop(threading.get_ident(), None)
+
+
+def watch_requests(worker):
+    """
+    Kill the worker, as gunicorn's own timeout does, once a request is still running TIMEOUT_GRACE_SECONDS past its
+    route's timeout (ROUTE_TIMEOUTS / REQUEST_TIMEOUT in app.py) - stuck where the app cannot stop it, such as inside
+    a single page. Its document is quarantined first, and the master starts a fresh worker in its place.
+    With several threads, the worker first stops accepting and gives the other requests in progress up to
+    graceful_timeout to finish. Exiting from here is immediate - a signal would only stop the main thread, not the
+    one stuck in the request.
+    """
+    from app import quarantine_upload
+
+    while worker.alive:
+        time.sleep(1)
+        now = time.monotonic()
+        for thread_id, (deadline, path) in list(worker.requests_in_progress.items()):
+            if now > deadline:
+                worker.log.error('Request to %s overran its timeout - restarting worker (pid %s)', path, worker.pid)
+                quarantine_upload(thread_id)
+                drain_requests(worker, thread_id)
+                os._exit(1)
+                return
+
+
+def drain_requests(worker, stuck_thread_id):
+    """
+    Stop accepting connections and wait, up to graceful_timeout, for the worker's other requests to finish
+    """
+    worker.alive = False
+    drain_until = time.monotonic() + worker.cfg.graceful_timeout
+    while time.monotonic() < drain_until and any(thread_id != stuck_thread_id
+                                                 for thread_id in list(worker.requests_in_progress)):
+        time.sleep(0.1)
+    others = [path for thread_id, (_, path) in worker.requests_in_progress.items() if thread_id != stuck_thread_id]
+    if others:
+        worker.log.error('Requests to %s were still running when the worker was restarted', ', '.join(others))
@@ -0,0 +1,148 @@
+"""
+SQLite-backed store for asynchronous extraction jobs.
+Uploads are spooled next to the database and job state lives in the database file, so
+queued work and finished results survive a worker restart. Every process (HTTP worker or
+pool process) opens its own short-lived connections.
+"""
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    extractor TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    status TEXT NOT NULL,
+    pdf_path TEXT,
+    pages_done INTEGER NOT NULL DEFAULT 0,
+    pages_total INTEGER,
+    result TEXT,
+    error TEXT,
+    worker_pid INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Job records and spooled uploads under one directory
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.db_path = os.path.join(directory, 'jobs.sqlite3')
+        os.makedirs(directory, exist_ok=True)
+        with self.connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute(SCHEMA)
+
+    @contextmanager
+    def connect(self):
+        """
+        One short-lived connection per operation, committed on success
+        """
+        db = sqlite3.connect(self.db_path, timeout=30)
+        db.row_factory = sqlite3.Row
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def create(self, extractor, filename, pdf_bytes=None, result=None):
+        """
+        Queue a new job for pdf_bytes - or record it as already done when a result is given
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        pdf_path = None
+        status = DONE
+        if result is None:
+            pdf_path = os.path.join(self.directory, f'{job_id}.pdf')
+            with open(pdf_path, 'wb') as spool:
+                spool.write(pdf_bytes)
+            status = QUEUED
+
+        with self.connect() as db:
+            db.execute(
+                'INSERT INTO jobs (id, extractor, filename, status, pdf_path, result, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, extractor, filename, status, pdf_path,
+                 json.dumps(result) if result is not None else None, now, now))
+        return job_id
+
+    def get(self, job_id):
+        with self.connect() as db:
+            row = db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def claim(self, job_id):
+        """
+        Atomically move a queued job to running - returns the job, or None if someone else has it
+        """
+        with self.connect() as db:
+            claimed = db.execute(
+                'UPDATE jobs SET status = ?, worker_pid = ?, updated_at = ? WHERE id = ? AND status = ?',
+                (RUNNING, os.getpid(), time.time(), job_id, QUEUED)).rowcount
+        return self.get(job_id) if claimed else None
+
+    def update_progress(self, job_id, pages_done, pages_total):
+        with self.connect() as db:
+            db.execute('UPDATE jobs SET pages_done = ?, pages_total = ?, updated_at = ? WHERE id = ?',
+                       (pages_done, pages_total, time.time(), job_id))
+
+    def finish(self, job_id, result):
+        self.close(job_id, DONE, result=json.dumps(result))
+
+    def fail(self, job_id, error):
+        self.close(job_id, FAILED, error=error)
+
+    def close(self, job_id, status, result=None, error=None):
+        job = self.get(job_id)
+        with self.connect() as db:
+            db.execute('UPDATE jobs SET status = ?, result = ?, error = ?, pdf_path = NULL, updated_at = ? WHERE id = ?',
+                       (status, result, error, time.time(), job_id))
+        if job and job['pdf_path'] and os.path.exists(job['pdf_path']):
+            os.remove(job['pdf_path'])
+
+    def recover(self):
+        """
+        Requeue jobs whose worker process died mid-run and return the ids of every queued job
+        """
+        with self.connect() as db:
+            running = db.execute('SELECT id, worker_pid FROM jobs WHERE status = ?', (RUNNING,)).fetchall()
+            for row in running:
+                if not row['worker_pid'] or not pid_alive(row['worker_pid']):
+                    db.execute('UPDATE jobs SET status = ?, worker_pid = NULL, pages_done = 0, updated_at = ? '
+                               'WHERE id = ? AND status = ?', (QUEUED, time.time(), row['id'], RUNNING))
+            queued = db.execute('SELECT id FROM jobs WHERE status = ? ORDER BY created_at', (QUEUED,)).fetchall()
+        return [row['id'] for row in queued]
+
+    def purge(self, max_age):
+        """
+        Drop finished jobs older than max_age seconds
+        """
+        cutoff = time.time() - max_age
+        with self.connect() as db:
+            db.execute('DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?', (DONE, FAILED, cutoff))
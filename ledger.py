@@ -0,0 +1,122 @@
+"""
+Statement amounts as exact integer paise, held one column at a time, and the running-balance check.
+Every row of a statement must move the balance by exactly its credit minus its debit. A row that fails the check but
+passes it with debit and credit swapped had its amount read on the wrong side, which is the one fix that is never
+ambiguous, so it is applied; any other failure is only reported.
+"""
+from array import array
+
+AMOUNT_COLUMNS = ('debit', 'credit', 'balance')
+
+
+def to_paise(amount):
+    """
+    Integer paise of a cleaned amount ('-1234.56', '1234'), or None for a missing or malformed one
+    """
+    if not amount:
+        return None
+    whole, _, fraction = amount.partition('.')
+    if len(fraction) > 2:
+        return None
+    try:
+        paise = abs(int(whole or '0')) * 100 + int(fraction.ljust(2, '0'))
+    except ValueError:
+        return None
+    return -paise if whole.startswith('-') else paise
+
+
+class StatementLedger:
+    """
+    The debit, credit and balance of every row in paise - one array('q') per column, 0 where an amount is missing,
+    with a parallel array('b') that marks which amounts are present
+    """
+
+    def __init__(self):
+        self.values = {column: array('q') for column in AMOUNT_COLUMNS}
+        self.present = {column: array('b') for column in AMOUNT_COLUMNS}
+
+    @classmethod
+    def from_amounts(cls, amounts):
+        """
+        Ledger of (debit, credit, balance) amount strings, one triple per row
+        """
+        ledger = cls()
+        appends = [(ledger.values[column].append, ledger.present[column].append) for column in AMOUNT_COLUMNS]
+        for row in amounts:
+            for (append_value, append_present), amount in zip(appends, row):
+                paise = to_paise(amount)
+                append_value(paise or 0)
+                append_present(paise is not None)
+        return ledger
+
+    def __len__(self):
+        return len(self.values['balance'])
+
+    def column(self, name):
+        """
+        A column as a list of paise, None where the amount is missing
+        """
+        return [value if present else None for value, present in zip(self.values[name], self.present[name])]
+
+    def swap_sides(self, row):
+        for source in (self.values, self.present):
+            source['debit'][row], source['credit'][row] = source['credit'][row], source['debit'][row]
+
+
+class Reconciliation:
+    """
+    Running-balance check over a statement fed to check() in order, a whole statement or one page at a time -
+    the last balance is carried from one call to the next. Rows are numbered across the whole statement.
+    The first row, and any row without a balance or right after one, cannot be checked.
+    """
+
+    def __init__(self):
+        self.previous_balance = None
+        self.row_count = 0
+        self.checked = 0
+        self.fixed = []
+        self.mismatched = []
+
+    def check(self, ledger):
+        """
+        Check the rows of a ledger and swap debit and credit in the rows where that reconciles them;
+        returns the ledger positions of the swapped rows
+        """
+        values, present = ledger.values, ledger.present
+        balances, has_balance = values['balance'], present['balance']
+        if not len(ledger):
+            return []
+        # Balance before every row: the carried one, then each row's predecessor
+        previous = array('q', (self.previous_balance or 0,)) + balances[:-1]
+        has_previous = array('b', (self.previous_balance is not None,)) + has_balance[:-1]
+
+        swapped = []
+        checked = 0
+        for row, (debit, credit, balance, before, checkable, known) in enumerate(zip(
+                values['debit'], values['credit'], balances, previous, has_balance, has_previous)):
+            if not (checkable and known):
+                continue
+            checked += 1
+            movement = balance - before
+            net = credit - debit
+            if movement == net:
+                continue
+            if net and movement == -net:
+                ledger.swap_sides(row)
+                swapped.append(row)
+                self.fixed.append(self.row_count + row)
+            else:
+                self.mismatched.append(self.row_count + row)
+
+        self.checked += checked
+        self.row_count += len(ledger)
+        self.previous_balance = balances[-1] if has_balance[-1] else None
+        return swapped
+
+    def report(self):
+        return {
+            'checked': self.checked,
+            'reconciled': self.checked - len(self.mismatched),
+            'fixed': self.fixed,
+            'mismatched': self.mismatched,
+        }
@@ -0,0 +1,18 @@
+"""
+Resident memory of this process, for the per-request memory ceiling and peak memory reporting.
+Read from /proc (Linux); elsewhere it reads as None and memory is not tracked.
+"""
+import os
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss():
+    """
+    Resident set size in bytes, or None where it cannot be read
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
@@ -0,0 +1,96 @@
+"""
+Persistent process pools for CPU-bound extraction work, and parallel per-page text extraction.
+Large documents are split into contiguous page ranges that the page pool extracts
+concurrently; the page texts come back in page order.
+"""
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pdf_backend import get_pdf_backend, release_page
+
+# Page ranges per pool worker - more, smaller ranges than workers, so the caller can act between them
+CHUNKS_PER_WORKER = 4
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_process_pool(name, workers):
+    """
+    Return the named process pool, created on first use so each gunicorn worker gets its own after fork
+    """
+    with _pools_lock:
+        pool, pool_workers = _pools.get(name, (None, 0))
+        if pool is None or pool_workers != workers:
+            if pool is not None:
+                pool.shutdown(wait=False)
+            pool = ProcessPoolExecutor(max_workers=workers)
+            _pools[name] = (pool, workers)
+        return pool
+
+
+def get_page_pool(workers):
+    return get_process_pool('pages', workers)
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool, _ in _pools.values():
+            pool.shutdown()
+        _pools.clear()
+
+
+def extract_page_range(pdf_path, start, stop):
+    """
+    Extract the text of pages[start:stop] - runs inside a pool process
+    """
+    texts = []
+    with get_pdf_backend().open(pdf_path) as pdf:
+        for page in pdf.pages[start:stop]:
+            texts.append(page.extract_text() or "")
+            release_page(page)
+    return texts
+
+
+def split_page_range(page_count, chunks):
+    """
+    Split range(page_count) into at most `chunks` contiguous (start, stop) ranges of near-equal size
+    """
+    chunks = max(1, min(chunks, page_count))
+    size, extra = divmod(page_count, chunks)
+    ranges = []
+    start = 0
+    for index in range(chunks):
+        stop = start + size + (1 if index < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def iter_pages_parallel(pdf_bytes, page_count, workers, deadline=None):
+    """
+    Extract every page's text across the pool, yielding the texts of one page range at a time in page order.
+    Waiting for a range past deadline (a time.perf_counter() value) raises TimeoutError. Closing the generator
+    early, or a timeout, cancels the ranges that have not started.
+    """
+    # Workers read the PDF from a file instead of each receiving a pickled copy of the bytes - the upload's own
+    # spool file when it is a mapped upload (uploads.MappedUpload), otherwise a temporary copy
+    spool_path = getattr(pdf_bytes, 'path', None)
+    if spool_path is None:
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as spool:
+            spool.write(pdf_bytes)
+    futures = []
+    try:
+        pool = get_page_pool(workers)
+        futures = [pool.submit(extract_page_range, spool_path or spool.name, start, stop)
+                   for start, stop in split_page_range(page_count, workers * CHUNKS_PER_WORKER)]
+        for future in futures:
+            yield future.result(None if deadline is None else max(0.0, deadline - time.perf_counter()))
+    finally:
+        for future in futures:
+            future.cancel()
+        if spool_path is None:
+            os.unlink(spool.name)
@@ -0,0 +1,23 @@
+"""
+The PDF stack, imported on first use.
+pdfplumber brings pdfminer and PIL with it, a good part of the cost of starting a process. Code that opens PDFs
+calls get_pdf_backend() instead of importing it, so importing app.py - for its text extractors, a health check or
+a CLI - never loads it.
+"""
+import functools
+
+
+@functools.lru_cache(maxsize=None)
+def get_pdf_backend():
+    import pdfplumber
+
+    return pdfplumber
+
+
+def release_page(page):
+    """
+    Drop everything pdfplumber has parsed for a page - layout, chars, objects and its text map. The PDF object
+    keeps every page it has handed out, so without this a long document stays in memory until it is closed.
+    """
+    page.flush_cache()
+    page.get_textmap.cache_clear()
@@ -0,0 +1,43 @@
+"""
+Short-lived quarantine of documents that ran past their request deadline.
+Each quarantined document is an empty file named by the SHA-256 of its bytes, so every worker on the host shares the
+list; the file's mtime is when it was quarantined. Entries expire after ttl seconds and are removed when next seen.
+"""
+import hashlib
+import os
+import time
+
+
+def content_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class Quarantine:
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def add(self, digest):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(digest), 'w'):
+            pass
+
+    def remaining(self, digest):
+        """
+        Seconds until the document is let through again, or None if it is not quarantined
+        """
+        path = self.path(digest)
+        try:
+            left = os.stat(path).st_mtime + self.ttl - time.time()
+        except FileNotFoundError:
+            return None
+        if left > 0:
+            return left
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return None
@@ -0,0 +1,136 @@
+"""
+Opt-in per-field regex profiling.
+While a document is profiled, the extractors report the time and outcome of every field pattern and
+every alternative they try. Document profiles are merged into a process-wide aggregate that can be
+downloaded as a report ranked by total cost.
+"""
+import csv
+import io
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_active_profile = ContextVar('regex_profile', default=None)
+
+REPORT_COLUMNS = ('extractor', 'field', 'kind', 'pattern', 'documents', 'calls', 'matches',
+                  'total_ms', 'mean_ms', 'max_ms')
+
+
+class DocumentProfile:
+    """
+    Pattern timings for one extractor run over one document
+    """
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        # (field, kind, pattern) -> [calls, matches, seconds, max_seconds]
+        self.entries = {}
+
+    def record(self, field, kind, pattern, seconds, matched):
+        entry = self.entries.get((field, kind, pattern))
+        if entry is None:
+            entry = self.entries[(field, kind, pattern)] = [0, 0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += 1 if matched else 0
+        entry[2] += seconds
+        entry[3] = max(entry[3], seconds)
+
+    def timed(self, field, kind, pattern, function, *args):
+        """
+        Call function(*args) - a regex search or match - and record how long it took and whether it matched
+        """
+        started = time.perf_counter()
+        match = function(*args)
+        self.record(field, kind, pattern, time.perf_counter() - started, match is not None)
+        return match
+
+    def rows(self, limit=None):
+        rows = [profile_row(self.extractor, key, 1, entry) for key, entry in self.entries.items()]
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows[:limit] if limit else rows
+
+
+def profile_row(extractor, key, documents, entry):
+    field, kind, pattern = key
+    calls, matches, seconds, max_seconds = entry
+    return {
+        'extractor': extractor,
+        'field': field,
+        'kind': kind,
+        'pattern': pattern,
+        'documents': documents,
+        'calls': calls,
+        'matches': matches,
+        'total_ms': round(seconds * 1000, 4),
+        'mean_ms': round(seconds * 1000 / calls, 4) if calls else 0.0,
+        'max_ms': round(max_seconds * 1000, 4),
+    }
+
+
+def active_profile():
+    """
+    The profile of the extractor running in this context, or None when profiling is off
+    """
+    return _active_profile.get()
+
+
+@contextmanager
+def profiling(extractor):
+    profile = DocumentProfile(extractor)
+    token = _active_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _active_profile.reset(token)
+
+
+class ProfileAggregate:
+    """
+    Pattern timings summed over every profiled document in this process
+    """
+
+    def __init__(self):
+        # (extractor, field, kind, pattern) -> [documents, calls, matches, seconds, max_seconds]
+        self.entries = {}
+        self.documents = 0
+        self.lock = threading.Lock()
+
+    def merge(self, profile):
+        with self.lock:
+            self.documents += 1
+            for (field, kind, pattern), (calls, matches, seconds, max_seconds) in profile.entries.items():
+                entry = self.entries.get((profile.extractor, field, kind, pattern))
+                if entry is None:
+                    entry = self.entries[(profile.extractor, field, kind, pattern)] = [0, 0, 0, 0.0, 0.0]
+                entry[0] += 1
+                entry[1] += calls
+                entry[2] += matches
+                entry[3] += seconds
+                entry[4] = max(entry[4], max_seconds)
+
+    def reset(self):
+        with self.lock:
+            self.entries.clear()
+            self.documents = 0
+
+    def rows(self):
+        """
+        One row per pattern, most expensive first
+        """
+        with self.lock:
+            rows = [profile_row(extractor, (field, kind, pattern), documents, [calls, matches, seconds, max_seconds])
+                    for (extractor, field, kind, pattern), (documents, calls, matches, seconds, max_seconds)
+                    in self.entries.items()]
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+    def report(self):
+        return {'documents': self.documents, 'patterns': self.rows()}
+
+    def csv(self):
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(self.rows())
+        return out.getvalue()
@@ -0,0 +1,98 @@
+"""
+Content-addressed cache for extraction results.
+Results are keyed by a hash of the uploaded PDF bytes plus the extractor name and version,
+so re-uploads of the same file are answered without opening the PDF again.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:  # optional - the standard json module is used instead
+    orjson = None
+
+
+def dumps(result):
+    if orjson is not None:
+        try:
+            return orjson.dumps(result)
+        except TypeError:
+            pass
+    return json.dumps(result).encode('utf-8')
+
+
+def loads(body):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def content_key(digest, extractor, version):
+    """
+    Cache key for an upload, given the SHA-256 hex digest of its bytes - bumping the extractor version
+    invalidates its old entries
+    """
+    return f"{extractor}:{version}:{digest}"
+
+
+class ResultCache:
+    """
+    In-memory LRU of extraction results bounded by the size of their stored JSON (UTF-8 bytes)
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the stored result for key, or None on a miss
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return loads(entry[0])
+
+    def put(self, key, result):
+        """
+        Store a result, evicting least recently used entries until it fits the byte budget
+        """
+        body = dumps(result)
+        size = len(body)
+        if size > self.max_bytes:
+            return False
+
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            while self.entries and self.total_bytes + size > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+            self.entries[key] = (body, size)
+            self.total_bytes += size
+        return True
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+            }
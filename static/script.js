@@ -67,15 +67,8 @@ document.addEventListener('DOMContentLoaded', () => {
             const formData = new FormData();
             formData.append('pdf', file);
             
-            // Determine which endpoint to use based on filename
-            let endpoint = '/extract'; // Default universal extractor
-            if (file.name.toLowerCase().includes('kotak')) {
-                endpoint = '/extract-kotak';
-            } else if (file.name.toLowerCase().includes('sbi')) {
-                endpoint = '/extract-sbi';
-            }
-            
-            const res = await fetch(endpoint, { method: 'POST', body: formData });
+            // The server detects the document type and picks the extractor
+            const res = await fetch('/extract-auto', { method: 'POST', body: formData });
             const data = await res.json();
 
             if (!res.ok || !data.success) {
@@ -91,10 +84,20 @@ document.addEventListener('DOMContentLoaded', () => {
                             <span class="stat-label">File:</span>
                             <span class="stat-value">${file.name}</span>
                         </div>
+                        <div class="stat">
+                            <span class="stat-label">Document Type:</span>
+                            <span class="stat-value">${data.document_type} (${Math.round(data.detection_confidence * 100)}% confidence)</span>
+                        </div>
                         <div class="stat">
                             <span class="stat-label">Text Length:</span>
                             <span class="stat-value">${data.text_length.toLocaleString()} characters</span>
                         </div>
+                        ${data.transactions ? `
+                        <div class="stat">
+                            <span class="stat-label">Transactions:</span>
+                            <span class="stat-value">${data.transaction_count}</span>
+                        </div>
+                        ` : `
                         <div class="stat">
                             <span class="stat-label">Fields Extracted:</span>
                             <span class="stat-value">${data.filled_fields}/${data.total_fields}</span>
@@ -103,6 +106,7 @@ document.addEventListener('DOMContentLoaded', () => {
                             <span class="stat-label">Success Rate:</span>
                             <span class="stat-value">${Math.round((data.filled_fields/data.total_fields)*100)}%</span>
                         </div>
+                        `}
                     </div>
                 </div>
             `;
@@ -115,10 +119,10 @@ document.addEventListener('DOMContentLoaded', () => {
                 </div>
             `;
 
-            // Show extracted JSON data
-            const extractedJson = data.extracted_json || {};
-            const filledFields = Object.entries(extractedJson).filter(([key, value]) => value && value.trim());
-            const emptyFields = Object.entries(extractedJson).filter(([key, value]) => !value || !value.trim());
+            // Show extracted JSON data - statements come back as a list of transactions
+            const extractedJson = data.extracted_json || { transactions: data.transactions || [] };
+            const filledFields = Object.entries(extractedJson).filter(([key, value]) => value && String(value).trim());
+            const emptyFields = Object.entries(extractedJson).filter(([key, value]) => !value || !String(value).trim());
 
             jsonContent.innerHTML = `
                 <div class="json-section">
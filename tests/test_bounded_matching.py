@@ -0,0 +1,44 @@
+import re
+import time
+
+import pytest
+
+import app
+from stress import EXTRACTORS, adversarial_texts
+
+
+@pytest.mark.parametrize('alternative, literal', [
+    (r'x\d{1,3}y', None),
+    ('ab{0,1}c', None),
+    ('abc{,3}def', 'def'),
+    ('abc{2}def', 'abc'),
+    ('abcd{2,}?efgh', 'abcd'),
+    (r'Policy\s*No[:\s]{1,4}(\d+)', 'policy'),
+])
+def test_required_literal_skips_repeat_quantifiers(alternative, literal):
+    assert app.required_literal(alternative) == literal
+
+
+@pytest.mark.parametrize('pattern, expected', [
+    (r'x\d{1,3}y', 'x12y'),
+    ('ab{0,1}c', 'ac'),
+    ('zzz{2}q', 'zzzzq'),
+])
+def test_bounded_search_finds_quantified_matches(pattern, expected):
+    # Far enough in that windows without a required literal would be skipped
+    text = 'filler ' * 2000 + expected + ' tail'
+    match = app.bounded_search(re.compile(pattern), text, 'field')
+    assert match is not None and match.group() == expected
+
+
+@pytest.mark.parametrize('text_name', sorted(adversarial_texts(10)))
+def test_adversarial_texts_stay_within_regex_budget(monkeypatch, text_name):
+    budget_seconds = 0.5
+    monkeypatch.setitem(app.app.config, 'REGEX_BUDGET_SECONDS', budget_seconds)
+    text = adversarial_texts(200_000)[text_name]
+    for extractor_name, extractor in EXTRACTORS.items():
+        with app.regex_budget():
+            started = time.perf_counter()
+            extractor(text)
+            elapsed = time.perf_counter() - started
+        assert elapsed <= budget_seconds + 1.0, f'{extractor_name} took {elapsed:.2f}s'
@@ -0,0 +1,36 @@
+import app
+from pdfgen import document_pages
+
+
+def page_texts(kind, page_count):
+    return [
+        '\n'.join(line if isinstance(line, str) else ' '.join(cell[1] for cell in line) for line in page)
+        for page in document_pages(kind, page_count)
+    ]
+
+
+def full_read(extractor, pages):
+    offsets = {}
+    document = app.DocumentText(pages)
+    return app.policy_result(document, app.POLICY_EXTRACTORS[extractor](document.text, offsets), offsets)
+
+
+def test_lazy_read_matches_full_read_of_the_pages_it_read():
+    # Halving every page pushes fields over the page breaks
+    halves = [half for text in page_texts('kotak', 6) for half in (text[:len(text) // 2], text[len(text) // 2:])]
+    pages = list(enumerate(halves, 1))
+    with app.app.app_context():
+        result = app.read_policy_lazy('kotak', iter(pages), len(pages), len(pages))
+        expected = full_read('kotak', pages[:result['pages_read']])
+    for key in ('extracted_json', 'field_pages', 'text'):
+        assert result[key] == expected[key]
+    assert all(result['extracted_json'][name] for name in app.REQUIRED_POLICY_FIELDS['kotak'])
+    assert result['pages_read'] < len(pages)
+
+
+def test_lazy_read_stops_at_the_page_cap():
+    pages = list(enumerate(['filler text\n' * 40] * 10, 1))
+    with app.app.app_context():
+        result = app.read_policy_lazy('universal', iter(pages), len(pages), 4)
+    assert result['pages_read'] == 4
+    assert result['text'] == full_read('universal', pages[:4])['text']
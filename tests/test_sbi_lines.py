@@ -0,0 +1,31 @@
+import pytest
+
+import app
+
+LINES = [
+    '19/04/2023 19/04/2023 IMPS/P2A/473500134717/TRANSFER 17,094.54 -794,461,059.83',
+    '10/03/2023 10/03/2023 UPI/CR/72677955635/RECEIVE 43,687.12 -7,467,481.56',
+    '02/05/2023 02/05/2023 CHQ NO 914350222398 PAYMENT TO RENT 24,767.43 -1,446,790.77',
+    '09/01/2023 09/01/2023 BY TRANSFER-NEFT SALARY 28,294.19 -4,388,874.96',
+    '02-01-2023 15-Apr-2024 #CHQNO7abSALARYUTR 123456cr 500.00 1,200.00',
+    '15-Apr-2024 NEFT 15-Apr-202498765432109 5XRECEIVE CHQ NO\t1,000.00',
+    '01.05.2024 UPICHQ NO02/01/202302/01/2023 1.00 2.00 3.00',
+    '1/2/24 ﬂ 5XCHQ NO 1-2/02/01/2023CR 12,345',
+    '02/01/2023 RTGS 02/01/2023123456702/01/2023 DEBIT@CR १२३४५६ 1.00 2.00 3.00',
+    '02/01/2023 03/01/2023 _5 NEFT7ß UTR 98765432109NEFT Dr RECEIVE -4251.60',
+    '02/01/2023 CASH DEPOSIT BAL 1,000.00 2,000.00',
+]
+
+
+@pytest.mark.parametrize('line', LINES)
+def test_row_paths_match_general_tokenizer(monkeypatch, line):
+    fields = app.parse_sbi_fields(line)
+    monkeypatch.setattr(app, 'sbi_row_fields', lambda line: None)
+    monkeypatch.setattr(app, 'tokenize_sbi_row', lambda line: None)
+    assert fields == app.parse_sbi_fields(line)
+
+
+def test_digits_inside_words_keep_the_reference():
+    line = '19/04/2023 19/04/2023 IMPS/P2A/473500134717/TRANSFER 17,094.54 -794,461,059.83'
+    assert app.sbi_row_fields(line) == ('19/04/2023', 'IMPSP2ATRANSFER', '473500134717', '17094.54', None,
+                                        '-794461059.83')
@@ -0,0 +1,57 @@
+"""
+Uploads spooled to disk and parsed through a memory map.
+Every file part of a multipart upload is written to an anonymous temporary file as the request body is read, in the
+multipart parser's fixed-size chunks, instead of being collected in memory. The extractors then read it through a
+read-only mmap: the upload's pages live in the OS page cache and only the parts pdfplumber touches are paged in.
+The map keeps the spool file's path, so pool processes open that same file rather than a copy of it.
+"""
+import mmap
+import os
+import tempfile
+
+from flask import Request, current_app
+
+
+class SpoolingRequest(Request):
+    """
+    Request whose file uploads always go to disk and whose size cap depends on the route
+    (UPLOAD_LIMITS, falling back to MAX_CONTENT_LENGTH)
+    """
+
+    @property
+    def max_content_length(self):
+        if not current_app:
+            return None
+        rule = self.url_rule.rule if self.url_rule is not None else None
+        return current_app.config['UPLOAD_LIMITS'].get(rule, current_app.config['MAX_CONTENT_LENGTH'])
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Deleted when it is closed at the end of the request - the map made from it stays valid on its own
+        return tempfile.NamedTemporaryFile(dir=current_app.config['UPLOAD_SPOOL_DIR'])
+
+
+class MappedUpload(mmap.mmap):
+    """
+    Read-only map of a spooled upload; path is the spool file's path (None if it has none)
+    """
+    path = None
+
+
+def map_upload(stream):
+    """
+    A read-only mmap of a spooled upload - b'' for an empty one, and the bytes themselves
+    for a stream that is not backed by a file
+    """
+    try:
+        fileno = stream.fileno()
+    except (AttributeError, OSError):
+        stream.seek(0)
+        return stream.read()
+    stream.flush()
+    if os.fstat(fileno).st_size == 0:
+        return b''
+    upload = MappedUpload(fileno, 0, access=mmap.ACCESS_READ)
+    name = getattr(stream, 'name', None)
+    if isinstance(name, str):
+        upload.path = name
+    return upload